@@ -64,11 +64,8 @@ def create_app() -> FastAPI:
     @app.get("/api/v1/stats")
     async def get_stats():
         """Get system statistics"""
-        from db.database import AsyncSessionLocal
-        from db import crud
+        from services.stats_service import get_stats_snapshot
 
-        async with AsyncSessionLocal() as db:
-            stats = await crud.get_call_stats(db)
-            return stats
+        return await get_stats_snapshot()
 
     return app
@@ -2,18 +2,28 @@
 Calls API routes
 """
 
+import base64
+import os
 from datetime import datetime
 from typing import Optional, List
 
+import structlog
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.deps import get_db
+from config import settings
 from db import crud
+from logging_config import LogThrottle
+
+logger = structlog.get_logger(__name__)
 
 router = APIRouter()
 
+_active_calls_log = LogThrottle(30.0)
+
 
 # === Pydantic Models ===
 
@@ -41,6 +51,10 @@ class CallResponse(BaseModel):
     end_time: Optional[str]
     duration_seconds: Optional[float]
     summary: Optional[str]
+    llm_turns: int = 0
+    llm_fallback_races: int = 0
+    llm_fallback_wins: int = 0
+    llm_deadline_misses: int = 0
     created_at: str
 
     class Config:
@@ -53,9 +67,43 @@ class CallDetailResponse(CallResponse):
 
 class CallsListResponse(BaseModel):
     items: List[CallResponse]
-    total: int
-    page: int
+    total: Optional[int]
+    page: Optional[int]
     per_page: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
+
+
+class CallSearchResult(BaseModel):
+    id: int
+    call_id: str
+    called_number: Optional[str]
+    prompt_id: Optional[int]
+    start_time: Optional[str]
+    message_id: int
+    role: str
+    rank: float
+    snippet: str
+
+
+class CallSearchResponse(BaseModel):
+    items: List[CallSearchResult]
+    next_cursor: Optional[str] = None
+
+
+class CallRecordingResponse(BaseModel):
+    id: int
+    call_id: int
+    format: str
+    channels: int
+    sample_rate: int
+    duration_seconds: float
+    size_bytes: int
+    dropped_ms: int
+    created_at: str
+
+    class Config:
+        from_attributes = True
 
 
 class ActiveCallResponse(BaseModel):
@@ -66,17 +114,24 @@ class ActiveCallResponse(BaseModel):
     state: str
     duration: float
     message_count: int
+    sample_rate: Optional[int] = None
+    stt_queue: Optional[dict] = None
+    llm: Optional[dict] = None
+    turn: Optional[dict] = None
 
 
 class DialRequest(BaseModel):
     number: str = Field(..., min_length=10, max_length=15)
     prompt_id: Optional[int] = None
+    priority: int = Field(0, ge=0, le=9)  # higher leaves the queue first
+    queue_timeout_s: Optional[float] = Field(None, ge=0, le=300)  # 0 = don't wait
 
 
 class DialResponse(BaseModel):
     success: bool
     call_id: Optional[str] = None
     message: str
+    queue_wait_ms: int = 0
 
 
 # === Routes ===
@@ -84,17 +139,17 @@ class DialResponse(BaseModel):
 @router.get("/active", response_model=List[ActiveCallResponse])
 async def list_active_calls():
     """List all currently active calls"""
-    import structlog
     from state import active_calls
-    logger = structlog.get_logger(__name__)
 
-    logger.info("Consultando chamadas ativas", total=len(active_calls), keys=list(active_calls.keys()))
+    # Dashboard polls this endpoint: log at most once per interval
+    suppressed = _active_calls_log.allow()
+    if suppressed is not None:
+        logger.debug("Consultando chamadas ativas", total=len(active_calls), suppressed=suppressed)
 
     result = []
     for call_id, handler in active_calls.items():
         try:
             status_data = handler.get_status()
-            logger.info("Status da chamada", call_id=call_id, status=status_data)
             result.append(ActiveCallResponse(
                 call_id=call_id,
                 freeswitch_uuid=status_data.get("freeswitch_uuid"),
@@ -103,6 +158,10 @@ async def list_active_calls():
                 state=status_data.get("state", "unknown"),
                 duration=status_data.get("duration", 0),
                 message_count=status_data.get("message_count", 0),
+                sample_rate=status_data.get("sample_rate"),
+                stt_queue=status_data.get("stt_queue"),
+                llm=status_data.get("llm"),
+                turn=status_data.get("turn"),
             ))
         except Exception as e:
             logger.error("Erro ao obter status da chamada", call_id=call_id, error=str(e))
@@ -131,6 +190,10 @@ async def get_active_call(call_id: str):
         state=status_data.get("state", "unknown"),
         duration=status_data.get("duration", 0),
         message_count=status_data.get("message_count", 0),
+        sample_rate=status_data.get("sample_rate"),
+        stt_queue=status_data.get("stt_queue"),
+        llm=status_data.get("llm"),
+        turn=status_data.get("turn"),
     )
 
 
@@ -161,13 +224,27 @@ async def hangup_call(call_id: str):
     return {"success": False, "message": "No FreeSWITCH UUID available"}
 
 
+@router.get("/capacity")
+async def get_call_capacity():
+    """Call slots in use, utilization and the dial queue"""
+    from services.capacity_service import get_capacity_status
+
+    return get_capacity_status()
+
+
 @router.post("/dial", response_model=DialResponse)
 async def dial_number(
     request: DialRequest,
     db: AsyncSession = Depends(get_db)
 ):
-    """Initiate a new outbound call"""
-    from services.dialer_service import initiate_call
+    """Initiate a new outbound call.
+
+    Reserves a call slot first. Without a free slot the request waits in the
+    dial queue (by priority); a full queue or a queue timeout returns 503
+    with the request's queue position.
+    """
+    from services.capacity_service import release_slot, reserve
+    from services.dialer_service import initiate_call, new_call_id
 
     # Get prompt config if specified
     prompt = None
@@ -184,13 +261,30 @@ async def dial_number(
 
     prompt_config = prompt.to_dict() if prompt else None
 
+    call_id = new_call_id()
+    admission = await reserve(call_id, priority=request.priority, timeout=request.queue_timeout_s)
+    if not admission["admitted"]:
+        reason = "timed out in the dial queue" if admission["reason"] == "timeout" else "dial queue is full"
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(max(1, int(settings.CALL_QUEUE_TIMEOUT_S)))},
+            content={
+                "detail": f"No call capacity available: {reason} (position {admission['queue_position']})",
+                "reason": admission["reason"],
+                "queue_position": admission["queue_position"],
+                "queue_length": admission["queue_length"],
+                "waited_ms": admission["waited_ms"],
+            },
+        )
+
     try:
-        call_id = await initiate_call(request.number, prompt_config)
+        call_id = await initiate_call(request.number, prompt_config, call_id=call_id)
         if call_id:
             return DialResponse(
                 success=True,
                 call_id=call_id,
-                message=f"Call initiated to {request.number}"
+                message=f"Call initiated to {request.number}",
+                queue_wait_ms=admission["waited_ms"],
             )
         else:
             return DialResponse(
@@ -198,12 +292,34 @@ async def dial_number(
                 message="Failed to initiate call"
             )
     except Exception as e:
+        release_slot(call_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
 
+def _encode_cursor(*values) -> str:
+    """Opaque keyset cursor from the sort key of the last row"""
+    raw = "|".join(str(v) for v in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, *types) -> tuple:
+    """Decode a cursor produced by _encode_cursor, converting each part"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded).decode().split("|")
+        if len(parts) != len(types):
+            raise ValueError("wrong number of parts")
+        return tuple(t(p) for t, p in zip(types, parts))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
 @router.get("", response_model=CallsListResponse)
 async def list_calls(
     page: int = Query(1, ge=1),
@@ -211,32 +327,116 @@ async def list_calls(
     status: Optional[str] = None,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination)"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated|none)$"),
     db: AsyncSession = Depends(get_db)
 ):
-    """List call history with pagination and filters"""
-    skip = (page - 1) * per_page
+    """List call history with pagination and filters.
+
+    Two pagination modes:
+    - page/per_page (OFFSET): kept for compatibility, gets slower on deep pages.
+    - cursor: pass the `next_cursor` of the previous response; constant cost
+      per page regardless of depth.
+
+    `count` controls the total: `exact` (COUNT over the filtered set),
+    `estimated` (planner estimate, no scan) or `none`. Defaults to `exact`
+    in page mode and `estimated` in cursor mode.
+    """
+    after = _decode_cursor(cursor, datetime.fromisoformat, int) if cursor else None
 
+    # Fetch one extra row to know if there is a next page
     calls = await crud.get_calls(
         db,
-        skip=skip,
-        limit=per_page,
+        skip=(page - 1) * per_page,
+        limit=per_page + 1,
         status=status,
         from_date=from_date,
         to_date=to_date,
+        after=after,
     )
 
-    total = await crud.count_calls(
-        db,
-        status=status,
-        from_date=from_date,
-        to_date=to_date,
-    )
+    next_cursor = None
+    if len(calls) > per_page:
+        calls = calls[:per_page]
+        next_cursor = _encode_cursor(calls[-1].start_time.isoformat(), calls[-1].id)
+
+    count_mode = count or ("estimated" if after else "exact")
+    total = None
+    if count_mode == "exact":
+        total = await crud.count_calls(
+            db,
+            status=status,
+            from_date=from_date,
+            to_date=to_date,
+        )
+    elif count_mode == "estimated":
+        total = await crud.estimate_calls(
+            db,
+            status=status,
+            from_date=from_date,
+            to_date=to_date,
+        )
 
     return CallsListResponse(
         items=[CallResponse(**c.to_dict()) for c in calls],
         total=total,
-        page=page,
+        page=None if after else page,
         per_page=per_page,
+        total_is_estimate=count_mode == "estimated",
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/search", response_model=CallSearchResponse)
+async def search_calls(
+    q: str = Query(..., min_length=2, max_length=200, description="Search terms (web search syntax)"),
+    limit: int = Query(20, ge=1, le=100),
+    prompt_id: Optional[int] = None,
+    campaign_id: Optional[int] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over call transcripts.
+
+    Returns calls ranked by their best matching message, with a highlighted
+    snippet. Use `next_cursor` to fetch the next page.
+    """
+    after = _decode_cursor(cursor, float, int) if cursor else None
+
+    rows = await crud.search_call_messages(
+        db,
+        q,
+        limit=limit + 1,
+        prompt_id=prompt_id,
+        campaign_id=campaign_id,
+        from_date=from_date,
+        to_date=to_date,
+        after=after,
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(repr(rows[-1].rank), rows[-1].call_db_id)
+
+    return CallSearchResponse(
+        items=[
+            CallSearchResult(
+                id=row.call_db_id,
+                call_id=row.call_id,
+                called_number=row.called_number,
+                prompt_id=row.prompt_id,
+                start_time=row.start_time.isoformat() if row.start_time else None,
+                message_id=row.message_id,
+                role=row.role,
+                rank=row.rank,
+                snippet=row.snippet,
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
     )
 
 
@@ -256,16 +456,66 @@ async def get_call_detail(
     return CallDetailResponse(**call.to_dict(include_messages=True))
 
 
+RECORDING_MEDIA_TYPES = {
+    "flac": "audio/flac",
+    "opus": "audio/ogg",
+}
+
+
+@router.get("/{call_id}/recording", response_model=CallRecordingResponse)
+async def get_call_recording(
+    call_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get recording metadata for a call"""
+    recording = await crud.get_call_recording(db, call_id)
+    if not recording:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recording not found"
+        )
+    return CallRecordingResponse(**recording.to_dict())
+
+
+@router.get("/{call_id}/recording/audio")
+async def download_call_recording(
+    call_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Download the recording audio file (FLAC or Ogg/Opus)"""
+    from file_io import run_file_io
+
+    recording = await crud.get_call_recording(db, call_id)
+    if not recording or not await run_file_io(os.path.exists, recording.file_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recording not found"
+        )
+    return FileResponse(
+        recording.file_path,
+        media_type=RECORDING_MEDIA_TYPES.get(recording.format, "application/octet-stream"),
+        filename=os.path.basename(recording.file_path),
+    )
+
+
 @router.delete("/{call_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_call(
     call_id: int,
     db: AsyncSession = Depends(get_db)
 ):
-    """Delete a call record"""
+    """Delete a call record (and its recording file, if any)"""
+    from file_io import remove_quietly, run_file_io
+    from services.stats_service import invalidate_stats
+
+    recording = await crud.get_call_recording(db, call_id)
+    if recording:
+        await run_file_io(remove_quietly, recording.file_path)
+
     deleted = await crud.delete_call(db, call_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Call not found"
         )
+    invalidate_stats()
     return None
@@ -4,7 +4,8 @@ Dashboard WebSocket route for real-time updates
 
 import asyncio
 import json
-from typing import Set
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
 from datetime import datetime
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
@@ -15,70 +16,158 @@ logger = structlog.get_logger(__name__)
 router = APIRouter()
 
 
+# Per-client outbound queue limits
+CLIENT_QUEUE_SIZE = 100
+CLIENT_SEND_TIMEOUT = 5.0  # seconds for a single send before the client is dropped
+CLIENT_MAX_DROPPED = 500   # messages dropped before a lagging client is disconnected
+
+
+class DashboardClient:
+    """
+    One dashboard connection with its own bounded outbound queue and writer task.
+
+    Messages with a coalesce key (stats, per-call state) replace any queued
+    message with the same key instead of queueing again. When the queue is
+    full the oldest message is dropped, so a slow client only hurts itself.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self._queue: Deque[Tuple[Optional[str], Optional[str]]] = deque()
+        self._coalesced: Dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+        self.dropped = 0
+        self.sent = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def enqueue(self, message: str, coalesce_key: Optional[str] = None) -> None:
+        """Queue a serialized message (never blocks)"""
+        if coalesce_key is not None:
+            if coalesce_key in self._coalesced:
+                self._coalesced[coalesce_key] = message
+                return
+            self._coalesced[coalesce_key] = message
+            self._queue.append((coalesce_key, None))
+        else:
+            self._queue.append((None, message))
+
+        if len(self._queue) > CLIENT_QUEUE_SIZE:
+            key, _ = self._queue.popleft()
+            if key is not None:
+                self._coalesced.pop(key, None)
+            self.dropped += 1
+
+        self._wakeup.set()
+
+    async def run_writer(self) -> None:
+        """Send queued messages in order until the connection fails"""
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if self.dropped > CLIENT_MAX_DROPPED:
+                logger.warning("Dashboard client too slow, disconnecting", dropped=self.dropped)
+                return
+
+            key, message = self._queue.popleft()
+            if key is not None:
+                message = self._coalesced.pop(key)
+
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(message),
+                    timeout=CLIENT_SEND_TIMEOUT
+                )
+                self.sent += 1
+            except Exception as e:
+                logger.warning("Failed to send to dashboard client", error=str(e))
+                return
+
+
 class DashboardBroadcaster:
     """
     Manages WebSocket connections for dashboard real-time updates.
     Singleton pattern - use the global `broadcaster` instance.
+
+    Publishing only serializes the message once and enqueues it on every
+    client; each client has its own writer task, so callers never wait on
+    a socket.
     """
 
     def __init__(self):
-        self.connections: Set[WebSocket] = set()
-        self._lock = asyncio.Lock()
+        self.clients: Dict[WebSocket, DashboardClient] = {}
 
-    async def connect(self, websocket: WebSocket):
+    @property
+    def connections(self) -> Set[WebSocket]:
+        return set(self.clients)
+
+    async def connect(self, websocket: WebSocket) -> DashboardClient:
         """Accept and register a new WebSocket connection"""
         await websocket.accept()
-        async with self._lock:
-            self.connections.add(websocket)
-        logger.info("Dashboard client connected", total_connections=len(self.connections))
+        client = DashboardClient(websocket)
+        client.task = asyncio.create_task(self._run_client(client))
+        self.clients[websocket] = client
+        logger.info("Dashboard client connected", total_connections=len(self.clients))
+        return client
+
+    async def _run_client(self, client: DashboardClient):
+        await client.run_writer()
+        # Writer stopped (send failed or client too slow): close the socket so
+        # the receive loop in dashboard_websocket ends too
+        self.clients.pop(client.websocket, None)
+        try:
+            await client.websocket.close()
+        except Exception:
+            pass
 
     async def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
-        async with self._lock:
-            self.connections.discard(websocket)
-        logger.info("Dashboard client disconnected", total_connections=len(self.connections))
+        client = self.clients.pop(websocket, None)
+        if client and client.task and client.task is not asyncio.current_task():
+            client.task.cancel()
+        logger.info("Dashboard client disconnected", total_connections=len(self.clients))
+
+    @staticmethod
+    def _serialize(event_type: str, data: dict) -> str:
+        return json.dumps({
+            "type": event_type,
+            "data": data,
+            "timestamp": datetime.utcnow().isoformat(),
+        })
 
-    async def broadcast(self, event_type: str, data: dict):
+    def broadcast(self, event_type: str, data: dict, coalesce_key: Optional[str] = None):
         """
-        Broadcast a message to all connected dashboard clients.
+        Broadcast a message to all connected dashboard clients (non-blocking).
 
         Args:
             event_type: Type of event (call_started, call_ended, etc.)
             data: Event data to send
+            coalesce_key: If set, a newer message with the same key replaces
+                one still waiting in a client's queue
         """
-        if not self.connections:
+        if not self.clients:
             return
 
-        message = json.dumps({
-            "type": event_type,
-            "data": data,
-            "timestamp": datetime.utcnow().isoformat(),
-        })
-
-        # Send to all connections, remove any that fail
-        disconnected = set()
-        async with self._lock:
-            for websocket in self.connections:
-                try:
-                    await websocket.send_text(message)
-                except Exception as e:
-                    logger.warning("Failed to send to dashboard client", error=str(e))
-                    disconnected.add(websocket)
+        message = self._serialize(event_type, data)
+        for client in list(self.clients.values()):
+            client.enqueue(message, coalesce_key)
 
-            # Clean up disconnected clients
-            self.connections -= disconnected
+    def send_to(self, websocket: WebSocket, event_type: str, data: dict):
+        """Send a message to a specific WebSocket connection (non-blocking)"""
+        client = self.clients.get(websocket)
+        if client:
+            client.enqueue(self._serialize(event_type, data))
 
-    async def send_to(self, websocket: WebSocket, event_type: str, data: dict):
-        """Send a message to a specific WebSocket connection"""
-        message = json.dumps({
-            "type": event_type,
-            "data": data,
-            "timestamp": datetime.utcnow().isoformat(),
-        })
-        try:
-            await websocket.send_text(message)
-        except Exception as e:
-            logger.warning("Failed to send to specific client", error=str(e))
+    def get_stats(self) -> dict:
+        """Queue statistics for all connected clients"""
+        return {
+            "clients": len(self.clients),
+            "queued": sum(len(c._queue) for c in self.clients.values()),
+            "sent": sum(c.sent for c in self.clients.values()),
+            "dropped": sum(c.dropped for c in self.clients.values()),
+        }
 
 
 # Global broadcaster instance
@@ -86,47 +175,48 @@ broadcaster = DashboardBroadcaster()
 
 
 # === Event helper functions (to be called from CallHandler) ===
+# These only enqueue - safe to call from the call-handling path.
 
-async def emit_call_started(call_id: str, data: dict):
+def emit_call_started(call_id: str, data: dict):
     """Emit when a new call starts"""
-    await broadcaster.broadcast("call_started", {
+    broadcaster.broadcast("call_started", {
         "call_id": call_id,
         **data,
     })
 
 
-async def emit_call_state_changed(call_id: str, state: str, duration: float, message_count: int):
+def emit_call_state_changed(call_id: str, state: str, duration: float, message_count: int):
     """Emit when call state changes"""
-    await broadcaster.broadcast("call_state_changed", {
+    broadcaster.broadcast("call_state_changed", {
         "call_id": call_id,
         "state": state,
         "duration": duration,
         "message_count": message_count,
-    })
+    }, coalesce_key=f"state:{call_id}")
 
 
-async def emit_call_ended(call_id: str, duration: float, summary: str = None):
+def emit_call_ended(call_id: str, duration: float, summary: str = None):
     """Emit when a call ends"""
-    await broadcaster.broadcast("call_ended", {
+    broadcaster.broadcast("call_ended", {
         "call_id": call_id,
         "duration": duration,
         "summary": summary,
     })
 
 
-async def emit_stats_updated():
-    """Emit updated statistics"""
-    from db.database import AsyncSessionLocal
-    from db import crud
-
-    async with AsyncSessionLocal() as db:
-        stats = await crud.get_call_stats(db)
-
-    # Add active calls count from memory
+async def _current_stats() -> dict:
+    """Statistics from the cached snapshot, with live active calls count"""
+    from services.stats_service import get_stats_snapshot
     from state import active_calls
+
+    stats = await get_stats_snapshot()
     stats["active_calls"] = len(active_calls)
+    return stats
 
-    await broadcaster.broadcast("stats_updated", stats)
+
+async def emit_stats_updated():
+    """Emit updated statistics to all clients"""
+    broadcaster.broadcast("stats_updated", await _current_stats(), coalesce_key="stats")
 
 
 # === WebSocket Route ===
@@ -145,8 +235,8 @@ async def dashboard_websocket(websocket: WebSocket):
     await broadcaster.connect(websocket)
 
     try:
-        # Send initial stats on connection
-        await emit_stats_updated()
+        # Send initial stats on connection (to this client only, from the snapshot)
+        broadcaster.send_to(websocket, "stats_updated", await _current_stats())
 
         # Keep connection alive and handle incoming messages
         while True:
@@ -163,25 +253,19 @@ async def dashboard_websocket(websocket: WebSocket):
                     msg_type = message.get("type")
 
                     if msg_type == "ping":
-                        await broadcaster.send_to(websocket, "pong", {})
+                        broadcaster.send_to(websocket, "pong", {})
                     elif msg_type == "get_stats":
-                        from db.database import AsyncSessionLocal
-                        from db import crud
-                        from state import active_calls
-                        async with AsyncSessionLocal() as db:
-                            stats = await crud.get_call_stats(db)
-                        stats["active_calls"] = len(active_calls)
-                        await broadcaster.send_to(websocket, "stats", stats)
+                        broadcaster.send_to(websocket, "stats", await _current_stats())
 
                 except json.JSONDecodeError:
                     pass
 
             except asyncio.TimeoutError:
-                # Send ping to keep connection alive
-                try:
-                    await websocket.send_text(json.dumps({"type": "ping"}))
-                except Exception:
+                # Send ping to keep connection alive (through the client's queue)
+                client = broadcaster.clients.get(websocket)
+                if not client:
                     break
+                client.enqueue(json.dumps({"type": "ping"}))
 
     except WebSocketDisconnect:
         pass
@@ -2,19 +2,23 @@
 Prompts API routes
 """
 
-from typing import Optional, List
+import json
+from typing import Literal, Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.deps import get_db
+from audio_format import call_sample_rate
 from db import crud
 from services.greeting_service import (
     generate_prompt_greeting,
     delete_prompt_greeting,
     get_prompt_greeting_info,
 )
+from services import response_cache_service as response_cache
+from services import prerender_service
 
 router = APIRouter()
 
@@ -29,6 +33,23 @@ class PromptCreate(BaseModel):
     llm_model: str = Field(default="gpt-4.1-nano")
     temperature: float = Field(default=0.7, ge=0, le=2)
     greeting_text: Optional[str] = Field(None, min_length=10, max_length=500)
+    recording_enabled: bool = False
+    recording_format: str = Field(default="flac", pattern="^(flac|opus)$")
+    recording_channels: str = Field(default="mono", pattern="^(mono|stereo)$")
+    vad_enabled: bool = False
+    vad_threshold_db: Optional[float] = Field(None, ge=3, le=40)
+    vad_silence_ms: Optional[int] = Field(None, ge=100, le=2000)
+    fillers_enabled: bool = True
+    filler_delay_ms: Optional[int] = Field(None, ge=0, le=5000)
+    response_cache_enabled: bool = False
+    response_cache_ttl_seconds: Optional[int] = Field(None, ge=60)
+    llm_fallback_model: Optional[str] = Field(None, max_length=50)
+    llm_first_token_ms: Optional[int] = Field(None, ge=100, le=30000)
+    llm_hard_deadline_ms: Optional[int] = Field(None, ge=100, le=60000)
+    tts_hedge_ms: Optional[int] = Field(None, ge=0, le=30000)
+    tts_hedge_voice_id: Optional[str] = None
+    sample_rate: Optional[Literal[8000, 16000]] = None
+    prerender_phrases: List[str] = Field(default_factory=list, max_length=200)
 
 
 class PromptUpdate(BaseModel):
@@ -39,6 +60,23 @@ class PromptUpdate(BaseModel):
     llm_model: Optional[str] = None
     temperature: Optional[float] = Field(None, ge=0, le=2)
     greeting_text: Optional[str] = Field(None, min_length=10, max_length=500)
+    recording_enabled: Optional[bool] = None
+    recording_format: Optional[str] = Field(None, pattern="^(flac|opus)$")
+    recording_channels: Optional[str] = Field(None, pattern="^(mono|stereo)$")
+    vad_enabled: Optional[bool] = None
+    vad_threshold_db: Optional[float] = Field(None, ge=3, le=40)
+    vad_silence_ms: Optional[int] = Field(None, ge=100, le=2000)
+    fillers_enabled: Optional[bool] = None
+    filler_delay_ms: Optional[int] = Field(None, ge=0, le=5000)
+    response_cache_enabled: Optional[bool] = None
+    response_cache_ttl_seconds: Optional[int] = Field(None, ge=60)
+    llm_fallback_model: Optional[str] = Field(None, max_length=50)
+    llm_first_token_ms: Optional[int] = Field(None, ge=100, le=30000)
+    llm_hard_deadline_ms: Optional[int] = Field(None, ge=100, le=60000)
+    tts_hedge_ms: Optional[int] = Field(None, ge=0, le=30000)
+    tts_hedge_voice_id: Optional[str] = None
+    sample_rate: Optional[Literal[8000, 16000]] = None
+    prerender_phrases: Optional[List[str]] = Field(None, max_length=200)
 
 
 class PromptResponse(BaseModel):
@@ -51,6 +89,23 @@ class PromptResponse(BaseModel):
     temperature: float
     greeting_text: Optional[str]
     greeting_duration_ms: Optional[float]
+    recording_enabled: bool = False
+    recording_format: str = "flac"
+    recording_channels: str = "mono"
+    vad_enabled: bool = False
+    vad_threshold_db: Optional[float] = None
+    vad_silence_ms: Optional[int] = None
+    fillers_enabled: bool = True
+    filler_delay_ms: Optional[int] = None
+    response_cache_enabled: bool = False
+    response_cache_ttl_seconds: Optional[int] = None
+    llm_fallback_model: Optional[str] = None
+    llm_first_token_ms: Optional[int] = None
+    llm_hard_deadline_ms: Optional[int] = None
+    tts_hedge_ms: Optional[int] = None
+    tts_hedge_voice_id: Optional[str] = None
+    sample_rate: Optional[int] = None
+    prerender_phrases: List[str] = []
     is_active: bool
     created_at: str
     updated_at: str
@@ -73,6 +128,58 @@ class GreetingResponse(BaseModel):
     message: str
 
 
+class PrerenderJobRequest(BaseModel):
+    days: Optional[int] = Field(None, ge=1, le=365)
+    min_count: Optional[int] = Field(None, ge=1)
+    limit: Optional[int] = Field(None, ge=1, le=500)
+
+
+class PrerenderInfo(BaseModel):
+    prompt_id: int
+    voice_id: Optional[str]
+    sample_rate: Optional[int] = None
+    generated_at: Optional[str]
+    assets: List[dict]
+    coverage: dict
+    job: Optional[dict]
+
+
+class ResponseCacheRuleCreate(BaseModel):
+    utterance: str = Field(..., min_length=1, max_length=500)
+    rule: str = Field(..., pattern="^(pin|forbid)$")
+    response_text: Optional[str] = Field(None, min_length=1)
+
+
+class ResponseCacheRuleResponse(BaseModel):
+    id: int
+    prompt_id: int
+    utterance: str
+    rule: str
+    response_text: Optional[str]
+    created_at: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class ResponseCacheEntry(BaseModel):
+    utterance: str
+    text: str
+    has_audio: bool
+    hits: int
+    pinned: bool
+    created_at: float
+    expires_at: Optional[float]
+
+
+class ResponseCacheInfo(BaseModel):
+    prompt_id: int
+    enabled: bool
+    stats: dict
+    entries: List[ResponseCacheEntry]
+    rules: List[ResponseCacheRuleResponse]
+
+
 # === Routes ===
 
 @router.get("", response_model=List[PromptResponse])
@@ -104,7 +211,9 @@ async def create_prompt(
             detail=f"Prompt with name '{prompt_data.name}' already exists"
         )
 
-    prompt = await crud.create_prompt(db, **prompt_data.model_dump())
+    data = prompt_data.model_dump()
+    data["prerender_phrases"] = json.dumps(data["prerender_phrases"])
+    prompt = await crud.create_prompt(db, **data)
 
     # Se greeting_text foi fornecido, gerar áudio em background
     if prompt_data.greeting_text:
@@ -113,9 +222,15 @@ async def create_prompt(
             db,
             prompt.id,
             prompt_data.greeting_text,
-            prompt_data.voice_id
+            prompt_data.voice_id,
+            prompt_data.sample_rate
         )
 
+    if prompt_data.sample_rate:
+        # Fillers e greeting global na taxa do prompt antes da primeira chamada
+        from call_handler import ensure_audio_assets
+        ensure_audio_assets(prompt_data.sample_rate)
+
     return PromptResponse(**prompt.to_dict())
 
 
@@ -123,10 +238,11 @@ async def _generate_greeting_and_update(
     db: AsyncSession,
     prompt_id: int,
     text: str,
-    voice_id: str
+    voice_id: str,
+    sample_rate: Optional[int] = None
 ):
     """Gera greeting e atualiza duração no banco."""
-    result = await generate_prompt_greeting(prompt_id, text, voice_id)
+    result = await generate_prompt_greeting(prompt_id, text, voice_id, sample_rate)
     if result["success"]:
         await crud.update_prompt(db, prompt_id, greeting_duration_ms=result["duration_ms"])
 
@@ -164,7 +280,8 @@ async def update_prompt(
 ):
     """Update a prompt.
 
-    If greeting_text is changed, regenerates the greeting audio in the background.
+    If greeting_text (or sample_rate) is changed, regenerates the greeting audio
+    in the background.
     """
     # Check if new name already exists (if name is being changed)
     if prompt_data.name:
@@ -184,6 +301,8 @@ async def update_prompt(
         )
 
     update_data = prompt_data.model_dump(exclude_unset=True)
+    if update_data.get("prerender_phrases") is not None:
+        update_data["prerender_phrases"] = json.dumps(update_data["prerender_phrases"])
 
     # Se greeting_text foi alterado, regenerar áudio
     greeting_text_changed = (
@@ -198,24 +317,38 @@ async def update_prompt(
         current_prompt.greeting_text
     )
 
+    # Nova taxa: o greeting existente é regravado na taxa nova
+    sample_rate_changed = (
+        "sample_rate" in update_data and
+        update_data["sample_rate"] != current_prompt.sample_rate
+    )
+
     if greeting_text_removed:
         # Remover arquivos de greeting e limpar duração
-        delete_prompt_greeting(prompt_id)
+        await delete_prompt_greeting(prompt_id)
         update_data["greeting_duration_ms"] = None
 
     prompt = await crud.update_prompt(db, prompt_id, **update_data)
 
-    # Regenerar greeting em background se texto mudou
-    if greeting_text_changed and update_data.get("greeting_text"):
+    # Nova versão do prompt: respostas em cache não valem mais
+    await response_cache.clear_prompt(prompt_id)
+
+    # Regenerar greeting em background se texto (ou taxa) mudou
+    if (greeting_text_changed or sample_rate_changed) and prompt.greeting_text:
         voice_id = update_data.get("voice_id") or current_prompt.voice_id
         background_tasks.add_task(
             _generate_greeting_and_update,
             db,
             prompt_id,
-            update_data["greeting_text"],
-            voice_id
+            prompt.greeting_text,
+            voice_id,
+            prompt.sample_rate
         )
 
+    if sample_rate_changed:
+        from call_handler import ensure_audio_assets
+        ensure_audio_assets(call_sample_rate(prompt.to_dict()))
+
     return PromptResponse(**prompt.to_dict())
 
 
@@ -225,8 +358,10 @@ async def delete_prompt(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a prompt and its greeting files"""
-    # Remover arquivos de greeting primeiro
-    delete_prompt_greeting(prompt_id)
+    # Remover arquivos de greeting, respostas em cache e frases pré-renderizadas primeiro
+    await delete_prompt_greeting(prompt_id)
+    await response_cache.clear_prompt(prompt_id)
+    await prerender_service.delete_prompt_assets(prompt_id)
 
     deleted = await crud.delete_prompt(db, prompt_id)
     if not deleted:
@@ -306,8 +441,8 @@ async def regenerate_greeting(
     # Determinar voice_id a usar
     voice_id = (request and request.voice_id) or prompt.voice_id
 
-    # Gerar greeting
-    result = await generate_prompt_greeting(prompt_id, text, voice_id)
+    # Gerar greeting (na taxa das chamadas do prompt)
+    result = await generate_prompt_greeting(prompt_id, text, voice_id, prompt.sample_rate)
 
     # Atualizar prompt no banco se sucesso
     if result["success"]:
@@ -326,3 +461,147 @@ async def regenerate_greeting(
         voice_id=voice_id,
         message=result["message"]
     )
+
+
+# === Pre-rendered sentences ===
+
+@router.get("/{prompt_id}/prerender", response_model=PrerenderInfo)
+async def get_prerender(
+    prompt_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the pre-rendered sentence index, coverage and last job of a prompt"""
+    prompt = await crud.get_prompt(db, prompt_id)
+    if not prompt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prompt not found"
+        )
+
+    return PrerenderInfo(**prerender_service.get_prompt_prerender_info(prompt_id))
+
+
+@router.post("/{prompt_id}/prerender", response_model=PrerenderInfo, status_code=status.HTTP_202_ACCEPTED)
+async def start_prerender(
+    prompt_id: int,
+    request: PrerenderJobRequest = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Start the pre-render job of a prompt.
+
+    Mines the most frequent assistant sentences from recent transcripts, adds
+    the prompt's prerender_phrases and synthesizes them with the prompt's voice.
+    """
+    prompt = await crud.get_prompt(db, prompt_id)
+    if not prompt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prompt not found"
+        )
+
+    request = request or PrerenderJobRequest()
+    job = prerender_service.start_prerender_job(
+        prompt_id,
+        days=request.days,
+        min_count=request.min_count,
+        limit=request.limit,
+    )
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Pre-render job already running for this prompt"
+        )
+
+    return PrerenderInfo(**prerender_service.get_prompt_prerender_info(prompt_id))
+
+
+# === Response cache ===
+
+@router.get("/{prompt_id}/response-cache", response_model=ResponseCacheInfo)
+async def get_response_cache(
+    prompt_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get response cache hit rate, entries and pin/forbid rules for a prompt"""
+    prompt = await crud.get_prompt(db, prompt_id)
+    if not prompt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prompt not found"
+        )
+
+    info = response_cache.get_prompt_cache_info(prompt_id)
+    rules = await crud.get_response_cache_rules(db, prompt_id)
+
+    return ResponseCacheInfo(
+        prompt_id=prompt_id,
+        enabled=prompt.response_cache_enabled,
+        stats=info["stats"],
+        entries=[ResponseCacheEntry(**e) for e in info["entries"]],
+        rules=[ResponseCacheRuleResponse(**r.to_dict()) for r in rules],
+    )
+
+
+@router.delete("/{prompt_id}/response-cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_response_cache(prompt_id: int):
+    """Drop all cached answers of a prompt (rules are kept)"""
+    await response_cache.clear_prompt(prompt_id)
+    return None
+
+
+@router.post(
+    "/{prompt_id}/response-cache/rules",
+    response_model=ResponseCacheRuleResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def create_response_cache_rule(
+    prompt_id: int,
+    rule_data: ResponseCacheRuleCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Pin (always reuse) or forbid (never cache) the answer to an utterance.
+
+    A pin with response_text always answers the utterance with that text.
+    """
+    prompt = await crud.get_prompt(db, prompt_id)
+    if not prompt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prompt not found"
+        )
+
+    utterance = response_cache.normalize_utterance(rule_data.utterance)
+    if not utterance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Utterance is empty after normalization"
+        )
+
+    rule = await crud.upsert_response_cache_rule(
+        db,
+        prompt_id,
+        utterance,
+        rule_data.rule,
+        rule_data.response_text if rule_data.rule == "pin" else None,
+    )
+    await response_cache.apply_rule(rule)
+    return ResponseCacheRuleResponse(**rule.to_dict())
+
+
+@router.delete("/{prompt_id}/response-cache/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_response_cache_rule(
+    prompt_id: int,
+    rule_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Remove a pin/forbid rule"""
+    rule = await crud.get_response_cache_rule(db, rule_id)
+    if not rule or rule.prompt_id != prompt_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rule not found"
+        )
+
+    await crud.delete_response_cache_rule(db, rule_id)
+    await response_cache.remove_rule(prompt_id, rule.utterance)
+    return None
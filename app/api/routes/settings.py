@@ -2,7 +2,7 @@
 Settings API routes
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 import aiohttp
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -112,6 +112,30 @@ class GreetingGenerateResponse(BaseModel):
     }
 
 
+class AudioRegenRequest(BaseModel):
+    """Quais audios regenerar"""
+    prompts: bool = Field(True, description="Greetings de todos os prompts com greeting_text")
+    global_greeting: bool = Field(True, description="Greeting global")
+    fillers: bool = Field(True, description="Conjunto de fillers e frase de espera")
+
+
+class AudioRegenItem(BaseModel):
+    status: str  # pending, completed, failed
+    error: Optional[str] = None
+
+
+class AudioRegenStatus(BaseModel):
+    """Progresso da regeneracao em massa"""
+    status: str  # idle, running, completed, failed, cancelled
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    items: Dict[str, AudioRegenItem] = {}
+    error: Optional[str] = None
+
+
 # === Routes ===
 
 @router.get("", response_model=List[SettingResponse])
@@ -159,7 +183,7 @@ Gera um novo audio de saudacao usando TTS (Text-to-Speech) da Murf AI.
 
 **O que acontece:**
 1. O texto enviado e convertido em audio via Murf AI
-2. O audio e salvo em formato WAV (8kHz mono, 16-bit PCM)
+2. O audio e salvo em formato WAV (mono, 16-bit PCM), um arquivo por taxa em uso (8kHz e, com prompts em banda larga, 16kHz)
 3. O arquivo antigo e substituido
 4. Proximas chamadas usarao a nova saudacao automaticamente
 
@@ -175,6 +199,58 @@ async def update_greeting(data: GreetingRequest):
     return result
 
 
+@router.get(
+    "/audio/regenerate",
+    response_model=AudioRegenStatus,
+    summary="Progresso da regeneracao de audios"
+)
+async def get_audio_regeneration():
+    """Status da ultima (ou atual) regeneracao em massa"""
+    from services.audio_regen_service import get_job_status
+    return AudioRegenStatus(**(get_job_status() or {"status": "idle"}))
+
+
+@router.post(
+    "/audio/regenerate",
+    response_model=AudioRegenStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Regenerar greetings e fillers",
+    description="""
+Regenera em segundo plano os audios pre-gravados - util depois de trocar a voz
+padrao ou o modelo da Murf.
+
+**O que acontece:**
+1. Os greetings de todos os prompts (com a voz de cada prompt), o greeting
+   global e o conjunto de fillers sao sintetizados com concorrencia limitada
+   (`AUDIO_REGEN_CONCURRENCY`)
+2. Cada arquivo e gravado em um arquivo temporario e renomeado (o FreeSWITCH
+   nunca toca um WAV pela metade)
+3. Cada prompt (e o conjunto de fillers) so passa a usar os novos audios
+   quando todos estao prontos; em caso de falha os audios antigos continuam
+
+O progresso e retornado por `GET /settings/audio/regenerate` e enviado ao
+dashboard (evento `audio_regen_progress`). Retorna 409 se ja houver uma
+regeneracao em andamento.
+"""
+)
+async def start_audio_regeneration(request: AudioRegenRequest = None):
+    """Inicia a regeneracao em massa"""
+    from services.audio_regen_service import start_regeneration_job
+
+    request = request or AudioRegenRequest()
+    job = start_regeneration_job(
+        include_prompts=request.prompts,
+        include_global=request.global_greeting,
+        include_fillers=request.fillers,
+    )
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An audio regeneration job is already running"
+        )
+    return AudioRegenStatus(**job)
+
+
 @router.get("/{key}", response_model=SettingResponse)
 async def get_setting(key: str, db: AsyncSession = Depends(get_db)):
     """Get a specific setting by key"""
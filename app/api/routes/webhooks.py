@@ -11,7 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.deps import get_db
 from db import crud
-from services.webhook_service import SUPPORTED_EVENTS, send_test_webhook
+from services.webhook_service import SUPPORTED_EVENTS, drop_webhook_batcher, send_test_webhook
 
 router = APIRouter()
 
@@ -22,6 +22,10 @@ class WebhookConfigCreate(BaseModel):
     url: str = Field(..., min_length=10, max_length=500)
     events: List[str] = Field(..., min_items=1)
     secret: Optional[str] = Field(None, max_length=100)
+    delivery_mode: str = Field(default="single", pattern="^(single|batch)$")
+    batch_format: str = Field(default="json", pattern="^(json|ndjson)$")
+    batch_max_events: int = Field(default=50, ge=1, le=1000)
+    batch_max_wait_ms: int = Field(default=1000, ge=10, le=60000)
 
 
 class WebhookConfigUpdate(BaseModel):
@@ -29,6 +33,10 @@ class WebhookConfigUpdate(BaseModel):
     events: Optional[List[str]] = None
     is_active: Optional[bool] = None
     secret: Optional[str] = Field(None, max_length=100)
+    delivery_mode: Optional[str] = Field(None, pattern="^(single|batch)$")
+    batch_format: Optional[str] = Field(None, pattern="^(json|ndjson)$")
+    batch_max_events: Optional[int] = Field(None, ge=1, le=1000)
+    batch_max_wait_ms: Optional[int] = Field(None, ge=10, le=60000)
 
 
 class WebhookConfigResponse(BaseModel):
@@ -36,6 +44,10 @@ class WebhookConfigResponse(BaseModel):
     url: str
     events: List[str]
     is_active: bool
+    delivery_mode: str
+    batch_format: str
+    batch_max_events: int
+    batch_max_wait_ms: int
     created_at: str
     updated_at: str
 
@@ -46,6 +58,9 @@ class WebhookConfigResponse(BaseModel):
 class WebhookLogResponse(BaseModel):
     id: int
     event_type: str
+    event_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    batch_size: Optional[int] = None
     status_code: Optional[int]
     success: bool
     attempt: int
@@ -90,6 +105,10 @@ async def create_webhook(
         url=data.url,
         events=json.dumps(data.events),
         secret=data.secret,
+        delivery_mode=data.delivery_mode,
+        batch_format=data.batch_format,
+        batch_max_events=data.batch_max_events,
+        batch_max_wait_ms=data.batch_max_wait_ms,
     )
     await db.commit()
 
@@ -146,9 +165,17 @@ async def update_webhook(
     if data.secret is not None:
         update_data["secret"] = data.secret
 
+    for field in ("delivery_mode", "batch_format", "batch_max_events", "batch_max_wait_ms"):
+        value = getattr(data, field)
+        if value is not None:
+            update_data[field] = value
+
     webhook = await crud.update_webhook_config(db, webhook_id, **update_data)
     await db.commit()
 
+    # Events already batched go out as they were; new ones follow the update
+    drop_webhook_batcher(webhook_id)
+
     return WebhookConfigResponse(**webhook.to_dict())
 
 
@@ -166,6 +193,7 @@ async def delete_webhook(
         )
 
     await db.commit()
+    drop_webhook_batcher(webhook_id, flush=False)
     return None
 
 
@@ -187,6 +215,23 @@ async def get_webhook_logs(
     return [WebhookLogResponse(**log.to_dict()) for log in logs]
 
 
+@router.get("/{webhook_id}/events/{event_id}")
+async def get_webhook_event(
+    webhook_id: int,
+    event_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the payload sent for an event (shared by all its delivery attempts)"""
+    event = await crud.get_webhook_event(db, event_id)
+    if not event or event.config_id != webhook_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found (it may have expired)"
+        )
+
+    return event.to_dict()
+
+
 @router.post("/{webhook_id}/test")
 async def test_webhook(
     webhook_id: int,
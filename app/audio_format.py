@@ -0,0 +1,52 @@
+"""
+Formato do áudio de uma chamada (L16 mono, 8 kHz ou 16 kHz)
+
+Troncos G.711 entregam banda estreita (8 kHz); com G.722/Opus a chamada pode
+rodar em banda larga (16 kHz) de ponta a ponta: audio_fork, Deepgram, TTS,
+WAVs gravados e os áudios pré-gravados (fillers, frase de espera, greetings),
+que existem um por taxa. A taxa vem do prompt (prompts.sample_rate) ou, sem
+ela, do padrão do tronco (SAMPLE_RATE).
+"""
+
+import os
+from typing import Optional
+
+from config import settings
+
+NARROWBAND = 8000
+WIDEBAND = 16000
+SUPPORTED_SAMPLE_RATES = (NARROWBAND, WIDEBAND)
+
+
+def default_sample_rate() -> int:
+    """Taxa do tronco (SAMPLE_RATE), banda estreita se inválida"""
+    if settings.SAMPLE_RATE in SUPPORTED_SAMPLE_RATES:
+        return settings.SAMPLE_RATE
+    return NARROWBAND
+
+
+def call_sample_rate(prompt_config: Optional[dict]) -> int:
+    """Taxa de uma chamada: a do prompt ou a padrão do tronco"""
+    rate = (prompt_config or {}).get("sample_rate")
+    return rate if rate in SUPPORTED_SAMPLE_RATES else default_sample_rate()
+
+
+def bytes_per_ms(sample_rate: int) -> int:
+    """PCM 16-bit mono: 16 bytes/ms em 8 kHz, 32 bytes/ms em 16 kHz"""
+    return sample_rate * settings.SAMPLE_WIDTH * settings.CHANNELS // 1000
+
+
+def pcm_duration_ms(audio_data: bytes, sample_rate: int) -> float:
+    return len(audio_data) / bytes_per_ms(sample_rate)
+
+
+def asset_path(path: str, sample_rate: int) -> str:
+    """Caminho de um áudio pré-gravado na taxa pedida
+
+    Banda estreita mantém o nome original (os arquivos existentes continuam
+    valendo); as outras taxas ganham sufixo: greeting.wav -> greeting_16k.wav
+    """
+    if sample_rate == NARROWBAND:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{sample_rate // 1000}k{ext}"
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+LigAI - Benchmark de logging no loop de eventos
+
+Mede o tempo que o loop de eventos passa dentro das chamadas de log, no modo
+console (síncrono) e no modo json (fila + thread de escrita).
+
+A saída vai para um sink configurável:
+    devnull - descarta (custo de formatação apenas)
+    slow    - simula stdout com backpressure (ex: driver de log do Docker),
+              cada escrita leva --write-delay-ms
+
+Uso:
+    python bench_logging.py
+    python bench_logging.py --events 20000 --sink slow --write-delay-ms 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import structlog
+
+from logging_config import (
+    configure_logging, stop_logging, bind_call_context, clear_call_context, get_dropped_logs
+)
+
+
+class SlowStream:
+    """Stream que bloqueia a cada escrita (simula pipe cheio)"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, data):
+        time.sleep(self.delay)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(events: int) -> list:
+    """Simula o caminho da chamada: um log por iteração, cedendo o loop"""
+    logger = structlog.get_logger("bench")
+    bind_call_context(call_id="bench-call")
+    samples = []
+
+    for i in range(events):
+        start = time.perf_counter()
+        logger.info("Transcrição recebida", text="qual o horário de atendimento?", is_final=True, seq=i)
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+
+    clear_call_context()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de logging")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--sink", choices=["devnull", "slow"], default="devnull")
+    parser.add_argument("--write-delay-ms", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"\n{args.events} eventos, sink={args.sink}\n")
+    print(f"{'modo':>8} {'total_ms':>10} {'media_us':>10} {'p99_us':>10} {'max_us':>10} {'descartados':>11}")
+
+    for mode in ("console", "json"):
+        if args.sink == "slow":
+            stream = SlowStream(args.write_delay_ms / 1000)
+        else:
+            stream = open(os.devnull, "w")
+
+        configure_logging(mode, stream=stream)
+        dropped_before = get_dropped_logs()
+        samples = asyncio.run(run(args.events))
+        stop_logging()
+        dropped = get_dropped_logs() - dropped_before
+
+        print(
+            f"{mode:>8} {sum(samples) * 1000:>10.1f} "
+            f"{sum(samples) / len(samples) * 1e6:>10.1f} "
+            f"{percentile(samples, 0.99) * 1e6:>10.1f} "
+            f"{max(samples) * 1e6:>10.1f} {dropped:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import random
 import time
 import uuid as uuid_lib
 import wave
+from contextlib import nullcontext
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Any
@@ -20,15 +21,32 @@ class ConversationState(Enum):
     PROCESSING = "processing"  # Gerando resposta (filler + LLM)
     SPEAKING = "speaking"   # Tocando áudio da resposta
 
-import aiofiles
 import structlog
 from websockets.server import WebSocketServerProtocol
 
 from deepgram_client import DeepgramClient
-from murf_client import MurfClient
+from murf_client import MurfClient, hedged_text_to_speech
 from llm_client import LLMClient
+from call_recorder import CallRecorder
+from vad import VoiceActivityDetector, SPEECH_START, SPEECH_END
 from config import settings
-from services.greeting_service import get_greeting_for_call
+from audio_format import (
+    SUPPORTED_SAMPLE_RATES,
+    asset_path,
+    call_sample_rate,
+    default_sample_rate,
+    pcm_duration_ms,
+)
+from turn_deadline import TurnDeadline
+from file_io import run_file_io, remove_quietly
+from services.greeting_service import (
+    get_greeting_for_call,
+    get_global_greeting,
+    register_global_greeting,
+    write_wav_atomic,
+)
+from services import response_cache_service as response_cache
+from services import prerender_service as prerender
 
 logger = structlog.get_logger(__name__)
 
@@ -50,11 +68,31 @@ FILLER_PHRASES = [
 FILLER_DIR_APP = "/audio/fillers"
 FILLER_DIR_FS = "/var/lib/freeswitch/sounds/custom/fillers"
 
+# Piso do prazo do ESL ao iniciar a resposta: um turno atrasado ainda toca
+ESL_PLAYBACK_MIN_TIMEOUT_S = 2.0
+
+# Frase de espera quando o LLM passa do prazo final do turno
+HOLDING_PHRASE = "Só um instante, por favor, já vou te responder."
+HOLDING_FILE = "holding.wav"
+
+# Fala quando nenhum modelo respondeu (erro, prazo, resposta vazia); nunca vai para o cache
+LLM_FAILURE_REPLY = "Desculpe, estou com dificuldades técnicas no momento."
+
+# Fillers, frase de espera e greeting global existem um por taxa (8k / 16k):
+# filler_0.wav, filler_0_16k.wav... (ver audio_format.asset_path)
+
+# taxa -> (path_app, path_fs, pcm, duration_ms) da frase de espera
+_holding_audio: dict[int, tuple[str, str, bytes, float]] = {}
+
 # Cache global de fillers gerados (compartilhado entre todas as chamadas)
-_filler_cache: dict[str, tuple[str, str, int]] = {}  # phrase -> (path_app, path_fs, size)
-_filler_ready = False
+# taxa -> phrase -> (path_app, path_fs, pcm, duration_ms) - PCM fica em memória
+_filler_cache: dict[int, dict[str, tuple[str, str, bytes, float]]] = {}
+_filler_ready: set[int] = set()
+
+# Preparação em segundo plano de uma taxa pedida por uma chamada
+_asset_tasks: dict[int, asyncio.Task] = {}
 
-# Arquivo de greeting pré-gravado
+# Arquivo de greeting pré-gravado (banda estreita; 16k ganha sufixo)
 GREETING_FILE_APP = "/audio/greeting.wav"
 GREETING_FILE_FS = "/var/lib/freeswitch/sounds/custom/greeting.wav"
 GREETING_TEXT = "Olá! Bem-vindo ao atendimento. Como posso ajudar você hoje?"
@@ -64,68 +102,73 @@ _greeting_ready = False
 _greeting_duration_ms = 0
 
 
-async def initialize_fillers():
+def _load_wav(path: str) -> Optional[tuple[bytes, float]]:
+    """PCM e duração exata (header WAV) de um áudio pré-gravado, None se não existe"""
+    if not os.path.exists(path):
+        return None
+    with wave.open(path, 'rb') as wav_file:
+        pcm = wav_file.readframes(wav_file.getnframes())
+        return pcm, wav_file.getnframes() * 1000 / wav_file.getframerate()
+
+
+def _filler_paths(filename: str, sample_rate: int) -> tuple[str, str]:
+    return (
+        asset_path(os.path.join(FILLER_DIR_APP, filename), sample_rate),
+        asset_path(os.path.join(FILLER_DIR_FS, filename), sample_rate),
+    )
+
+
+async def initialize_fillers(sample_rate: Optional[int] = None):
     """Pré-gera os áudios de filler na inicialização do sistema.
 
-    Deve ser chamado uma vez na startup da aplicação.
-    Os arquivos são salvos permanentemente e reutilizados.
+    Deve ser chamado uma vez na startup da aplicação, para cada taxa em uso
+    (padrão: a do tronco). Os arquivos são salvos permanentemente e reutilizados.
     """
-    global _filler_cache, _filler_ready
+    sample_rate = sample_rate or default_sample_rate()
 
-    if _filler_ready:
+    if sample_rate in _filler_ready:
         return
 
-    logger.info("Inicializando áudios de filler...")
+    logger.info("Inicializando áudios de filler...", sample_rate=sample_rate)
+    cache = _filler_cache.setdefault(sample_rate, {})
 
-    # Criar diretório de fillers
-    os.makedirs(FILLER_DIR_APP, exist_ok=True)
-
-    # Verificar se fillers já existem
+    # Verificar se fillers já existem (leitura no pool de I/O: pode rodar com chamadas ativas)
     existing_fillers = 0
     for i, phrase in enumerate(FILLER_PHRASES):
-        filename = f"filler_{i}.wav"
-        filepath_app = os.path.join(FILLER_DIR_APP, filename)
-        filepath_fs = os.path.join(FILLER_DIR_FS, filename)
-
-        if os.path.exists(filepath_app):
-            # Filler já existe, carregar no cache
-            file_size = os.path.getsize(filepath_app)
-            _filler_cache[phrase] = (filepath_app, filepath_fs, file_size)
+        filepath_app, filepath_fs = _filler_paths(f"filler_{i}.wav", sample_rate)
+
+        loaded = await run_file_io(_load_wav, filepath_app)
+        if loaded:
+            # Filler já existe, carregar PCM e duração exata (header WAV)
+            pcm, duration_ms = loaded
+            cache[phrase] = (filepath_app, filepath_fs, pcm, duration_ms)
             existing_fillers += 1
             logger.debug(f"Filler existente: {phrase}")
 
     if existing_fillers == len(FILLER_PHRASES):
-        logger.info(f"Todos os {existing_fillers} fillers já existem")
-        _filler_ready = True
+        logger.info(f"Todos os {existing_fillers} fillers já existem", sample_rate=sample_rate)
+        _filler_ready.add(sample_rate)
 
-        # Inicializar greeting mesmo quando fillers já existem
-        await _initialize_greeting()
+        # Inicializar frase de espera e greeting mesmo quando fillers já existem
+        await _initialize_holding_phrase(sample_rate)
+        await _initialize_greeting(sample_rate)
         return
 
-    # Gerar fillers faltantes com Murf
-    murf = MurfClient()
+    # Gerar fillers faltantes com Murf (em paralelo, com limite)
+    murf = MurfClient(sample_rate)
+    semaphore = asyncio.Semaphore(settings.AUDIO_REGEN_CONCURRENCY)
 
-    for i, phrase in enumerate(FILLER_PHRASES):
-        if phrase in _filler_cache:
-            continue
-
-        filename = f"filler_{i}.wav"
-        filepath_app = os.path.join(FILLER_DIR_APP, filename)
-        filepath_fs = os.path.join(FILLER_DIR_FS, filename)
+    async def generate_filler(i: int, phrase: str):
+        filepath_app, filepath_fs = _filler_paths(f"filler_{i}.wav", sample_rate)
 
         try:
             logger.info(f"Gerando filler: {phrase}")
-            audio_data = await murf.text_to_speech(phrase)
+            async with semaphore:
+                audio_data = await murf.text_to_speech(phrase)
 
             if audio_data:
-                # Salvar como WAV
-                with wave.open(filepath_app, 'wb') as wav_file:
-                    wav_file.setnchannels(1)
-                    wav_file.setsampwidth(2)
-                    wav_file.setframerate(8000)
-                    wav_file.writeframes(audio_data)
-
-                _filler_cache[phrase] = (filepath_app, filepath_fs, len(audio_data))
+                await run_file_io(write_wav_atomic, filepath_app, audio_data, sample_rate)
+                cache[phrase] = (filepath_app, filepath_fs, audio_data, pcm_duration_ms(audio_data, sample_rate))
                 logger.info(f"Filler gerado: {phrase} ({len(audio_data)} bytes)")
             else:
                 logger.warning(f"Falha ao gerar filler: {phrase}")
@@ -133,37 +176,77 @@ async def initialize_fillers():
         except Exception as e:
             logger.exception(f"Erro ao gerar filler '{phrase}'", error=str(e))
 
-    _filler_ready = len(_filler_cache) > 0
-    logger.info(f"Fillers inicializados: {len(_filler_cache)}/{len(FILLER_PHRASES)}")
+    await asyncio.gather(*(
+        generate_filler(i, phrase)
+        for i, phrase in enumerate(FILLER_PHRASES)
+        if phrase not in cache
+    ))
+
+    if cache:
+        _filler_ready.add(sample_rate)
+    logger.info(f"Fillers inicializados: {len(cache)}/{len(FILLER_PHRASES)}", sample_rate=sample_rate)
 
-    # Inicializar greeting
-    await _initialize_greeting()
+    # Inicializar frase de espera e greeting
+    await _initialize_holding_phrase(sample_rate)
+    await _initialize_greeting(sample_rate)
+
+
+def ensure_audio_assets(sample_rate: int):
+    """Agenda (uma vez) os fillers, a frase de espera e o greeting de uma taxa
+
+    Uma chamada numa taxa que a startup não preparou segue sem fillers até o
+    fim da geração; não bloqueia a chamada.
+    """
+    if sample_rate in _filler_ready or sample_rate in _asset_tasks:
+        return
 
+    logger.info("Áudios pré-gravados ausentes na taxa da chamada, gerando em segundo plano", sample_rate=sample_rate)
+    _asset_tasks[sample_rate] = asyncio.create_task(initialize_fillers(sample_rate))
 
-async def _initialize_greeting():
+
+async def _initialize_holding_phrase(sample_rate: int):
+    """Carrega (ou gera uma vez) o áudio da frase de espera do LLM"""
+    filepath_app, filepath_fs = _filler_paths(HOLDING_FILE, sample_rate)
+
+    try:
+        loaded = await run_file_io(_load_wav, filepath_app)
+        if not loaded:
+            audio_data = await MurfClient(sample_rate).text_to_speech(HOLDING_PHRASE)
+            if not audio_data:
+                logger.warning("Falha ao gerar frase de espera")
+                return
+            await run_file_io(write_wav_atomic, filepath_app, audio_data, sample_rate)
+            loaded = audio_data, pcm_duration_ms(audio_data, sample_rate)
+
+        pcm, duration_ms = loaded
+        _holding_audio[sample_rate] = (filepath_app, filepath_fs, pcm, duration_ms)
+        logger.info(f"Frase de espera pronta: {duration_ms:.0f}ms", sample_rate=sample_rate)
+    except Exception as e:
+        logger.exception("Erro ao preparar frase de espera", error=str(e))
+
+
+async def _initialize_greeting(sample_rate: int):
     """Inicializa o áudio de greeting pré-gravado."""
     global _greeting_ready, _greeting_duration_ms
 
-    if os.path.exists(GREETING_FILE_APP):
-        file_size = os.path.getsize(GREETING_FILE_APP)
-        _greeting_duration_ms = (file_size - 44) / 16  # WAV header = 44 bytes, 8kHz 16-bit
+    # Registro carregado na startup (load_greetings)
+    existing = get_global_greeting(sample_rate)
+    if existing:
+        _greeting_duration_ms = existing["duration_ms"]
         _greeting_ready = True
-        logger.info(f"Greeting existente: {_greeting_duration_ms:.0f}ms")
+        logger.info(f"Greeting existente: {_greeting_duration_ms:.0f}ms", sample_rate=sample_rate)
     else:
-        logger.info("Gerando greeting pré-gravado...")
+        logger.info("Gerando greeting pré-gravado...", sample_rate=sample_rate)
         try:
-            murf = MurfClient()
+            murf = MurfClient(sample_rate)
             audio_data = await murf.text_to_speech(GREETING_TEXT)
 
             if audio_data:
-                with wave.open(GREETING_FILE_APP, 'wb') as wav_file:
-                    wav_file.setnchannels(1)
-                    wav_file.setsampwidth(2)
-                    wav_file.setframerate(8000)
-                    wav_file.writeframes(audio_data)
+                await run_file_io(write_wav_atomic, asset_path(GREETING_FILE_APP, sample_rate), audio_data, sample_rate)
 
-                _greeting_duration_ms = len(audio_data) / 16  # 8kHz 16-bit = 16 bytes/ms
+                _greeting_duration_ms = pcm_duration_ms(audio_data, sample_rate)
                 _greeting_ready = True
+                register_global_greeting(GREETING_TEXT, _greeting_duration_ms, sample_rate)
                 logger.info(f"Greeting gerado: {_greeting_duration_ms:.0f}ms ({len(audio_data)} bytes)")
             else:
                 logger.warning("Falha ao gerar greeting")
@@ -171,55 +254,157 @@ async def _initialize_greeting():
             logger.exception(f"Erro ao gerar greeting", error=str(e))
 
 
-def get_random_filler() -> Optional[tuple[str, str, str, int]]:
-    """Retorna um filler aleatório do cache.
+def get_asset_sample_rates() -> list[int]:
+    """Taxas em uso: a do tronco e as já preparadas para alguma chamada"""
+    return sorted({default_sample_rate(), *_filler_ready, *_asset_tasks})
+
+
+async def install_filler_set(audio_by_phrase: dict[str, bytes], sample_rate: int):
+    """Grava um conjunto completo de fillers (e a frase de espera) e troca o cache de uma vez
+
+    Usado pela regeneração em massa: os arquivos são substituídos
+    atomicamente e as chamadas passam a usar o novo conjunto só depois que
+    todos estão no disco.
+
+    Args:
+        audio_by_phrase: PCM de cada frase de FILLER_PHRASES e de HOLDING_PHRASE
+        sample_rate: Taxa do PCM (e do conjunto substituído)
+    """
+    files = [
+        (phrase, f"filler_{i}.wav")
+        for i, phrase in enumerate(FILLER_PHRASES)
+    ]
+    files.append((HOLDING_PHRASE, HOLDING_FILE))
+
+    def write():
+        for phrase, filename in files:
+            filepath_app, _ = _filler_paths(filename, sample_rate)
+            write_wav_atomic(filepath_app, audio_by_phrase[phrase], sample_rate)
+
+    await run_file_io(write)
+
+    entries = {
+        phrase: (
+            *_filler_paths(filename, sample_rate),
+            audio_by_phrase[phrase],
+            pcm_duration_ms(audio_by_phrase[phrase], sample_rate),
+        )
+        for phrase, filename in files
+    }
+    _holding_audio[sample_rate] = entries.pop(HOLDING_PHRASE)
+    _filler_cache[sample_rate] = entries
+    _filler_ready.add(sample_rate)
+    logger.info(
+        f"Conjunto de fillers substituído: {len(entries)} fillers + frase de espera",
+        sample_rate=sample_rate
+    )
+
+
+async def install_global_greeting(text: str, audio_data: bytes, sample_rate: int):
+    """Grava o greeting global (atômico) e só então atualiza o registro"""
+    global _greeting_ready, _greeting_duration_ms
+
+    filepath_app = asset_path(GREETING_FILE_APP, sample_rate)
+
+    def write():
+        write_wav_atomic(filepath_app, audio_data, sample_rate)
+        with open(filepath_app.replace('.wav', '.json'), 'w') as f:
+            json.dump({"text": text}, f)
+
+    await run_file_io(write)
+
+    _greeting_duration_ms = pcm_duration_ms(audio_data, sample_rate)
+    _greeting_ready = True
+    register_global_greeting(text, _greeting_duration_ms, sample_rate)
+
+
+def get_random_filler(sample_rate: int) -> Optional[tuple[str, str, str, bytes, float]]:
+    """Retorna um filler aleatório do cache na taxa da chamada.
 
     Returns:
-        Tuple de (phrase, path_app, path_fs, size) ou None se não houver fillers
+        Tuple de (phrase, path_app, path_fs, pcm, duration_ms) ou None se não houver fillers
     """
-    if not _filler_cache:
+    cache = _filler_cache.get(sample_rate)
+    if not cache:
         return None
 
-    phrase = random.choice(list(_filler_cache.keys()))
-    path_app, path_fs, size = _filler_cache[phrase]
-    return phrase, path_app, path_fs, size
+    phrase = random.choice(list(cache.keys()))
+    path_app, path_fs, pcm, duration_ms = cache[phrase]
+    return phrase, path_app, path_fs, pcm, duration_ms
+
+
+def _read_wav_pcm(path: str) -> bytes:
+    with wave.open(path, 'rb') as wav_file:
+        return wav_file.readframes(wav_file.getnframes())
+
+
+class LatencyEstimator:
+    """Média e desvio móveis (EWMA) do tempo até a resposta (texto + áudio) ficar pronta"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.mean: Optional[float] = None
+        self.var = 0.0
+        self.samples = 0
+
+    def add(self, latency_ms: float):
+        self.samples += 1
+        if self.mean is None:
+            self.mean = latency_ms
+            return
+        diff = latency_ms - self.mean
+        self.mean += self.alpha * diff
+        self.var = (1 - self.alpha) * (self.var + self.alpha * diff * diff)
+
+    def filler_delay_ms(self) -> float:
+        """Quanto esperar pela resposta antes de tocar um filler.
+
+        Respostas tipicamente rápidas: espera ~média + 1 desvio, então o filler
+        só toca nas lentas. Respostas sempre lentas: toca logo.
+        """
+        low, high = settings.FILLER_MIN_DELAY_MS, settings.FILLER_MAX_DELAY_MS
+        if self.mean is None:
+            return high
+
+        std = self.var ** 0.5
+        if self.mean - std > high:
+            return low
+        return min(max(self.mean + std, low), high)
+
+
+# Estimativas de latência por prompt (None = prompt padrão)
+_latency_estimates: dict[Optional[int], LatencyEstimator] = {}
+
+
+def get_latency_estimator(prompt_id: Optional[int]) -> LatencyEstimator:
+    estimator = _latency_estimates.get(prompt_id)
+    if estimator is None:
+        estimator = _latency_estimates[prompt_id] = LatencyEstimator()
+    return estimator
 
 
 def get_greeting_info() -> dict:
-    """Retorna informacoes do greeting atual para a API"""
-    file_exists = os.path.exists(GREETING_FILE_APP)
-    created_at = None
-
-    if file_exists:
-        mtime = os.path.getmtime(GREETING_FILE_APP)
-        created_at = datetime.fromtimestamp(mtime).isoformat()
-
-    # Ler texto do JSON se existir
-    text = GREETING_TEXT
-    json_file = GREETING_FILE_APP.replace('.wav', '.json')
-    if os.path.exists(json_file):
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-            text = data.get('text', GREETING_TEXT)
+    """Retorna informacoes do greeting atual para a API (registro em memória)"""
+    entry = get_global_greeting()
 
     return {
-        "text": text,
-        "audio_file": GREETING_FILE_APP,
-        "duration_ms": _greeting_duration_ms,
-        "file_exists": file_exists,
-        "created_at": created_at
+        "text": (entry and entry["text"]) or GREETING_TEXT,
+        "audio_file": entry["path_app"] if entry else asset_path(GREETING_FILE_APP, default_sample_rate()),
+        "duration_ms": entry["duration_ms"] if entry else 0,
+        "file_exists": entry is not None,
+        "created_at": entry["created_at"] if entry else None
     }
 
 
 async def generate_new_greeting(text: str) -> dict:
-    """Gera novo audio de greeting com texto personalizado"""
-    global _greeting_ready, _greeting_duration_ms
-
+    """Gera novo audio de greeting com texto personalizado (em cada taxa em uso)"""
     try:
-        murf = MurfClient()
-        audio_data = await murf.text_to_speech(text)
+        sample_rates = get_asset_sample_rates()
+        clips = await asyncio.gather(*(
+            MurfClient(sample_rate).text_to_speech(text) for sample_rate in sample_rates
+        ))
 
-        if not audio_data:
+        if not all(clips):
             return {
                 "success": False,
                 "text": text,
@@ -227,28 +412,17 @@ async def generate_new_greeting(text: str) -> dict:
                 "message": "Falha ao gerar audio TTS"
             }
 
-        # Salvar WAV
-        with wave.open(GREETING_FILE_APP, 'wb') as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(8000)
-            wav_file.writeframes(audio_data)
-
-        # Salvar JSON com texto
-        json_file = GREETING_FILE_APP.replace('.wav', '.json')
-        with open(json_file, 'w') as f:
-            json.dump({"text": text}, f)
-
-        # Atualizar cache
-        _greeting_duration_ms = len(audio_data) / 16
-        _greeting_ready = True
+        # Salvar WAV + JSON e atualizar cache e registro
+        for sample_rate, audio_data in zip(sample_rates, clips):
+            await install_global_greeting(text, audio_data, sample_rate)
 
-        logger.info(f"Novo greeting gerado via API: {_greeting_duration_ms:.0f}ms")
+        duration_ms = get_global_greeting()["duration_ms"]
+        logger.info(f"Novo greeting gerado via API: {duration_ms:.0f}ms", sample_rates=sample_rates)
 
         return {
             "success": True,
             "text": text,
-            "duration_ms": _greeting_duration_ms,
+            "duration_ms": duration_ms,
             "message": "Greeting gerado com sucesso"
         }
 
@@ -281,7 +455,8 @@ class CallHandler:
         called_number: str,
         websocket: Any,  # Can be WebSocketServerProtocol or FastAPI WebSocket
         freeswitch_uuid: str = None,
-        prompt_config: Optional[dict] = None
+        prompt_config: Optional[dict] = None,
+        sample_rate: Optional[int] = None
     ):
         self.call_id = call_id
         self.caller_number = caller_number
@@ -289,9 +464,40 @@ class CallHandler:
         self.websocket = websocket
         self.freeswitch_uuid = freeswitch_uuid or call_id
 
+        # Taxa do áudio (audio_fork, STT, TTS, WAVs): a pedida no originate
+        # (metadata) ou a do prompt / tronco
+        if sample_rate not in SUPPORTED_SAMPLE_RATES:
+            sample_rate = call_sample_rate(prompt_config)
+        self.sample_rate = sample_rate
+        ensure_audio_assets(sample_rate)
+
         self.deepgram: Optional[DeepgramClient] = None
         self.murf: Optional[MurfClient] = None
+        self.murf_hedge: Optional[MurfClient] = None
+        self._holding_ends_at: Optional[float] = None
         self.llm: Optional[LLMClient] = None
+        self.recorder: Optional[CallRecorder] = None
+
+        # VAD local (opcional, por prompt) para detectar fim de fala sem
+        # esperar o endpointing do Deepgram
+        self.vad: Optional[VoiceActivityDetector] = None
+        if prompt_config and prompt_config.get("vad_enabled"):
+            self.vad = VoiceActivityDetector(
+                threshold_db=prompt_config.get("vad_threshold_db") or settings.VAD_THRESHOLD_DB,
+                silence_ms=prompt_config.get("vad_silence_ms") or settings.VAD_SILENCE_MS,
+                sample_rate=self.sample_rate,
+            )
+        self._vad_commit_task: Optional[asyncio.Task] = None
+        self._skip_next_final = False
+
+        # Orçamento do turno: aberto no fim da fala (VAD) ou no final do STT
+        self._pending_turn: Optional[TurnDeadline] = None
+        self.last_turn: Optional[dict] = None
+        self.turn_stats = {
+            "turns": 0,
+            "turns_over_budget": 0,
+            "stage_overruns": 0,
+        }
 
         self.is_running = False
         self.start_time = datetime.utcnow()
@@ -306,9 +512,10 @@ class CallHandler:
 
         # Prompt configuration (from database or default)
         self.prompt_config = prompt_config
+        self._prompt_id = prompt_config.get("id") if prompt_config else None
 
         # Greeting configuration (from prompt or global)
-        greeting_file, greeting_duration, greeting_text = get_greeting_for_call(prompt_config)
+        greeting_file, greeting_duration, greeting_text = get_greeting_for_call(prompt_config, self.sample_rate)
         self._prompt_greeting_file = greeting_file
         self._prompt_greeting_duration_ms = greeting_duration
         self._prompt_greeting_text = greeting_text
@@ -336,6 +543,16 @@ REGRAS OBRIGATÓRIAS:
         """Inicia os clientes de STT, TTS e LLM"""
         self.is_running = True
 
+        # Gravação opcional (por prompt) - codificação roda em thread própria
+        if self.prompt_config and self.prompt_config.get("recording_enabled"):
+            self.recorder = CallRecorder(
+                self.call_id,
+                fmt=self.prompt_config.get("recording_format") or "flac",
+                stereo=self.prompt_config.get("recording_channels") == "stereo",
+                sample_rate=self.sample_rate,
+            )
+            await self.recorder.start()
+
         # [NOVO] Tocar greeting PRÉ-GRAVADO imediatamente
         # Inicia em paralelo com inicialização do Deepgram para reduzir latência
         greeting_task = asyncio.create_task(self._play_greeting())
@@ -344,15 +561,30 @@ REGRAS OBRIGATÓRIAS:
         self.deepgram = DeepgramClient(
             on_transcript=self._on_transcript,
             on_speech_started=self._on_speech_started,
-            on_speech_ended=self._on_speech_ended
+            on_speech_ended=self._on_speech_ended,
+            sample_rate=self.sample_rate
         )
         await self.deepgram.connect()
 
-        # Inicializar Murf
-        self.murf = MurfClient()
+        # Inicializar Murf (voz do prompt; reserva opcional com outra voz para o hedge)
+        self.murf = MurfClient(self.sample_rate)
+        self.murf.voice_id = self.voice_id
+        hedge_voice_id = self.prompt_config.get("tts_hedge_voice_id") if self.prompt_config else None
+        if hedge_voice_id and hedge_voice_id != self.voice_id:
+            self.murf_hedge = MurfClient(self.sample_rate)
+            self.murf_hedge.voice_id = hedge_voice_id
 
         # Inicializar LLM
-        self.llm = LLMClient(system_prompt=self.system_prompt)
+        prompt = self.prompt_config or {}
+        self.llm = LLMClient(
+            system_prompt=self.system_prompt,
+            prompt_version=(self._prompt_id, prompt.get("updated_at")) if self.prompt_config else None,
+            model=self.llm_model,
+            temperature=self.llm_temperature,
+            fallback_model=prompt.get("llm_fallback_model"),
+            first_token_ms=prompt.get("llm_first_token_ms"),
+            hard_deadline_ms=prompt.get("llm_hard_deadline_ms"),
+        )
 
         logger.info("CallHandler iniciado", call_id=self.call_id)
 
@@ -364,9 +596,21 @@ REGRAS OBRIGATÓRIAS:
         """Encerra a chamada e limpa recursos"""
         self.is_running = False
 
+        self._cancel_vad_commit()
+
         if self.deepgram:
+            logger.info("Fila de áudio STT", call_id=self.call_id, **self.deepgram.get_stats())
             await self.deepgram.disconnect()
 
+        if self.recorder:
+            await self._finish_recording()
+
+        if self.llm:
+            await self.llm.close()
+
+        if self.murf:
+            await self.murf.close()
+
         duration = self.get_duration()
         logger.info(
             "CallHandler encerrado",
@@ -374,20 +618,94 @@ REGRAS OBRIGATÓRIAS:
             duration_seconds=round(duration, 2)
         )
 
+    async def _finish_recording(self):
+        """Finaliza a gravação (pool de I/O, fora do loop de eventos) e indexa no banco"""
+        recorder = self.recorder
+        self.recorder = None
+
+        try:
+            info = await run_file_io(recorder.finish)
+            if not info["size_bytes"]:
+                # Codificação falhou (ou nada foi gravado): sem arquivo, sem registro
+                logger.warning("Gravação vazia ou ausente, não indexada", call_id=self.call_id, file=info["file_path"])
+                return
+
+            from db.database import AsyncSessionLocal
+            from db import crud
+
+            async with AsyncSessionLocal() as db:
+                call = await crud.get_call_by_call_id(db, self.call_id)
+                if not call:
+                    return
+                await crud.create_call_recording(db, call.id, **info)
+                await db.commit()
+
+            logger.info(
+                "Gravação salva",
+                call_id=self.call_id,
+                file=info["file_path"],
+                duration_seconds=info["duration_seconds"],
+                size_bytes=info["size_bytes"]
+            )
+        except Exception as e:
+            logger.exception("Erro ao salvar gravação", call_id=self.call_id, error=str(e))
+
     async def process_audio(self, audio_data: bytes):
         """Processa chunk de áudio recebido do FreeSWITCH"""
         if not self.is_running or not self.deepgram:
             return
 
-        # Log first audio chunk for debugging
-        if not hasattr(self, '_audio_count'):
-            self._audio_count = 0
-        self._audio_count += 1
-        if self._audio_count <= 3 or self._audio_count % 100 == 0:
-            print(f"[AUDIO] Chunk #{self._audio_count}: {len(audio_data)} bytes", flush=True)
+        if self.recorder:
+            self.recorder.write_inbound(audio_data)
+
+        # Enfileirar para o Deepgram (envio em task própria)
+        self.deepgram.send_audio(audio_data)
+
+        if self.vad:
+            for event in self.vad.process(audio_data):
+                if event == SPEECH_END:
+                    await self._on_local_speech_end()
+                elif event == SPEECH_START:
+                    self._cancel_vad_commit()
+                    self._pending_turn = None
+
+    async def _on_local_speech_end(self):
+        """VAD local detectou fim de fala: pedir o final ao Deepgram já"""
+        if self.state != ConversationState.IDLE:
+            return
+
+        logger.debug("VAD: fim de fala", call_id=self.call_id)
+        # O turno começa aqui: a finalização do STT já conta no orçamento
+        self._pending_turn = TurnDeadline()
+        await self.deepgram.finalize()
 
-        # Enviar para Deepgram
-        await self.deepgram.send_audio(audio_data)
+        # Se o final não chegar logo, usar o último texto interim
+        self._cancel_vad_commit()
+        self._vad_commit_task = asyncio.create_task(self._commit_interim_after_grace())
+
+    async def _commit_interim_after_grace(self):
+        grace_ms = settings.VAD_FINALIZE_GRACE_MS
+        if self._pending_turn:
+            grace_ms = min(grace_ms, self._pending_turn.remaining_ms())
+        await asyncio.sleep(grace_ms / 1000)
+
+        text = self.transcript_buffer
+        if not text.strip() or self.state != ConversationState.IDLE:
+            return
+
+        logger.info("VAD: usando transcrição interim", call_id=self.call_id, text=text)
+        self.transcript_buffer = ""
+        # O final correspondente, quando chegar, é descartado
+        self._skip_next_final = True
+        self._vad_commit_task = None
+        if self._pending_turn:
+            self._pending_turn.degrade("stt", "interim")
+        await self._process_user_input(text)
+
+    def _cancel_vad_commit(self):
+        if self._vad_commit_task and not self._vad_commit_task.done():
+            self._vad_commit_task.cancel()
+        self._vad_commit_task = None
 
     async def handle_dtmf(self, digit: str):
         """Processa dígito DTMF recebido"""
@@ -409,6 +727,12 @@ REGRAS OBRIGATÓRIAS:
 
         if is_final:
             self.transcript_buffer = ""
+            self._cancel_vad_commit()
+
+            if self._skip_next_final:
+                # Já processado a partir do interim (VAD local)
+                self._skip_next_final = False
+                return
 
             # Só processa se estiver em IDLE
             if self.state == ConversationState.IDLE:
@@ -435,9 +759,18 @@ REGRAS OBRIGATÓRIAS:
         self.is_speaking = False
         logger.debug("Usuário parou de falar", call_id=self.call_id)
 
+    def _take_turn_deadline(self) -> TurnDeadline:
+        """Orçamento do turno que começa agora (aberto no fim da fala, se houver VAD)"""
+        deadline, self._pending_turn = self._pending_turn, None
+        if deadline is None:
+            return TurnDeadline()
+        deadline.record("stt", deadline.started, settings.VAD_FINALIZE_GRACE_MS)
+        return deadline
+
     async def _process_user_input(self, text: str):
         """Processa entrada do usuário e gera resposta"""
         logger.info("Processando entrada do usuário", call_id=self.call_id, text=text)
+        deadline = self._take_turn_deadline()
 
         # Transição: IDLE → PROCESSING
         self.state = ConversationState.PROCESSING
@@ -449,29 +782,36 @@ REGRAS OBRIGATÓRIAS:
         })
 
         try:
-            # Tocar filler imediatamente para reduzir percepção de latência
-            filler_task = None
-            filler_info = get_random_filler()
-
-            if filler_info:
-                phrase, filler_path_app, filler_path_fs, filler_size = filler_info
-                logger.info(f"Tocando filler: {phrase}", call_id=self.call_id)
-
-                # Iniciar playback do filler (não aguarda terminar)
-                filler_task = asyncio.create_task(
-                    self._play_filler(filler_path_fs)
-                )
-
-            # Em paralelo com o filler, gerar resposta com LLM
-            response = await self.llm.generate_response(
-                text,
-                self.conversation_history
-            )
+            # LLM + TTS começam já; o filler só toca se a resposta demorar
+            started = time.monotonic()
+            reply_task = asyncio.create_task(self._generate_reply(text, deadline))
+
+            filler_ends_at = None
+            self._holding_ends_at = None
+            delay_ms = self._filler_delay_ms()
+            if delay_ms is not None:
+                done, _ = await asyncio.wait({reply_task}, timeout=delay_ms / 1000)
+                if not done:
+                    filler_ends_at = await self._start_filler(deadline)
+
+            if not reply_task.done():
+                # Orçamento do turno esgotado sem resposta e sem nada tocando: frase de espera
+                done, _ = await asyncio.wait({reply_task}, timeout=deadline.remaining_ms() / 1000)
+                filler_playing = filler_ends_at is not None and filler_ends_at > time.monotonic()
+                if not done and not filler_playing and self._holding_ends_at is None:
+                    deadline.degrade("turn", "holding_phrase")
+                    await self._start_holding_phrase()
+
+            response, audio_data, audio_files = await reply_task
+            latency_ms = (time.monotonic() - started) * 1000
+            get_latency_estimator(self._prompt_id).add(latency_ms)
 
             logger.info(
                 "Resposta gerada",
                 call_id=self.call_id,
-                response=response[:100] + "..." if len(response) > 100 else response
+                response=response[:100] + "..." if len(response) > 100 else response,
+                latency_ms=round(latency_ms),
+                filler=filler_ends_at is not None
             )
 
             # Adicionar resposta ao histórico
@@ -480,70 +820,194 @@ REGRAS OBRIGATÓRIAS:
                 "content": response
             })
 
-            # Aguardar filler terminar antes de tocar resposta
-            if filler_task:
-                await filler_task
+            playback_ends_at = max(filter(None, (filler_ends_at, self._holding_ends_at)), default=None)
+            if playback_ends_at:
+                await self._finish_filler(playback_ends_at, deadline)
 
             # Transição: PROCESSING → SPEAKING
             self.state = ConversationState.SPEAKING
 
-            # Converter para áudio e enviar
-            await self._speak(response)
+            # Enviar áudio (já sintetizado ou do cache)
+            await self._speak(response, audio_data=audio_data, audio_files=audio_files, deadline=deadline)
 
         except Exception as e:
             logger.exception("Erro ao processar entrada", call_id=self.call_id, error=str(e))
-            await self._speak("Desculpe, tive um problema. Pode repetir?")
+            await self._speak("Desculpe, tive um problema. Pode repetir?", deadline=deadline)
+
+        self._end_turn(deadline)
+
+    def _end_turn(self, deadline: TurnDeadline):
+        """Registra o orçamento do turno (log + contadores da chamada)"""
+        summary = deadline.summary()
+        self.last_turn = summary
+        self.turn_stats["turns"] += 1
+        self.turn_stats["stage_overruns"] += len(summary["overruns"])
+        if summary["over_budget"]:
+            self.turn_stats["turns_over_budget"] += 1
+            logger.warning("Turno acima do orçamento", call_id=self.call_id, **summary)
+        else:
+            logger.info("Orçamento do turno", call_id=self.call_id, **summary)
+
+    async def _generate_reply(
+        self,
+        text: str,
+        deadline: TurnDeadline
+    ) -> tuple[str, Optional[bytes], Optional[list[tuple[str, str]]]]:
+        """Gera resposta (LLM) e o áudio correspondente (TTS)
 
-    async def _play_filler(self, filepath_fs: str):
-        """Reproduz áudio de filler via FreeSWITCH ESL
+        Com cache de respostas ativo no prompt, um acerto pula LLM e TTS.
+        Respostas formadas só por frases pré-renderizadas pulam o TTS.
+        O LLM recebe o orçamento do turno menos a reserva do TTS.
 
-        Versão simplificada de _play_audio_file para fillers pré-gerados.
-        Não deleta o arquivo após playback.
+        Returns:
+            (resposta, pcm, [(path_app, path_fs), ...] do áudio em disco ou None)
         """
-        try:
-            # Conectar ao ESL do FreeSWITCH
-            reader, writer = await asyncio.open_connection('127.0.0.1', 8021)
+        previous = self._previous_assistant_turn()
+        cached = response_cache.lookup(self.prompt_config, text, previous, self.sample_rate)
+
+        if cached and cached.audio_path_fs:
+            logger.info("Resposta do cache", call_id=self.call_id, text=text)
+            prerender.record_spoken(self._prompt_id, cached.text, prerender.SOURCE_RESPONSE_CACHE)
+            return cached.text, None, [(cached.audio_path_app, cached.audio_path_fs)]
+
+        # Só resposta real do modelo (ou fixada) vai para o cache
+        cacheable = True
+        if cached:
+            # Resposta fixada ainda sem áudio: só TTS
+            response = cached.text
+        else:
+            with deadline.stage("llm", reserve_ms=settings.TURN_TTS_RESERVE_MS):
+                response = await self.llm.generate_response(
+                    text,
+                    self.conversation_history,
+                    on_hard_deadline=self._start_holding_phrase,
+                    deadline=deadline
+                )
+            if response is None:
+                response = LLM_FAILURE_REPLY
+                cacheable = False
+
+        prerendered = prerender.lookup(self.prompt_config, response, self.sample_rate)
+        if prerendered:
+            logger.info("Resposta pré-renderizada", call_id=self.call_id, sentences=len(prerendered))
+            prerender.record_spoken(self._prompt_id, response, prerender.SOURCE_PRERENDERED)
+            return response, None, prerendered
+
+        audio_data = None
+        if self.murf:
+            with deadline.stage("tts"):
+                audio_data = await self._synthesize(response, deadline)
+        prerender.record_spoken(self._prompt_id, response, prerender.SOURCE_TTS)
+
+        if cacheable and audio_data and response_cache.is_enabled(self.prompt_config):
+            asyncio.create_task(
+                response_cache.store(self.prompt_config, text, previous, response, audio_data, self.sample_rate)
+            )
 
-            # Ler banner inicial
-            await reader.readuntil(b'\n\n')
+        return response, audio_data, None
 
-            # Autenticar
-            writer.write(b'auth ClueCon\n\n')
-            await writer.drain()
-            auth_response = await reader.readuntil(b'\n\n')
+    async def _synthesize(self, text: str, deadline: Optional[TurnDeadline] = None) -> Optional[bytes]:
+        """TTS com hedge: segunda requisição se a primeira passar do prazo do prompt
 
-            if b'+OK' not in auth_response:
-                writer.close()
-                await writer.wait_closed()
-                return
+        Com o orçamento do turno quase no fim, o hedge dispara mais cedo. Com
+        deadline, o TTS vai até o fim do orçamento; passado dele toca a frase
+        de espera e a síntese tem até mais um orçamento depois do prazo do
+        turno, depois desiste (None) em vez de esperar o timeout da Murf.
+        """
+        hedge_ms = settings.TTS_HEDGE_MS
+        if self.prompt_config and self.prompt_config.get("tts_hedge_ms") is not None:
+            hedge_ms = self.prompt_config["tts_hedge_ms"]
+        if not deadline:
+            return await hedged_text_to_speech(self.murf, text, hedge_ms, secondary=self.murf_hedge)
+
+        if hedge_ms > 0:
+            hedge_ms = min(hedge_ms, max(deadline.remaining_ms(), settings.TURN_STAGE_MIN_MS))
+        synthesis = asyncio.create_task(
+            hedged_text_to_speech(self.murf, text, hedge_ms, secondary=self.murf_hedge)
+        )
+        try:
+            done, _ = await asyncio.wait({synthesis}, timeout=deadline.timeout_s())
+            if done:
+                return synthesis.result()
+
+            if self._holding_ends_at is None:
+                deadline.degrade("tts", "holding_phrase")
+                await self._start_holding_phrase()
+
+            late_s = deadline.deadline + deadline.budget_ms / 1000 - time.monotonic()
+            done, _ = await asyncio.wait({synthesis}, timeout=max(late_s, 0))
+            if done:
+                return synthesis.result()
+        finally:
+            synthesis.cancel()
 
-            # Enviar comando uuid_broadcast
-            cmd = f"api uuid_broadcast {self.freeswitch_uuid} {filepath_fs} aleg\n\n"
-            writer.write(cmd.encode())
-            await writer.drain()
+        deadline.degrade("tts", "timeout")
+        logger.warning("TTS sem áudio no prazo do turno", call_id=self.call_id)
+        return None
 
-            # Ler resposta
-            header = await reader.readuntil(b'\n\n')
-            header_str = header.decode()
+    def _previous_assistant_turn(self) -> Optional[str]:
+        """Última fala do assistente antes da entrada atual do usuário"""
+        for msg in reversed(self.conversation_history[:-1]):
+            if msg.get("role") == "assistant":
+                return msg.get("content")
+        return None
 
-            content_length = 0
-            for line in header_str.split('\n'):
-                if line.startswith('Content-Length:'):
-                    content_length = int(line.split(':')[1].strip())
-                    break
+    def _filler_delay_ms(self) -> Optional[float]:
+        """Espera antes do filler: fixa do prompt ou adaptativa. None = sem filler"""
+        if self.prompt_config:
+            if not self.prompt_config.get("fillers_enabled", True):
+                return None
+            if self.prompt_config.get("filler_delay_ms") is not None:
+                return self.prompt_config["filler_delay_ms"]
+        return get_latency_estimator(self._prompt_id).filler_delay_ms()
+
+    async def _start_filler(self, deadline: TurnDeadline) -> Optional[float]:
+        """Inicia um filler via ESL (não aguarda). Retorna quando ele termina (monotonic)"""
+        from services.dialer_service import play_audio
+
+        filler_info = get_random_filler(self.sample_rate)
+        if not filler_info or not self.is_running:
+            return None
+
+        phrase, _, filler_path_fs, pcm, duration_ms = filler_info
+        if not await play_audio(self.freeswitch_uuid, filler_path_fs, timeout=deadline.timeout_s()):
+            return None
+
+        logger.info(f"Tocando filler: {phrase}", call_id=self.call_id, duration_ms=round(duration_ms))
+        if self.recorder:
+            self.recorder.add_outbound(pcm)
+        return time.monotonic() + duration_ms / 1000
+
+    async def _start_holding_phrase(self):
+        """LLM passou do prazo final: toca a frase de espera (não aguarda)"""
+        from services.dialer_service import play_audio
+
+        holding = _holding_audio.get(self.sample_rate)
+        if not holding or not self.is_running or self._holding_ends_at is not None:
+            return
 
-            if content_length > 0:
-                await reader.readexactly(content_length)
+        # Marcada antes do ESL: o LLM e o orçamento do turno podem pedir ao mesmo tempo
+        _, path_fs, pcm, duration_ms = holding
+        self._holding_ends_at = time.monotonic() + duration_ms / 1000
+        if not await play_audio(self.freeswitch_uuid, path_fs):
+            self._holding_ends_at = None
+            return
 
-            # Fechar conexão
-            writer.close()
-            await writer.wait_closed()
+        logger.info("Tocando frase de espera", call_id=self.call_id)
+        if self.recorder:
+            self.recorder.add_outbound(pcm)
 
-            # Aguardar duração aproximada do filler (~2s para frases mais longas)
-            await asyncio.sleep(2.0)
+    async def _finish_filler(self, ends_at: float, deadline: TurnDeadline):
+        """Resposta pronta com filler tocando: espera só o final curto, senão interrompe"""
+        from services.dialer_service import break_playback
 
-        except Exception as e:
-            logger.debug(f"Erro ao tocar filler: {e}")
+        remaining_ms = (ends_at - time.monotonic()) * 1000
+        if remaining_ms <= 0:
+            return
+        if remaining_ms <= settings.FILLER_TAIL_WAIT_MS:
+            await asyncio.sleep(remaining_ms / 1000)
+        else:
+            await break_playback(self.freeswitch_uuid, timeout=deadline.timeout_s())
 
     async def _play_greeting(self) -> bool:
         """Toca greeting pré-gravado via ESL (sem latência TTS)
@@ -556,38 +1020,12 @@ REGRAS OBRIGATÓRIAS:
             logger.debug("Greeting pré-gravado não disponível")
             return False
 
-        try:
-            reader, writer = await asyncio.open_connection('127.0.0.1', 8021)
-            await reader.readuntil(b'\n\n')
-
-            writer.write(b'auth ClueCon\n\n')
-            await writer.drain()
-            auth_response = await reader.readuntil(b'\n\n')
-
-            if b'+OK' not in auth_response:
-                writer.close()
-                await writer.wait_closed()
-                return False
+        from services.dialer_service import play_audio
 
+        try:
             # Usar o arquivo de greeting configurado (do prompt ou global)
-            cmd = f"api uuid_broadcast {self.freeswitch_uuid} {self._prompt_greeting_file} aleg\n\n"
-            writer.write(cmd.encode())
-            await writer.drain()
-
-            header = await reader.readuntil(b'\n\n')
-            header_str = header.decode()
-
-            content_length = 0
-            for line in header_str.split('\n'):
-                if line.startswith('Content-Length:'):
-                    content_length = int(line.split(':')[1].strip())
-                    break
-
-            if content_length > 0:
-                await reader.readexactly(content_length)
-
-            writer.close()
-            await writer.wait_closed()
+            if not await play_audio(self.freeswitch_uuid, self._prompt_greeting_file):
+                return False
 
             # Aguardar duração do greeting + buffer
             await asyncio.sleep(self._prompt_greeting_duration_ms / 1000 + 0.5)
@@ -628,30 +1066,48 @@ REGRAS OBRIGATÓRIAS:
             logger.info("Usando fallback TTS para greeting", call_id=self.call_id)
             await self._speak(greeting)
 
-    async def _speak(self, text: str):
+    async def _speak(
+        self,
+        text: str,
+        audio_data: Optional[bytes] = None,
+        audio_files: Optional[list[tuple[str, str]]] = None,
+        deadline: Optional[TurnDeadline] = None
+    ):
         """
         Converte texto em áudio e reproduz via FreeSWITCH
 
-        Salva o áudio em arquivo e usa uuid_broadcast para playback
+        Salva o áudio em arquivo e usa uuid_broadcast para playback.
+        Se audio_data for passado (já sintetizado), pula o TTS; se audio_files
+        for passado (áudio pré-renderizado), toca os arquivos sem removê-los.
+        Com deadline, o TTS e o início do playback contam no orçamento do turno.
         """
         if not self.is_running or not self.murf:
             return
 
         try:
-            logger.info("Gerando áudio TTS", call_id=self.call_id, text=text[:50])
+            if audio_files:
+                await self._play_cached_audio(audio_files, deadline)
+                return
+
+            if audio_data is None:
+                logger.info("Gerando áudio TTS", call_id=self.call_id, text=text[:50])
 
-            # Gerar áudio com Murf (retorna L16 8kHz mono)
-            audio_data = await self.murf.text_to_speech(text)
+                # Gerar áudio com Murf (retorna L16 mono na taxa da chamada)
+                with deadline.stage("tts") if deadline else nullcontext():
+                    audio_data = await self._synthesize(text, deadline)
 
             if audio_data:
-                print(f"[TTS] Áudio gerado: {len(audio_data)} bytes", flush=True)
+                logger.debug("Áudio TTS gerado", call_id=self.call_id, audio_bytes=len(audio_data))
 
                 # Salvar áudio em arquivo WAV
                 filepath_app, filepath_fs = await self._save_audio_file(audio_data)
 
                 if filepath_app and filepath_fs:
+                    if self.recorder:
+                        self.recorder.add_outbound(audio_data)
+
                     # Reproduzir via uuid_broadcast
-                    await self._play_audio_file(filepath_app, filepath_fs, len(audio_data))
+                    await self._play_audio_file(filepath_app, filepath_fs, len(audio_data), deadline=deadline)
 
                     logger.info(
                         "Áudio enviado para playback via arquivo",
@@ -667,8 +1123,34 @@ REGRAS OBRIGATÓRIAS:
         finally:
             # Transição: SPEAKING → IDLE
             self.state = ConversationState.IDLE
+            # Um final atrasado do turno anterior já teria chegado
+            self._skip_next_final = False
             logger.debug(f"Estado: IDLE (pronto para próxima entrada)", call_id=self.call_id)
 
+    async def _play_cached_audio(self, files: list[tuple[str, str]], deadline: Optional[TurnDeadline] = None):
+        """Reproduz áudio pré-renderizado (cache de respostas / frases pré-renderizadas)
+
+        Vários arquivos tocam em sequência num único broadcast (file_string://).
+        """
+        try:
+            pcm = b"".join([
+                await run_file_io(_read_wav_pcm, path_app)
+                for path_app, _ in files
+            ])
+        except OSError:
+            logger.warning("Áudio pré-renderizado não encontrado", call_id=self.call_id, audio_files=files)
+            return
+
+        if self.recorder:
+            self.recorder.add_outbound(pcm)
+
+        if len(files) == 1:
+            filepath_app, filepath_fs = files[0]
+        else:
+            filepath_app = files[0][0]
+            filepath_fs = "file_string://" + "!".join(path_fs for _, path_fs in files)
+        await self._play_audio_file(filepath_app, filepath_fs, len(pcm), cleanup=False, deadline=deadline)
+
     async def _save_audio_file(self, audio_data: bytes) -> tuple[Optional[str], Optional[str]]:
         """Salva áudio raw PCM como arquivo WAV
 
@@ -681,91 +1163,62 @@ REGRAS OBRIGATÓRIAS:
             filepath_app = os.path.join(AUDIO_TMP_DIR_APP, filename)
             filepath_fs = os.path.join(AUDIO_TMP_DIR_FS, filename)
 
-            # Criar diretório se não existir
-            os.makedirs(AUDIO_TMP_DIR_APP, exist_ok=True)
-
-            # Criar arquivo WAV com o PCM data
-            with wave.open(filepath_app, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(8000)  # 8kHz
-                wav_file.writeframes(audio_data)
+            # Criar arquivo WAV com o PCM data (pool de I/O, atômico: o
+            # FreeSWITCH nunca lê o arquivo pela metade)
+            await run_file_io(write_wav_atomic, filepath_app, audio_data, self.sample_rate)
 
-            print(f"[TTS] Arquivo salvo: {filepath_app}", flush=True)
+            logger.debug("Arquivo TTS salvo", audio_file=filepath_app)
             return filepath_app, filepath_fs
 
         except Exception as e:
             logger.exception("Erro ao salvar arquivo de áudio", error=str(e))
             return None, None
 
-    async def _play_audio_file(self, filepath_app: str, filepath_fs: str, audio_size: int):
+    async def _play_audio_file(
+        self,
+        filepath_app: str,
+        filepath_fs: str,
+        audio_size: int,
+        cleanup: bool = True,
+        deadline: Optional[TurnDeadline] = None
+    ):
         """Reproduz arquivo de áudio via FreeSWITCH ESL
 
-        Usa conexão TCP ao ESL do FreeSWITCH (porta 8021)
+        Usa conexão TCP ao ESL do FreeSWITCH (porta 8021).
+        Com cleanup=True o arquivo é removido após o playback.
+        Com deadline, o prazo do ESL é o que resta do turno (com piso) e o
+        turno se encerra quando o playback começa.
         """
-        try:
-            print(f"[TTS] Executando playback para UUID {self.freeswitch_uuid}", flush=True)
-
-            # Conectar ao ESL do FreeSWITCH
-            reader, writer = await asyncio.open_connection('127.0.0.1', 8021)
-
-            # Ler banner inicial
-            await reader.readuntil(b'\n\n')
+        from services.dialer_service import ESL_TIMEOUT_S, play_audio
 
-            # Autenticar
-            writer.write(b'auth ClueCon\n\n')
-            await writer.drain()
-            auth_response = await reader.readuntil(b'\n\n')
+        try:
+            logger.debug("Executando playback", call_id=self.call_id, freeswitch_uuid=self.freeswitch_uuid)
 
-            if b'+OK' not in auth_response:
-                print(f"[TTS] Erro na autenticação ESL", flush=True)
-                writer.close()
-                await writer.wait_closed()
-                return
+            timeout = ESL_TIMEOUT_S
+            if deadline:
+                timeout = max(deadline.remaining_ms() / 1000, ESL_PLAYBACK_MIN_TIMEOUT_S)
 
             # Enviar comando uuid_broadcast
-            cmd = f"api uuid_broadcast {self.freeswitch_uuid} {filepath_fs} aleg\n\n"
-            writer.write(cmd.encode())
-            await writer.drain()
-
-            # Ler header da resposta ESL
-            header = await reader.readuntil(b'\n\n')
-            header_str = header.decode()
-
-            # Extrair Content-Length e ler body
-            content_length = 0
-            for line in header_str.split('\n'):
-                if line.startswith('Content-Length:'):
-                    content_length = int(line.split(':')[1].strip())
-                    break
-
-            body = b''
-            if content_length > 0:
-                body = await reader.readexactly(content_length)
-
-            result = body.decode().strip() if body else header_str.strip()
-            print(f"[TTS] Resposta ESL: {result}", flush=True)
-
-            # Fechar conexão
-            writer.close()
-            await writer.wait_closed()
+            with deadline.stage("playback") if deadline else nullcontext():
+                started = await play_audio(self.freeswitch_uuid, filepath_fs, timeout=timeout)
+            if deadline:
+                deadline.finish()
 
-            if '+OK' in result or 'Broadcast' in result:
-                print(f"[TTS] Playback iniciado com sucesso!", flush=True)
+            if started:
+                logger.debug("Playback iniciado", call_id=self.call_id)
 
-                # Estimar duração do áudio (PCM 8kHz 16-bit mono)
-                duration_seconds = audio_size / (8000 * 2) + 1  # +1 buffer
+                # Estimar duração do áudio (PCM 16-bit mono na taxa da chamada)
+                duration_seconds = audio_size / (self.sample_rate * 2) + 1  # +1 buffer
 
                 # Aguardar o áudio tocar antes de limpar
                 await asyncio.sleep(duration_seconds)
             else:
-                print(f"[TTS] Erro no playback: {result}", flush=True)
+                logger.error("Erro no playback", call_id=self.call_id, audio_file=filepath_fs)
 
-            # Limpar arquivo
-            try:
-                os.remove(filepath_app)
-            except:
-                pass
+            # Limpar arquivo (sem aguardar: o turno não depende da remoção;
+            # o que sobrar é recolhido pelo janitor de tts_*.wav)
+            if cleanup:
+                run_file_io(remove_quietly, filepath_app)
 
         except Exception as e:
             logger.exception("Erro ao reproduzir áudio via ESL", error=str(e))
@@ -785,5 +1238,9 @@ REGRAS OBRIGATÓRIAS:
             "duration": self.get_duration(),
             "is_user_speaking": self.is_speaking,
             "message_count": len(self.conversation_history),
+            "sample_rate": self.sample_rate,
             "start_time": self.start_time.isoformat() if self.start_time else None,
+            "stt_queue": self.deepgram.get_stats() if self.deepgram else None,
+            "llm": self.llm.stats if self.llm else None,
+            "turn": {**self.turn_stats, "last": self.last_turn},
         }
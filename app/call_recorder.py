@@ -0,0 +1,230 @@
+"""
+Gravação de chamadas - pipeline de baixo overhead
+
+O loop de eventos só copia frames para um ring buffer pré-alocado (entrada do
+chamador) e registra os segmentos de TTS (saída do agente) na linha do tempo.
+Uma thread dedicada mistura (mono) ou intercala (estéreo) os dois canais e
+codifica em FLAC ou Opus em blocos, então a memória fica constante mesmo em
+chamadas de uma hora.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+import structlog
+
+from config import settings
+from file_io import run_file_io
+
+logger = structlog.get_logger(__name__)
+
+# Formatos suportados -> (extensão, formato soundfile, subtipo)
+RECORDING_FORMATS = {
+    "flac": ("flac", "FLAC", "PCM_16"),
+    "opus": ("ogg", "OGG", "OPUS"),
+}
+
+# Capacidade do ring buffer de entrada (segundos de áudio)
+RING_SECONDS = 20
+
+# Tamanho do bloco codificado pela thread (segundos)
+CHUNK_SECONDS = 1.0
+
+
+class CallRecorder:
+    """
+    Grava uma chamada (chamador + agente) em arquivo comprimido.
+
+    Uso:
+        recorder = CallRecorder(call_id, "flac", stereo=True)
+        await recorder.start()
+        recorder.write_inbound(frame)      # a cada frame do FreeSWITCH
+        recorder.add_outbound(pcm)         # quando um TTS começa a tocar
+        info = await run_file_io(recorder.finish)  # bloqueante - fora do loop
+    """
+
+    def __init__(
+        self,
+        call_id: str,
+        fmt: str = "flac",
+        stereo: bool = False,
+        sample_rate: int = settings.SAMPLE_RATE,
+        output_dir: str = settings.RECORDINGS_DIR,
+    ):
+        if fmt not in RECORDING_FORMATS:
+            fmt = "flac"
+
+        self.call_id = call_id
+        self.format = fmt
+        self.stereo = stereo
+        self.sample_rate = sample_rate
+
+        ext, self._sf_format, self._sf_subtype = RECORDING_FORMATS[fmt]
+        self.file_path = os.path.join(output_dir, f"{call_id}.{ext}")
+
+        # Ring buffer de entrada (int16), pré-alocado
+        self._capacity = sample_rate * RING_SECONDS
+        self._ring = np.zeros(self._capacity, dtype=np.int16)
+        self._write_pos = 0  # total de amostras escritas (monotônico)
+        self._read_pos = 0   # total de amostras já codificadas
+
+        # Segmentos de saída: (amostra inicial na linha do tempo, pcm)
+        self._segments: Deque[Tuple[int, np.ndarray]] = deque()
+
+        self._chunk = int(sample_rate * CHUNK_SECONDS)
+        self._lock = threading.Lock()
+        self._data_ready = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.dropped_samples = 0
+
+    # === Chamado pelo loop de eventos (não bloqueia) ===
+
+    async def start(self):
+        """Cria o diretório (pool de I/O) e inicia a thread de codificação"""
+        await run_file_io(lambda: os.makedirs(os.path.dirname(self.file_path), exist_ok=True))
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"recorder-{self.call_id}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def write_inbound(self, frame: bytes):
+        """Copia um frame L16 do chamador para o ring buffer"""
+        samples = np.frombuffer(frame, dtype=np.int16, count=len(frame) // 2)
+        n = len(samples)
+        if n == 0:
+            return
+
+        with self._lock:
+            # Frame maior que o buffer inteiro: manter só o final
+            if n > self._capacity:
+                self.dropped_samples += n - self._capacity
+                self._write_pos += n - self._capacity
+                samples = samples[-self._capacity:]
+                n = self._capacity
+
+            start = self._write_pos % self._capacity
+            first = min(n, self._capacity - start)
+            self._ring[start:start + first] = samples[:first]
+            if first < n:
+                self._ring[:n - first] = samples[first:]
+            self._write_pos += n
+
+            # Thread atrasada: descartar o que foi sobrescrito
+            behind = self._write_pos - self._read_pos
+            if behind > self._capacity:
+                self.dropped_samples += behind - self._capacity
+                self._read_pos = self._write_pos - self._capacity
+
+            ready = self._write_pos - self._read_pos >= self._chunk
+
+        if ready:
+            self._data_ready.set()
+
+    def add_outbound(self, pcm: bytes):
+        """Registra um segmento de áudio do agente começando agora"""
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+        if len(samples) == 0:
+            return
+        with self._lock:
+            self._segments.append((self._write_pos, samples))
+
+    # === Finalização (bloqueante) ===
+
+    def finish(self) -> dict:
+        """Para a thread, fecha o arquivo e retorna os metadados da gravação.
+
+        Bloqueante - chamar via run_file_io (pool de I/O).
+        """
+        self._stopping = True
+        self._data_ready.set()
+        if self._thread:
+            self._thread.join()
+
+        size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
+        duration = self._read_pos / self.sample_rate
+
+        return {
+            "file_path": self.file_path,
+            "format": self.format,
+            "channels": 2 if self.stereo else 1,
+            "sample_rate": self.sample_rate,
+            "duration_seconds": round(duration, 2),
+            "size_bytes": size,
+            "dropped_ms": int(self.dropped_samples * 1000 / self.sample_rate),
+        }
+
+    # === Thread de codificação ===
+
+    def _run(self):
+        try:
+            with sf.SoundFile(
+                self.file_path,
+                mode="w",
+                samplerate=self.sample_rate,
+                channels=2 if self.stereo else 1,
+                format=self._sf_format,
+                subtype=self._sf_subtype,
+            ) as out:
+                while True:
+                    self._data_ready.wait(timeout=CHUNK_SECONDS)
+                    self._data_ready.clear()
+
+                    stopping = self._stopping
+                    while True:
+                        block = self._next_block(flush=stopping)
+                        if block is None:
+                            break
+                        out.write(block)
+
+                    if stopping:
+                        break
+
+        except Exception as e:
+            logger.exception("Erro na gravação da chamada", call_id=self.call_id, error=str(e))
+
+    def _next_block(self, flush: bool) -> Optional[np.ndarray]:
+        """Retira o próximo bloco do ring buffer e combina com a saída"""
+        with self._lock:
+            available = self._write_pos - self._read_pos
+            if available <= 0 or (available < self._chunk and not flush):
+                return None
+
+            n = min(available, self._chunk)
+            block_start = self._read_pos
+            start = block_start % self._capacity
+            first = min(n, self._capacity - start)
+            inbound = np.empty(n, dtype=np.int16)
+            inbound[:first] = self._ring[start:start + first]
+            if first < n:
+                inbound[first:] = self._ring[:n - first]
+            self._read_pos += n
+
+            segments = list(self._segments)
+            # Segmentos totalmente consumidos podem ser liberados
+            while self._segments and self._segments[0][0] + len(self._segments[0][1]) <= self._read_pos:
+                self._segments.popleft()
+
+        outbound = np.zeros(n, dtype=np.int16)
+        block_end = block_start + n
+        for seg_start, seg in segments:
+            seg_end = seg_start + len(seg)
+            if seg_end <= block_start or seg_start >= block_end:
+                continue
+            lo = max(seg_start, block_start)
+            hi = min(seg_end, block_end)
+            outbound[lo - block_start:hi - block_start] = seg[lo - seg_start:hi - seg_start]
+
+        if self.stereo:
+            # Canal esquerdo = chamador, direito = agente
+            return np.column_stack((inbound, outbound))
+
+        mixed = inbound.astype(np.int32) + outbound.astype(np.int32)
+        return np.clip(mixed, -32768, 32767).astype(np.int16)
@@ -21,7 +21,8 @@ class Settings:
     WEBSOCKET_PORT: int = int(os.getenv("WEBSOCKET_PORT", "8765"))
 
     # Audio Settings
-    SAMPLE_RATE: int = 8000  # Taxa padrão para telefonia
+    SAMPLE_RATE: int = int(os.getenv("SAMPLE_RATE", "8000"))  # taxa do tronco: 8000 ou 16000 (G.722/Opus)
+    WIDEBAND_CODECS: str = os.getenv("WIDEBAND_CODECS", "G722,OPUS,PCMA,PCMU")  # ordem oferecida em 16 kHz
     CHANNELS: int = 1
     SAMPLE_WIDTH: int = 2  # 16-bit
 
@@ -29,20 +30,81 @@ class Settings:
     DEEPGRAM_MODEL: str = "nova-2"
     DEEPGRAM_LANGUAGE: str = "pt-BR"
     DEEPGRAM_ENCODING: str = "linear16"
-    DEEPGRAM_SAMPLE_RATE: int = 8000
+    DEEPGRAM_PACKET_MS: int = int(os.getenv("DEEPGRAM_PACKET_MS", "60"))  # 40-100ms por pacote
+    DEEPGRAM_QUEUE_MS: int = int(os.getenv("DEEPGRAM_QUEUE_MS", "2000"))  # áudio máximo na fila
+    DEEPGRAM_QUEUE_OVERFLOW: str = os.getenv("DEEPGRAM_QUEUE_OVERFLOW", "drop_oldest")  # drop_oldest, drop_newest
+
+    # VAD local (padrões; cada prompt pode sobrescrever)
+    VAD_THRESHOLD_DB: float = float(os.getenv("VAD_THRESHOLD_DB", "12"))  # margem acima do ruído
+    VAD_SILENCE_MS: int = int(os.getenv("VAD_SILENCE_MS", "250"))  # silêncio que encerra a fala
+    VAD_FINALIZE_GRACE_MS: int = int(os.getenv("VAD_FINALIZE_GRACE_MS", "200"))  # espera pelo final do Deepgram
 
     # Murf AI Settings
     MURF_VOICE_ID: str = os.getenv("MURF_VOICE_ID", "pt-BR-isadora")
     MURF_STYLE: str = "conversational"
+    MURF_HTTP_MAX_CONNECTIONS: int = int(os.getenv("MURF_HTTP_MAX_CONNECTIONS", "20"))  # sessão compartilhada
+    MURF_HTTP_KEEPALIVE_S: float = float(os.getenv("MURF_HTTP_KEEPALIVE_S", "60"))
+    TTS_HEDGE_MS: int = int(os.getenv("TTS_HEDGE_MS", "1500"))  # prazo antes da requisição de reserva (0 = sem hedge)
 
     # LLM Settings
     LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4.1-nano")
     LLM_MAX_TOKENS: int = 500
     LLM_TEMPERATURE: float = 0.7
+    LLM_MAX_INPUT_TOKENS: int = int(os.getenv("LLM_MAX_INPUT_TOKENS", "3000"))  # teto de entrada por turno
+    LLM_SUMMARY_MIN_MESSAGES: int = int(os.getenv("LLM_SUMMARY_MIN_MESSAGES", "4"))  # fora do orçamento antes de resumir
+    LLM_FALLBACK_MODEL: str = os.getenv("LLM_FALLBACK_MODEL", "gpt-4.1-nano")  # vazio = sem fallback
+    LLM_FIRST_TOKEN_MS: int = int(os.getenv("LLM_FIRST_TOKEN_MS", "1200"))  # sem primeiro token: dispara o fallback
+    LLM_HARD_DEADLINE_MS: int = int(os.getenv("LLM_HARD_DEADLINE_MS", "3500"))  # sem primeiro token: frase de espera
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "true").lower() == "true"
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+    LLM_HTTP_KEEPALIVE_S: float = float(os.getenv("LLM_HTTP_KEEPALIVE_S", "120"))  # conexão ociosa antes de fechar
+    LLM_HTTP_TIMEOUT_S: float = float(os.getenv("LLM_HTTP_TIMEOUT_S", "30"))
+    LLM_WARMUP_INTERVAL_S: float = float(os.getenv("LLM_WARMUP_INTERVAL_S", "60"))  # 0 = sem warm-up periódico
 
     # Paths
     AUDIO_DIR: str = "/audio"
     LOGS_DIR: str = "/logs"
+    RECORDINGS_DIR: str = os.getenv("RECORDINGS_DIR", "/audio/recordings")
+
+    # Fillers adaptativos (espera pela resposta antes de tocar um filler)
+    FILLER_MIN_DELAY_MS: int = int(os.getenv("FILLER_MIN_DELAY_MS", "300"))
+    FILLER_MAX_DELAY_MS: int = int(os.getenv("FILLER_MAX_DELAY_MS", "1200"))
+    FILLER_TAIL_WAIT_MS: int = int(os.getenv("FILLER_TAIL_WAIT_MS", "400"))  # acima disso o filler é interrompido
+
+    # Orçamento de latência por turno (fim da fala do usuário -> início da resposta)
+    TURN_BUDGET_MS: int = int(os.getenv("TURN_BUDGET_MS", "5000"))
+    TURN_TTS_RESERVE_MS: int = int(os.getenv("TURN_TTS_RESERVE_MS", "1000"))  # reservado ao TTS + playback
+    TURN_SHORT_REPLY_MS: int = int(os.getenv("TURN_SHORT_REPLY_MS", "2500"))  # abaixo disso o LLM responde curto
+    TURN_STAGE_MIN_MS: int = int(os.getenv("TURN_STAGE_MIN_MS", "300"))  # piso por etapa com o orçamento esgotado
+    LLM_SHORT_MAX_TOKENS: int = int(os.getenv("LLM_SHORT_MAX_TOKENS", "80"))
+
+    # Cache de respostas do LLM (ativado por prompt)
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+
+    # Pré-renderização de frases frequentes (job por prompt)
+    PRERENDER_CONCURRENCY: int = int(os.getenv("PRERENDER_CONCURRENCY", "3"))  # sínteses TTS simultâneas
+    PRERENDER_MAX_PHRASES: int = int(os.getenv("PRERENDER_MAX_PHRASES", "50"))
+    PRERENDER_MIN_COUNT: int = int(os.getenv("PRERENDER_MIN_COUNT", "3"))  # chamadas distintas
+    PRERENDER_MINE_DAYS: int = int(os.getenv("PRERENDER_MINE_DAYS", "30"))
+
+    # Regeneração em massa de greetings e fillers (e geração inicial dos fillers)
+    AUDIO_REGEN_CONCURRENCY: int = int(os.getenv("AUDIO_REGEN_CONCURRENCY", "3"))  # sínteses TTS simultâneas
+
+    # I/O de arquivo do caminho da chamada (pool dedicado) e limpeza de tts_*.wav órfãos
+    FILE_IO_WORKERS: int = int(os.getenv("FILE_IO_WORKERS", "4"))
+    TTS_ORPHAN_MAX_AGE_S: int = int(os.getenv("TTS_ORPHAN_MAX_AGE_S", "900"))  # mais velho que isso é órfão
+    TTS_JANITOR_INTERVAL_S: int = int(os.getenv("TTS_JANITOR_INTERVAL_S", "300"))
+
+    # Monitor do event loop: atraso (lag) amostrado e detector de callbacks lentos
+    LOOP_LAG_INTERVAL_MS: int = int(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+    LOOP_LAG_WARN_MS: int = int(os.getenv("LOOP_LAG_WARN_MS", "100"))  # atraso que conta como travamento
+    LOOP_SLOW_CALLBACK_MS: int = int(os.getenv("LOOP_SLOW_CALLBACK_MS", "0"))  # 0 = detector desligado
+
+    # Logging
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "console")  # console, json (produção)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # eventos na fila (modo json)
 
     # Timeouts
     SILENCE_TIMEOUT: float = 2.0  # segundos de silêncio para considerar fim de fala
@@ -59,6 +121,15 @@ class Settings:
 
     # Limits
     MAX_CONCURRENT_CALLS: int = int(os.getenv("MAX_CONCURRENT_CALLS", "15"))
+    CALL_QUEUE_MAX: int = int(os.getenv("CALL_QUEUE_MAX", "50"))  # pedidos de discagem esperando vaga
+    CALL_QUEUE_TIMEOUT_S: float = float(os.getenv("CALL_QUEUE_TIMEOUT_S", "30"))
+    CALL_RING_TIMEOUT_S: int = int(os.getenv("CALL_RING_TIMEOUT_S", "60"))  # originate sem atender libera a vaga
+    CALL_CONNECT_GRACE_S: float = float(os.getenv("CALL_CONNECT_GRACE_S", "15"))  # atendida -> WebSocket do audio_fork
+
+    # Webhook logs retention
+    WEBHOOK_LOG_PARTITION: str = os.getenv("WEBHOOK_LOG_PARTITION", "month")  # month, day
+    WEBHOOK_LOG_RETENTION_DAYS: int = int(os.getenv("WEBHOOK_LOG_RETENTION_DAYS", "30"))
+    WEBHOOK_PAYLOAD_COMPRESS_MIN_BYTES: int = int(os.getenv("WEBHOOK_PAYLOAD_COMPRESS_MIN_BYTES", "2048"))  # 0 = desativado
 
     def validate(self) -> list[str]:
         """Valida configurações obrigatórias"""
@@ -2,16 +2,20 @@
 CRUD operations for database models
 """
 
+import json
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import (
+    select, update, delete, func, text, tuple_, cast, literal_column, Float
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from .models import (
-    Prompt, Call, CallMessage, Setting,
-    WebhookConfig, WebhookLog, ScheduledCall, Campaign, CampaignContact
+    SEARCH_CONFIG,
+    Prompt, ResponseCacheRule, Call, CallMessage, CallRecording, Setting,
+    WebhookConfig, WebhookEvent, WebhookLog, ScheduledCall, Campaign, CampaignContact
 )
 
 
@@ -50,6 +54,14 @@ async def get_prompts(
     return list(result.scalars().all())
 
 
+async def get_prompt_sample_rates(db: AsyncSession) -> List[int]:
+    """Distinct per-prompt audio sample rates (prompts without one use the trunk default)"""
+    result = await db.execute(
+        select(Prompt.sample_rate).where(Prompt.sample_rate.is_not(None)).distinct()
+    )
+    return list(result.scalars().all())
+
+
 async def create_prompt(db: AsyncSession, **kwargs) -> Prompt:
     """Create a new prompt"""
     prompt = Prompt(**kwargs)
@@ -100,6 +112,67 @@ async def set_active_prompt(db: AsyncSession, prompt_id: int) -> Optional[Prompt
     return prompt
 
 
+# === ResponseCacheRule CRUD ===
+
+async def get_response_cache_rules(
+    db: AsyncSession,
+    prompt_id: Optional[int] = None
+) -> List[ResponseCacheRule]:
+    """Get response cache rules (all prompts or one)"""
+    query = select(ResponseCacheRule).order_by(ResponseCacheRule.id)
+    if prompt_id is not None:
+        query = query.where(ResponseCacheRule.prompt_id == prompt_id)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def get_response_cache_rule(db: AsyncSession, rule_id: int) -> Optional[ResponseCacheRule]:
+    """Get a response cache rule by ID"""
+    result = await db.execute(
+        select(ResponseCacheRule).where(ResponseCacheRule.id == rule_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def upsert_response_cache_rule(
+    db: AsyncSession,
+    prompt_id: int,
+    utterance: str,
+    rule: str,
+    response_text: Optional[str] = None
+) -> ResponseCacheRule:
+    """Create or replace the rule for an utterance (already normalized)"""
+    result = await db.execute(
+        select(ResponseCacheRule).where(
+            ResponseCacheRule.prompt_id == prompt_id,
+            ResponseCacheRule.utterance == utterance,
+        )
+    )
+    cache_rule = result.scalar_one_or_none()
+
+    if cache_rule:
+        cache_rule.rule = rule
+        cache_rule.response_text = response_text
+    else:
+        cache_rule = ResponseCacheRule(
+            prompt_id=prompt_id,
+            utterance=utterance,
+            rule=rule,
+            response_text=response_text,
+        )
+        db.add(cache_rule)
+
+    await db.flush()
+    await db.refresh(cache_rule)
+    return cache_rule
+
+
+async def delete_response_cache_rule(db: AsyncSession, rule_id: int) -> bool:
+    """Delete a response cache rule"""
+    result = await db.execute(delete(ResponseCacheRule).where(ResponseCacheRule.id == rule_id))
+    return result.rowcount > 0
+
+
 # === Call CRUD ===
 
 async def get_call(db: AsyncSession, call_id: int) -> Optional[Call]:
@@ -122,25 +195,51 @@ async def get_call_by_call_id(db: AsyncSession, call_id: str) -> Optional[Call]:
     return result.scalar_one_or_none()
 
 
-async def get_calls(
-    db: AsyncSession,
-    skip: int = 0,
-    limit: int = 20,
+def _filter_calls(
+    query,
     status: Optional[str] = None,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
-) -> List[Call]:
-    """List calls with optional filters"""
-    query = select(Call).order_by(Call.start_time.desc())
-
+):
+    """Apply the call history filters to a query"""
     if status:
         query = query.where(Call.status == status)
     if from_date:
         query = query.where(Call.start_time >= from_date)
     if to_date:
         query = query.where(Call.start_time <= to_date)
+    return query
 
-    query = query.offset(skip).limit(limit)
+
+async def get_calls(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    status: Optional[str] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[Call]:
+    """List calls with optional filters (newest first).
+
+    Args:
+        after: Keyset cursor (start_time, id) of the last call already seen.
+            When given, `skip` is ignored and the query seeks directly
+            past that row using the (start_time, id) indexes.
+    """
+    query = _filter_calls(
+        select(Call).order_by(Call.start_time.desc(), Call.id.desc()),
+        status=status,
+        from_date=from_date,
+        to_date=to_date,
+    )
+
+    if after:
+        query = query.where(tuple_(Call.start_time, Call.id) < tuple_(*after))
+    else:
+        query = query.offset(skip)
+
+    query = query.limit(limit)
     result = await db.execute(query)
     return list(result.scalars().all())
 
@@ -152,17 +251,49 @@ async def count_calls(
     to_date: Optional[datetime] = None,
 ) -> int:
     """Count calls with optional filters"""
-    query = select(func.count(Call.id))
+    query = _filter_calls(
+        select(func.count(Call.id)),
+        status=status,
+        from_date=from_date,
+        to_date=to_date,
+    )
+
+    result = await db.execute(query)
+    return result.scalar() or 0
+
 
+async def estimate_calls(
+    db: AsyncSession,
+    status: Optional[str] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+) -> int:
+    """Estimate the number of calls matching the filters without scanning.
+
+    Uses the planner's row estimate (EXPLAIN), which is based on table
+    statistics (pg_class.reltuples and column histograms).
+    """
+    conditions = []
+    params = {}
     if status:
-        query = query.where(Call.status == status)
+        conditions.append("status = :status")
+        params["status"] = status
     if from_date:
-        query = query.where(Call.start_time >= from_date)
+        conditions.append("start_time >= :from_date")
+        params["from_date"] = from_date
     if to_date:
-        query = query.where(Call.start_time <= to_date)
+        conditions.append("start_time <= :to_date")
+        params["to_date"] = to_date
 
-    result = await db.execute(query)
-    return result.scalar() or 0
+    sql = "EXPLAIN (FORMAT JSON) SELECT 1 FROM calls"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+
+    plan = (await db.execute(text(sql), params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return max(0, int(plan[0]["Plan"]["Plan Rows"]))
 
 
 async def create_call(db: AsyncSession, **kwargs) -> Call:
@@ -192,9 +323,10 @@ async def update_call(db: AsyncSession, call_id: str, **kwargs) -> Optional[Call
 async def end_call(
     db: AsyncSession,
     call_id: str,
-    summary: Optional[str] = None
+    summary: Optional[str] = None,
+    **kwargs
 ) -> Optional[Call]:
-    """Mark a call as ended"""
+    """Mark a call as ended (kwargs: extra columns, e.g. LLM usage counters)"""
     call = await get_call_by_call_id(db, call_id)
     if not call:
         return None
@@ -205,6 +337,9 @@ async def end_call(
         call.duration_seconds = (call.end_time - call.start_time).total_seconds()
     if summary:
         call.summary = summary
+    for key, value in kwargs.items():
+        if hasattr(call, key) and value is not None:
+            setattr(call, key, value)
 
     await db.flush()
     await db.refresh(call)
@@ -252,47 +387,236 @@ async def get_call_messages(
     return list(result.scalars().all())
 
 
+async def add_messages_bulk(
+    db: AsyncSession,
+    call_db_id: int,
+    messages: List[dict]
+) -> int:
+    """Add a whole transcript to a call (role/content dicts)"""
+    count = 0
+    for msg in messages:
+        if not msg.get("content"):
+            continue
+        db.add(CallMessage(
+            call_id=call_db_id,
+            role=msg.get("role", "unknown"),
+            content=msg["content"],
+            audio_duration_ms=msg.get("audio_duration_ms"),
+        ))
+        count += 1
+
+    await db.flush()
+    return count
+
+
+async def search_call_messages(
+    db: AsyncSession,
+    query_text: str,
+    limit: int = 20,
+    prompt_id: Optional[int] = None,
+    campaign_id: Optional[int] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    after: Optional[Tuple[float, int]] = None,
+) -> List:
+    """Full-text search over transcripts, ranked per call.
+
+    Each call is ranked by its best matching message; the snippet is
+    highlighted only for the returned page.
+
+    Args:
+        query_text: Search terms (websearch syntax: "frase exata", -excluir, OR)
+        after: Keyset cursor (rank, call db id) of the last result already seen
+
+    Returns:
+        Rows with call_db_id, call_id, called_number, prompt_id, start_time,
+        message_id, role, rank and snippet
+    """
+    ts_config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    ts_query = func.websearch_to_tsquery(ts_config, query_text)
+    rank = cast(func.ts_rank(CallMessage.search_vector, ts_query), Float)
+
+    hits = (
+        select(
+            CallMessage.call_id.label("call_db_id"),
+            CallMessage.id.label("message_id"),
+            CallMessage.role,
+            CallMessage.content,
+            rank.label("rank"),
+            func.row_number().over(
+                partition_by=CallMessage.call_id,
+                order_by=(rank.desc(), CallMessage.id),
+            ).label("rn"),
+        )
+        .join(Call, Call.id == CallMessage.call_id)
+        .where(CallMessage.search_vector.op("@@")(ts_query))
+    )
+
+    if prompt_id:
+        hits = hits.where(Call.prompt_id == prompt_id)
+    if campaign_id:
+        hits = hits.where(
+            select(CampaignContact.id)
+            .where(
+                CampaignContact.call_id == Call.call_id,
+                CampaignContact.campaign_id == campaign_id,
+            )
+            .exists()
+        )
+    if from_date:
+        hits = hits.where(Call.start_time >= from_date)
+    if to_date:
+        hits = hits.where(Call.start_time <= to_date)
+
+    hits = hits.subquery()
+
+    best = select(hits).where(hits.c.rn == 1)
+    if after:
+        best = best.where(tuple_(hits.c.rank, hits.c.call_db_id) < tuple_(*after))
+    best = (
+        best.order_by(hits.c.rank.desc(), hits.c.call_db_id.desc())
+        .limit(limit)
+        .subquery()
+    )
+
+    query = (
+        select(
+            best.c.call_db_id,
+            Call.call_id,
+            Call.called_number,
+            Call.prompt_id,
+            Call.start_time,
+            best.c.message_id,
+            best.c.role,
+            best.c.rank,
+            func.ts_headline(
+                ts_config,
+                best.c.content,
+                ts_query,
+                "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=8, MaxFragments=2",
+            ).label("snippet"),
+        )
+        .join(Call, Call.id == best.c.call_db_id)
+        .order_by(best.c.rank.desc(), best.c.call_db_id.desc())
+    )
+
+    result = await db.execute(query)
+    return list(result.all())
+
+
+async def get_assistant_message_counts(
+    db: AsyncSession,
+    prompt_id: int,
+    since: Optional[datetime] = None,
+    limit: int = 5000,
+) -> List[Tuple[str, int]]:
+    """Distinct assistant messages of a prompt's calls with the number of calls each appeared in.
+
+    Returns:
+        [(content, calls), ...] most frequent first
+    """
+    calls = func.count(func.distinct(CallMessage.call_id))
+    query = (
+        select(CallMessage.content, calls.label("calls"))
+        .join(Call, Call.id == CallMessage.call_id)
+        .where(CallMessage.role == "assistant", Call.prompt_id == prompt_id)
+        .group_by(CallMessage.content)
+        .order_by(calls.desc())
+        .limit(limit)
+    )
+    if since:
+        query = query.where(Call.start_time >= since)
+
+    result = await db.execute(query)
+    return [(row.content, row.calls) for row in result.all()]
+
+
+# === CallRecording CRUD ===
+
+async def create_call_recording(
+    db: AsyncSession,
+    call_db_id: int,
+    **kwargs
+) -> CallRecording:
+    """Index a finished call recording"""
+    recording = CallRecording(call_id=call_db_id, **kwargs)
+    db.add(recording)
+    await db.flush()
+    await db.refresh(recording)
+    return recording
+
+
+async def get_call_recording(
+    db: AsyncSession,
+    call_db_id: int
+) -> Optional[CallRecording]:
+    """Get the recording of a call"""
+    result = await db.execute(
+        select(CallRecording).where(CallRecording.call_id == call_db_id)
+    )
+    return result.scalar_one_or_none()
+
+
 # === Statistics ===
 
-async def get_call_stats(
+async def get_call_stats_totals(
     db: AsyncSession,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
 ) -> dict:
-    """Get call statistics"""
-    # Count by status
-    total_query = select(func.count(Call.id))
-    active_query = select(func.count(Call.id)).where(Call.status == "active")
-    completed_query = select(func.count(Call.id)).where(Call.status == "completed")
-
-    # Average duration
-    avg_duration_query = select(func.avg(Call.duration_seconds)).where(
-        Call.duration_seconds.isnot(None)
+    """Get raw call counters in a single aggregate query.
+
+    Returns sums/counts (not averages) so the result can be updated
+    incrementally by the stats cache.
+    """
+    query = select(
+        func.count(Call.id).label("total"),
+        func.count(Call.id).filter(Call.status == "active").label("active"),
+        func.count(Call.id).filter(Call.status == "completed").label("completed"),
+        func.coalesce(func.sum(Call.duration_seconds), 0).label("duration_sum"),
+        func.count(Call.duration_seconds).label("duration_count"),
     )
 
     if from_date:
-        total_query = total_query.where(Call.start_time >= from_date)
-        completed_query = completed_query.where(Call.start_time >= from_date)
-        avg_duration_query = avg_duration_query.where(Call.start_time >= from_date)
-
+        query = query.where(Call.start_time >= from_date)
     if to_date:
-        total_query = total_query.where(Call.start_time <= to_date)
-        completed_query = completed_query.where(Call.start_time <= to_date)
-        avg_duration_query = avg_duration_query.where(Call.start_time <= to_date)
+        query = query.where(Call.start_time <= to_date)
 
-    total = (await db.execute(total_query)).scalar() or 0
-    active = (await db.execute(active_query)).scalar() or 0
-    completed = (await db.execute(completed_query)).scalar() or 0
-    avg_duration = (await db.execute(avg_duration_query)).scalar() or 0
+    row = (await db.execute(query)).one()
 
     return {
-        "total_calls": total,
-        "active_calls": active,
-        "completed_calls": completed,
+        "total": row.total or 0,
+        "active": row.active or 0,
+        "completed": row.completed or 0,
+        "duration_sum": float(row.duration_sum or 0),
+        "duration_count": row.duration_count or 0,
+    }
+
+
+def format_call_stats(totals: dict) -> dict:
+    """Convert raw counters into the public stats format"""
+    avg_duration = (
+        totals["duration_sum"] / totals["duration_count"]
+        if totals["duration_count"] else 0
+    )
+    return {
+        "total_calls": totals["total"],
+        "active_calls": totals["active"],
+        "completed_calls": totals["completed"],
         "avg_duration_seconds": round(avg_duration, 1) if avg_duration else 0,
     }
 
 
+async def get_call_stats(
+    db: AsyncSession,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+) -> dict:
+    """Get call statistics"""
+    totals = await get_call_stats_totals(db, from_date=from_date, to_date=to_date)
+    return format_call_stats(totals)
+
+
 # === Setting CRUD ===
 
 async def get_setting(db: AsyncSession, key: str) -> Optional[Setting]:
@@ -451,6 +775,26 @@ async def delete_webhook_config(db: AsyncSession, webhook_id: int) -> bool:
     return result.rowcount > 0
 
 
+async def create_webhook_events(
+    db: AsyncSession,
+    events: List[dict]
+) -> int:
+    """Store webhook event payloads (once per event)"""
+    for event_data in events:
+        db.add(WebhookEvent(**event_data))
+
+    await db.flush()
+    return len(events)
+
+
+async def get_webhook_event(db: AsyncSession, event_id: str) -> Optional[WebhookEvent]:
+    """Get a webhook event (payload) by its id"""
+    result = await db.execute(
+        select(WebhookEvent).where(WebhookEvent.id == event_id)
+    )
+    return result.scalar_one_or_none()
+
+
 async def create_webhook_log(db: AsyncSession, **kwargs) -> WebhookLog:
     """Create a webhook delivery log"""
     log = WebhookLog(**kwargs)
@@ -459,6 +803,18 @@ async def create_webhook_log(db: AsyncSession, **kwargs) -> WebhookLog:
     return log
 
 
+async def create_webhook_logs_bulk(
+    db: AsyncSession,
+    logs: List[dict]
+) -> int:
+    """Create several webhook delivery logs (one per event of a batch)"""
+    for log_data in logs:
+        db.add(WebhookLog(**log_data))
+
+    await db.flush()
+    return len(logs)
+
+
 async def get_webhook_logs(
     db: AsyncSession,
     config_id: int,
@@ -54,6 +54,10 @@ async def init_db() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+        # Partitioned tables need their current partitions before any insert
+        from services.webhook_retention_service import ensure_partitions
+        await ensure_partitions(conn)
+
     # Initialize default settings and load into runtime config
     async with AsyncSessionLocal() as session:
         await crud.init_default_settings(session)
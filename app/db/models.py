@@ -2,6 +2,8 @@
 SQLAlchemy models for LigAI
 """
 
+import json
+import zlib
 from datetime import datetime
 from typing import Optional, List
 
@@ -14,9 +16,16 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Index,
+    LargeBinary,
+    Computed,
+    UniqueConstraint,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
+# Text search configuration used for transcripts
+SEARCH_CONFIG = "portuguese"
+
 
 class Base(DeclarativeBase):
     """Base class for all models"""
@@ -37,6 +46,31 @@ class Prompt(Base):
     temperature: Mapped[float] = mapped_column(Float, default=0.7)
     greeting_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     greeting_duration_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Call recording (opt-in)
+    recording_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
+    recording_format: Mapped[str] = mapped_column(String(10), default="flac")  # flac, opus
+    recording_channels: Mapped[str] = mapped_column(String(10), default="mono")  # mono, stereo
+    # Local VAD endpointing (null thresholds = settings defaults)
+    vad_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
+    vad_threshold_db: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    vad_silence_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Fillers (null delay = adaptive, from the running latency estimate)
+    fillers_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+    filler_delay_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Response cache (opt-in; null TTL = settings default)
+    response_cache_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
+    response_cache_ttl_seconds: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # LLM latency budget (null = settings defaults)
+    llm_fallback_model: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    llm_first_token_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    llm_hard_deadline_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # TTS hedging (null deadline = settings default, 0 = off; null voice = same voice)
+    tts_hedge_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    tts_hedge_voice_id: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    # Call audio rate: 8000 (narrowband) or 16000 (wideband); null = trunk default (SAMPLE_RATE)
+    sample_rate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Sentences always pre-rendered by the pre-render job (JSON array)
+    prerender_phrases: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
@@ -57,19 +91,65 @@ class Prompt(Base):
             "temperature": self.temperature,
             "greeting_text": self.greeting_text,
             "greeting_duration_ms": self.greeting_duration_ms,
+            "recording_enabled": self.recording_enabled,
+            "recording_format": self.recording_format,
+            "recording_channels": self.recording_channels,
+            "vad_enabled": self.vad_enabled,
+            "vad_threshold_db": self.vad_threshold_db,
+            "vad_silence_ms": self.vad_silence_ms,
+            "fillers_enabled": self.fillers_enabled,
+            "filler_delay_ms": self.filler_delay_ms,
+            "response_cache_enabled": self.response_cache_enabled,
+            "response_cache_ttl_seconds": self.response_cache_ttl_seconds,
+            "llm_fallback_model": self.llm_fallback_model,
+            "llm_first_token_ms": self.llm_first_token_ms,
+            "llm_hard_deadline_ms": self.llm_hard_deadline_ms,
+            "tts_hedge_ms": self.tts_hedge_ms,
+            "tts_hedge_voice_id": self.tts_hedge_voice_id,
+            "sample_rate": self.sample_rate,
+            "prerender_phrases": json.loads(self.prerender_phrases) if self.prerender_phrases else [],
             "is_active": self.is_active,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
 
+class ResponseCacheRule(Base):
+    """Pin or forbid a cached answer for an utterance of a prompt"""
+
+    __tablename__ = "response_cache_rules"
+    __table_args__ = (
+        UniqueConstraint("prompt_id", "utterance", name="uq_response_cache_rule"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    prompt_id: Mapped[int] = mapped_column(
+        ForeignKey("prompts.id", ondelete="CASCADE"), nullable=False
+    )
+    utterance: Mapped[str] = mapped_column(String(500), nullable=False)  # normalized
+    rule: Mapped[str] = mapped_column(String(10), nullable=False)  # pin, forbid
+    response_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "prompt_id": self.prompt_id,
+            "utterance": self.utterance,
+            "rule": self.rule,
+            "response_text": self.response_text,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
 class Call(Base):
     """Call record"""
 
     __tablename__ = "calls"
     __table_args__ = (
-        Index("idx_calls_status", "status"),
-        Index("idx_calls_start_time", "start_time"),
+        # Keyset pagination: ORDER BY start_time DESC, id DESC (optionally by status)
+        Index("idx_calls_start_time_id", "start_time", "id"),
+        Index("idx_calls_status_start_time_id", "status", "start_time", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -86,6 +166,11 @@ class Call(Base):
     end_time: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     duration_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # LLM latency budget usage (turns, fallback races/wins, hard deadline misses)
+    llm_turns: Mapped[int] = mapped_column(Integer, default=0)
+    llm_fallback_races: Mapped[int] = mapped_column(Integer, default=0)
+    llm_fallback_wins: Mapped[int] = mapped_column(Integer, default=0)
+    llm_deadline_misses: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -93,6 +178,9 @@ class Call(Base):
     messages: Mapped[List["CallMessage"]] = relationship(
         back_populates="call", cascade="all, delete-orphan"
     )
+    recording: Mapped[Optional["CallRecording"]] = relationship(
+        back_populates="call", cascade="all, delete-orphan", uselist=False
+    )
 
     def to_dict(self, include_messages: bool = False) -> dict:
         data = {
@@ -108,6 +196,10 @@ class Call(Base):
             "end_time": self.end_time.isoformat() if self.end_time else None,
             "duration_seconds": self.duration_seconds,
             "summary": self.summary,
+            "llm_turns": self.llm_turns or 0,
+            "llm_fallback_races": self.llm_fallback_races or 0,
+            "llm_fallback_wins": self.llm_fallback_wins or 0,
+            "llm_deadline_misses": self.llm_deadline_misses or 0,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
         if include_messages:
@@ -149,7 +241,10 @@ class CallMessage(Base):
     """Call conversation message"""
 
     __tablename__ = "call_messages"
-    __table_args__ = (Index("idx_messages_call", "call_id"),)
+    __table_args__ = (
+        Index("idx_messages_call", "call_id"),
+        Index("idx_messages_search", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     call_id: Mapped[int] = mapped_column(
@@ -157,6 +252,12 @@ class CallMessage(Base):
     )
     role: Mapped[str] = mapped_column(String(20), nullable=False)  # user, assistant
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # Full-text search vector, computed by Postgres on insert/update
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', coalesce(content, ''))", persisted=True),
+        nullable=True,
+    )
     audio_duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
@@ -174,6 +275,41 @@ class CallMessage(Base):
         }
 
 
+class CallRecording(Base):
+    """Compressed call recording (file on disk, indexed here)"""
+
+    __tablename__ = "call_recordings"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    call_id: Mapped[int] = mapped_column(
+        ForeignKey("calls.id", ondelete="CASCADE"), unique=True, nullable=False
+    )
+    file_path: Mapped[str] = mapped_column(String(255), nullable=False)
+    format: Mapped[str] = mapped_column(String(10), nullable=False)  # flac, opus
+    channels: Mapped[int] = mapped_column(Integer, default=1)
+    sample_rate: Mapped[int] = mapped_column(Integer, default=8000)
+    duration_seconds: Mapped[float] = mapped_column(Float, default=0.0)
+    size_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    dropped_ms: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    call: Mapped["Call"] = relationship(back_populates="recording")
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "call_id": self.call_id,
+            "format": self.format,
+            "channels": self.channels,
+            "sample_rate": self.sample_rate,
+            "duration_seconds": self.duration_seconds,
+            "size_bytes": self.size_bytes,
+            "dropped_ms": self.dropped_ms,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
 # === WEBHOOKS ===
 
 class WebhookConfig(Base):
@@ -186,6 +322,10 @@ class WebhookConfig(Base):
     events: Mapped[str] = mapped_column(Text, nullable=False)  # JSON array
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     secret: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    delivery_mode: Mapped[str] = mapped_column(String(10), default="single")  # single, batch
+    batch_format: Mapped[str] = mapped_column(String(10), default="json")  # json, ndjson
+    batch_max_events: Mapped[int] = mapped_column(Integer, default=50)
+    batch_max_wait_ms: Mapped[int] = mapped_column(Integer, default=1000)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -193,7 +333,7 @@ class WebhookConfig(Base):
 
     # Relationships
     logs: Mapped[List["WebhookLog"]] = relationship(
-        back_populates="config", cascade="all, delete-orphan"
+        back_populates="config", cascade="all, delete-orphan", passive_deletes=True
     )
 
     def to_dict(self) -> dict:
@@ -203,32 +343,86 @@ class WebhookConfig(Base):
             "url": self.url,
             "events": json.loads(self.events) if self.events else [],
             "is_active": self.is_active,
+            "delivery_mode": self.delivery_mode or "single",
+            "batch_format": self.batch_format or "json",
+            "batch_max_events": self.batch_max_events or 50,
+            "batch_max_wait_ms": self.batch_max_wait_ms or 1000,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
 
+class WebhookEvent(Base):
+    """Webhook event payload - stored once per event, shared by all delivery attempts.
+
+    Range-partitioned by created_at (see services/webhook_retention_service.py).
+    """
+
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        Index("idx_webhook_events_config_created", "config_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow
+    )
+    config_id: Mapped[int] = mapped_column(
+        ForeignKey("webhook_configs.id", ondelete="CASCADE"), nullable=False
+    )
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    payload_compressed: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    payload_size: Mapped[int] = mapped_column(Integer, default=0)
+
+    def get_payload(self) -> str:
+        """Return the JSON payload, decompressing it if needed"""
+        if self.payload_compressed is not None:
+            return zlib.decompress(self.payload_compressed).decode("utf-8")
+        return self.payload or ""
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "config_id": self.config_id,
+            "event_type": self.event_type,
+            "payload": self.get_payload(),
+            "payload_size": self.payload_size,
+            "compressed": self.payload_compressed is not None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
 class WebhookLog(Base):
-    """Webhook delivery log"""
+    """Webhook delivery log (one row per attempt and event).
+
+    Range-partitioned by created_at; the payload lives in webhook_events.
+    """
 
     __tablename__ = "webhook_logs"
     __table_args__ = (
-        Index("idx_webhook_logs_config", "config_id"),
-        Index("idx_webhook_logs_created", "created_at"),
+        Index("idx_webhook_logs_config_created", "config_id", "created_at"),
+        Index("idx_webhook_logs_batch", "batch_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow
+    )
     config_id: Mapped[int] = mapped_column(
         ForeignKey("webhook_configs.id", ondelete="CASCADE"), nullable=False
     )
     event_type: Mapped[str] = mapped_column(String(50), nullable=False)
-    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    event_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    batch_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    batch_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     response_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     attempt: Mapped[int] = mapped_column(Integer, default=1)
     success: Mapped[bool] = mapped_column(Boolean, default=False)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
     config: Mapped["WebhookConfig"] = relationship(back_populates="logs")
@@ -238,6 +432,9 @@ class WebhookLog(Base):
             "id": self.id,
             "config_id": self.config_id,
             "event_type": self.event_type,
+            "event_id": self.event_id,
+            "batch_id": self.batch_id,
+            "batch_size": self.batch_size,
             "status_code": self.status_code,
             "success": self.success,
             "attempt": self.attempt,
@@ -345,6 +542,7 @@ class CampaignContact(Base):
     __table_args__ = (
         Index("idx_campaign_contacts_campaign", "campaign_id"),
         Index("idx_campaign_contacts_status", "status"),
+        Index("idx_campaign_contacts_call", "call_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -4,6 +4,7 @@ Usando SDK v5.x com AsyncDeepgramClient
 """
 
 import asyncio
+import json
 from typing import Callable, Optional
 
 import structlog
@@ -11,10 +12,118 @@ from deepgram import AsyncDeepgramClient as DGClient
 from deepgram.core.events import EventType
 
 from config import settings
+from logging_config import LogThrottle
 
 logger = structlog.get_logger(__name__)
 
 
+class AudioFrameQueue:
+    """
+    Fila limitada de áudio entre o FreeSWITCH e o Deepgram.
+
+    Os frames são copiados para um ring buffer pré-alocado (bytearray) e lidos
+    em pacotes de tamanho fixo para um buffer de pacote também reutilizado,
+    sem concatenar bytes a cada frame.
+
+    Overflow:
+        drop_oldest - descarta o áudio mais antigo (mantém latência baixa)
+        drop_newest - descarta o frame que chegou
+    """
+
+    def __init__(
+        self,
+        capacity_bytes: int,
+        packet_bytes: int,
+        max_wait: float,
+        overflow: str = "drop_oldest",
+    ):
+        self.capacity = capacity_bytes
+        self.packet_bytes = packet_bytes
+        self.max_wait = max_wait
+        self.overflow = overflow
+
+        self._buf = bytearray(capacity_bytes)
+        self._view = memoryview(self._buf)
+        self._packet = bytearray(packet_bytes)
+        self._packet_view = memoryview(self._packet)
+        self._head = 0
+        self.size = 0
+        self._ready = asyncio.Event()
+
+        # Métricas
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.packets_out = 0
+        self.bytes_dropped = 0
+        self.overflows = 0
+        self.max_size = 0
+
+    def put(self, frame: bytes):
+        """Enfileira um frame (nunca bloqueia)"""
+        data = memoryview(frame)
+        n = len(data)
+        self.frames_in += 1
+        self.bytes_in += n
+
+        if n > self.capacity:
+            self.bytes_dropped += n - self.capacity
+            data = data[n - self.capacity:]
+            n = self.capacity
+
+        free = self.capacity - self.size
+        if n > free:
+            self.overflows += 1
+            if self.overflow == "drop_newest":
+                self.bytes_dropped += n
+                return
+            excess = n - free
+            self._head = (self._head + excess) % self.capacity
+            self.size -= excess
+            self.bytes_dropped += excess
+
+        tail = (self._head + self.size) % self.capacity
+        first = min(n, self.capacity - tail)
+        self._view[tail:tail + first] = data[:first]
+        if first < n:
+            self._view[:n - first] = data[first:]
+
+        self.size += n
+        self.max_size = max(self.max_size, self.size)
+        if self.size >= self.packet_bytes:
+            self._ready.set()
+
+    def wake(self):
+        self._ready.set()
+
+    async def get_packet(self, flush: bool = False) -> Optional[memoryview]:
+        """
+        Retorna o próximo pacote (view do buffer reutilizado) ou None.
+
+        Espera até ter um pacote completo ou max_wait; com flush=True retorna
+        imediatamente o que houver. A view só é válida até a próxima chamada.
+        """
+        if not flush and self.size < self.packet_bytes:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+
+        if self.size == 0:
+            return None
+
+        n = min(self.size, self.packet_bytes)
+        first = min(n, self.capacity - self._head)
+        self._packet_view[:first] = self._view[self._head:self._head + first]
+        if first < n:
+            self._packet_view[first:n] = self._view[:n - first]
+
+        self._head = (self._head + n) % self.capacity
+        self.size -= n
+        self.packets_out += 1
+        return self._packet_view[:n]
+
+
 class DeepgramClient:
     """
     Cliente para transcrição em tempo real usando Deepgram Nova
@@ -24,7 +133,8 @@ class DeepgramClient:
         self,
         on_transcript: Callable[[str, bool], None],
         on_speech_started: Optional[Callable[[], None]] = None,
-        on_speech_ended: Optional[Callable[[], None]] = None
+        on_speech_ended: Optional[Callable[[], None]] = None,
+        sample_rate: int = settings.SAMPLE_RATE
     ):
         self.on_transcript = on_transcript
         self.on_speech_started = on_speech_started
@@ -35,6 +145,24 @@ class DeepgramClient:
         self.is_connected = False
         self._context_manager = None
         self._listen_task: Optional[asyncio.Task] = None
+        self.sample_rate = sample_rate
+
+        # Fila de áudio + task de envio (o loop de recepção nunca espera o socket)
+        bytes_per_ms = sample_rate * settings.SAMPLE_WIDTH // 1000
+        packet_ms = min(max(settings.DEEPGRAM_PACKET_MS, 40), 100)
+        self._bytes_per_ms = bytes_per_ms
+        self._queue = AudioFrameQueue(
+            capacity_bytes=settings.DEEPGRAM_QUEUE_MS * bytes_per_ms,
+            packet_bytes=packet_ms * bytes_per_ms,
+            max_wait=packet_ms * 2 / 1000,
+            overflow=settings.DEEPGRAM_QUEUE_OVERFLOW,
+        )
+        self._sender_task: Optional[asyncio.Task] = None
+        self._finalize_requested = False
+        self.send_errors = 0
+
+        # Interims chegam várias vezes por segundo: logar no máximo 1/s
+        self._interim_log = LogThrottle(1.0)
 
     async def connect(self):
         """Estabelece conexão assíncrona com Deepgram"""
@@ -47,7 +175,7 @@ class DeepgramClient:
                 model=settings.DEEPGRAM_MODEL,
                 language=settings.DEEPGRAM_LANGUAGE,
                 encoding=settings.DEEPGRAM_ENCODING,
-                sample_rate=str(settings.DEEPGRAM_SAMPLE_RATE),
+                sample_rate=str(self.sample_rate),
                 channels=str(settings.CHANNELS),
                 punctuate="true",
                 interim_results="true",
@@ -65,8 +193,9 @@ class DeepgramClient:
             self.connection.on(EventType.MESSAGE, self._on_message)
             self.connection.on(EventType.ERROR, self._on_error)
 
-            # Iniciar listening em background task
+            # Iniciar listening e envio em background tasks
             self._listen_task = asyncio.create_task(self._listen_loop())
+            self._sender_task = asyncio.create_task(self._sender_loop())
 
             self.is_connected = True
             logger.info("Conectado ao Deepgram (async)")
@@ -86,6 +215,13 @@ class DeepgramClient:
 
     async def disconnect(self):
         """Encerra conexão com Deepgram"""
+        if self._sender_task:
+            self._sender_task.cancel()
+            try:
+                await self._sender_task
+            except asyncio.CancelledError:
+                pass
+
         if self._listen_task:
             self._listen_task.cancel()
             try:
@@ -102,17 +238,57 @@ class DeepgramClient:
         self.is_connected = False
         logger.info("Desconectado do Deepgram")
 
-    async def send_audio(self, audio_data: bytes):
-        """Envia chunk de áudio para transcrição"""
-        if not self.is_connected or not self.connection:
+    def send_audio(self, audio_data: bytes):
+        """Enfileira chunk de áudio para transcrição (não bloqueia)"""
+        if not self.is_connected:
             return
+        self._queue.put(audio_data)
 
-        try:
-            await self.connection._send(audio_data)
-        except Exception as e:
-            # Don't spam logs for send errors after disconnect
-            if self.is_connected:
-                logger.exception("Erro ao enviar áudio para Deepgram", error=str(e))
+    async def finalize(self):
+        """Pede ao Deepgram para finalizar o áudio pendente (fim de fala local)
+
+        O Finalize é enviado pela task de envio, depois do áudio já enfileirado.
+        """
+        if not self.is_connected:
+            return
+        self._finalize_requested = True
+        self._queue.wake()
+
+    async def _sender_loop(self):
+        """Envia o áudio enfileirado em pacotes de DEEPGRAM_PACKET_MS"""
+        while True:
+            packet = await self._queue.get_packet(flush=self._finalize_requested)
+
+            if packet is not None:
+                try:
+                    await self.connection._send(packet)
+                except Exception as e:
+                    self.send_errors += 1
+                    # Don't spam logs for send errors after disconnect
+                    if self.is_connected and self.send_errors == 1:
+                        logger.exception("Erro ao enviar áudio para Deepgram", error=str(e))
+
+            if self._finalize_requested and self._queue.size == 0:
+                self._finalize_requested = False
+                try:
+                    await self.connection._send(json.dumps({"type": "Finalize"}))
+                except Exception as e:
+                    if self.is_connected:
+                        logger.warning("Erro ao enviar Finalize para Deepgram", error=str(e))
+
+    def get_stats(self) -> dict:
+        """Métricas da fila de áudio"""
+        queue = self._queue
+        return {
+            "frames_in": queue.frames_in,
+            "bytes_in": queue.bytes_in,
+            "packets_out": queue.packets_out,
+            "queued_ms": queue.size // self._bytes_per_ms,
+            "max_queued_ms": queue.max_size // self._bytes_per_ms,
+            "dropped_ms": queue.bytes_dropped // self._bytes_per_ms,
+            "overflows": queue.overflows,
+            "send_errors": self.send_errors,
+        }
 
     def _on_open(self, *args, **kwargs):
         """Handler para evento de conexão aberta"""
@@ -154,7 +330,12 @@ class DeepgramClient:
 
             is_final = getattr(message, "is_final", True)
 
-            logger.info("Transcrição recebida", text=transcript, is_final=is_final)
+            if is_final:
+                logger.info("Transcrição recebida", text=transcript, is_final=True)
+            else:
+                suppressed = self._interim_log.allow()
+                if suppressed is not None:
+                    logger.debug("Transcrição interim", text=transcript, suppressed=suppressed)
 
             # Chamar callback
             self._call_async(self.on_transcript, transcript, is_final)
@@ -0,0 +1,80 @@
+"""
+I/O de arquivo do caminho da chamada, fora do event loop
+
+Gravar o WAV de cada resposta, ler áudio pré-renderizado, remover arquivos
+após o playback, gravar greetings e fillers: tudo passa por um pool de
+threads dedicado e limitado (FILE_IO_WORKERS). Com o disco lento as
+operações esperam na fila do pool, mas o loop - e o áudio de todas as
+chamadas - continua livre. O pool padrão do loop fica para o resto
+(conversão do TTS, gravações, jobs).
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.FILE_IO_WORKERS,
+            thread_name_prefix="file-io",
+        )
+    return _executor
+
+
+def _on_done(future: asyncio.Future):
+    if future.cancelled() or future.exception() is not None:
+        _stats["failed"] += 1
+    else:
+        _stats["completed"] += 1
+
+
+def run_file_io(func: Callable[..., Any], *args) -> asyncio.Future:
+    """Executa uma função de arquivo (bloqueante) no pool dedicado
+
+    Retorna um future: aguarde com await, ou descarte para não esperar
+    (ex: remoções que ninguém precisa confirmar).
+    """
+    future = asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    _stats["submitted"] += 1
+    future.add_done_callback(_on_done)
+    return future
+
+
+def remove_quietly(path: str) -> bool:
+    """Remove um arquivo; ausente ou já removido não é erro"""
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+def get_stats() -> dict:
+    """Operações enviadas ao pool e quantas ainda esperam / rodam"""
+    return {
+        "workers": settings.FILE_IO_WORKERS,
+        "pending": _stats["submitted"] - _stats["completed"] - _stats["failed"],
+        **_stats,
+    }
+
+
+def shutdown_file_io():
+    """Aguarda as operações em andamento e encerra o pool (shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -3,16 +3,148 @@ Cliente LLM para processamento de linguagem natural
 """
 
 import asyncio
-from typing import Optional
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
 
+import httpx
 import structlog
 from openai import AsyncOpenAI
 
 from config import settings
+from llm_context import ConversationContext
+from turn_deadline import TurnDeadline
 
 logger = structlog.get_logger(__name__)
 
 
+# === Cliente HTTP compartilhado ===
+#
+# Um AsyncOpenAI por API key, compartilhado por todas as chamadas: o pool
+# httpx mantém conexões vivas (HTTP/2 quando disponível), então o primeiro
+# turno de cada chamada não paga DNS + TCP + TLS. Um warm-up periódico e leve
+# (GET /models/{modelo}) evita que as conexões esfriem em períodos ociosos.
+
+_clients: dict[str, AsyncOpenAI] = {}
+_warmup_task: Optional[asyncio.Task] = None
+_last_request_at = 0.0
+
+_http_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "warmups": 0,
+    "warmup_errors": 0,
+}
+_ttfb_ms: deque = deque(maxlen=500)
+
+
+async def _trace(event_name: str, info: dict):
+    if event_name == "connection.connect_tcp.complete":
+        _http_stats["new_connections"] += 1
+
+
+async def _on_request(request: httpx.Request):
+    global _last_request_at
+    _last_request_at = time.monotonic()
+    _http_stats["requests"] += 1
+    request.extensions["trace"] = _trace
+    request.extensions["ligai_started"] = _last_request_at
+
+
+async def _on_response(response: httpx.Response):
+    # Chamado com os headers recebidos (antes do corpo): tempo até o primeiro byte
+    started = response.request.extensions.get("ligai_started")
+    if started:
+        _ttfb_ms.append((time.monotonic() - started) * 1000)
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    kwargs = dict(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_S,
+        ),
+        timeout=httpx.Timeout(settings.LLM_HTTP_TIMEOUT_S, connect=5.0),
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+    )
+    if settings.LLM_HTTP2:
+        try:
+            return httpx.AsyncClient(http2=True, **kwargs)
+        except ImportError:
+            logger.warning("Pacote h2 não instalado, usando HTTP/1.1 para o LLM")
+    return httpx.AsyncClient(**kwargs)
+
+
+def get_openai_client(api_key: Optional[str] = None) -> AsyncOpenAI:
+    """Cliente AsyncOpenAI compartilhado (um por API key)"""
+    api_key = api_key or settings.OPENAI_API_KEY
+    client = _clients.get(api_key)
+    if client is None:
+        client = AsyncOpenAI(api_key=api_key, http_client=_create_http_client())
+        _clients[api_key] = client
+    return client
+
+
+async def warm_up_llm_client():
+    """Abre/renova a conexão com a API (requisição leve, sem tokens)"""
+    try:
+        await get_openai_client().models.retrieve(settings.LLM_MODEL)
+        _http_stats["warmups"] += 1
+    except Exception as e:
+        _http_stats["warmup_errors"] += 1
+        logger.debug("Falha no warm-up do LLM", error=str(e))
+
+
+async def _warmup_loop():
+    await warm_up_llm_client()
+
+    interval = settings.LLM_WARMUP_INTERVAL_S
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        # Só quando ocioso: chamadas ativas já mantêm as conexões vivas
+        if time.monotonic() - _last_request_at >= interval:
+            await warm_up_llm_client()
+
+
+async def start_llm_client():
+    """Pré-aquece a conexão em segundo plano e inicia o warm-up periódico (startup)"""
+    global _warmup_task
+    if _warmup_task is None:
+        _warmup_task = asyncio.create_task(_warmup_loop())
+
+
+async def close_llm_clients():
+    """Para o warm-up e fecha os pools HTTP (shutdown)"""
+    global _warmup_task
+    if _warmup_task:
+        _warmup_task.cancel()
+        try:
+            await _warmup_task
+        except asyncio.CancelledError:
+            pass
+        _warmup_task = None
+
+    for client in list(_clients.values()):
+        await client.close()
+    _clients.clear()
+
+
+def get_llm_http_stats() -> dict:
+    """Reuso de conexões e tempo até o primeiro byte das requisições ao LLM"""
+    requests = _http_stats["requests"]
+    ttfb = sorted(_ttfb_ms)
+    return {
+        **_http_stats,
+        "clients": len(_clients),
+        "reuse_ratio": round(1 - _http_stats["new_connections"] / requests, 4) if requests else None,
+        "ttfb_ms_p50": round(ttfb[len(ttfb) // 2]) if ttfb else None,
+        "ttfb_ms_p95": round(ttfb[min(len(ttfb) - 1, int(len(ttfb) * 0.95))]) if ttfb else None,
+    }
+
+
 class LLMClient:
     """
     Cliente para geração de respostas usando LLM (OpenAI GPT)
@@ -21,23 +153,68 @@ class LLMClient:
     para atendimento telefônico.
     """
 
-    def __init__(self, system_prompt: str):
+    def __init__(
+        self,
+        system_prompt: str,
+        prompt_version: Optional[tuple] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        fallback_model: Optional[str] = None,
+        first_token_ms: Optional[int] = None,
+        hard_deadline_ms: Optional[int] = None,
+    ):
         """
         Args:
             system_prompt: Prompt de sistema que define o comportamento do assistente
+            prompt_version: Versão do prompt, ex: (prompt_id, updated_at) - chave
+                do prefixo de sistema pré-montado
+            model: Modelo principal (padrão: LLM_MODEL)
+            fallback_model: Modelo disparado em paralelo se o principal não
+                produzir o primeiro token em first_token_ms
+            hard_deadline_ms: Prazo para o primeiro token de qualquer modelo;
+                depois dele on_hard_deadline é chamado e a espera continua
         """
         self.system_prompt = system_prompt
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = settings.LLM_MODEL
+        self.client = get_openai_client()
+        self.model = model or settings.LLM_MODEL
         self.max_tokens = settings.LLM_MAX_TOKENS
-        self.temperature = settings.LLM_TEMPERATURE
+        self.temperature = temperature if temperature is not None else settings.LLM_TEMPERATURE
+
+        # Orçamento de latência por turno
+        self.fallback_model = fallback_model or settings.LLM_FALLBACK_MODEL
+        self.first_token_ms = first_token_ms if first_token_ms is not None else settings.LLM_FIRST_TOKEN_MS
+        self.hard_deadline_ms = hard_deadline_ms if hard_deadline_ms is not None else settings.LLM_HARD_DEADLINE_MS
+
+        # Uso do fallback nesta chamada
+        self.stats = {
+            "llm_turns": 0,
+            "llm_fallback_races": 0,
+            "llm_fallback_wins": 0,
+            "llm_deadline_misses": 0,
+        }
+
+        # Contexto com orçamento de tokens e resumo dos turnos antigos
+        self.context = ConversationContext(
+            system_prompt,
+            summarize=self.summarize_conversation,
+            version=prompt_version,
+        )
+
+    async def close(self):
+        """Cancela tarefas em segundo plano (resumo do contexto)
+
+        O cliente HTTP é compartilhado e não é fechado aqui.
+        """
+        await self.context.close()
 
     async def generate_response(
         self,
         user_input: str,
         conversation_history: list[dict],
-        context: Optional[dict] = None
-    ) -> str:
+        context: Optional[dict] = None,
+        on_hard_deadline: Optional[Callable[[], Awaitable[None]]] = None,
+        deadline: Optional[TurnDeadline] = None
+    ) -> Optional[str]:
         """
         Gera resposta para a entrada do usuário
 
@@ -45,76 +222,187 @@ class LLMClient:
             user_input: Texto do usuário
             conversation_history: Histórico da conversa
             context: Contexto adicional (opcional)
+            on_hard_deadline: Chamado (uma vez) se nenhum modelo produzir o
+                primeiro token até o prazo final - ex: tocar frase de espera
+            deadline: Orçamento do turno; os prazos do primeiro token são
+                limitados ao que resta (menos a reserva do TTS) e, com pouco
+                tempo, a resposta é pedida mais curta
 
         Returns:
-            Resposta gerada pelo LLM
+            Resposta gerada pelo LLM, ou None se nenhum modelo respondeu
+            (erro, prazo esgotado, resposta vazia) - quem chama decide o
+            que falar e não deve guardar isso como resposta do modelo
         """
         try:
-            # Montar mensagens
-            messages = [
-                {"role": "system", "content": self._build_system_prompt(context)}
-            ]
-
-            # Adicionar histórico (limitado para não exceder contexto)
-            # Manter últimas 10 mensagens para contexto
-            recent_history = conversation_history[-10:] if len(conversation_history) > 10 else conversation_history
-
-            for msg in recent_history:
-                messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+            # Prefixo fixo + resumo + turnos recentes dentro do orçamento de tokens
+            messages = self.context.build(conversation_history, context)
 
             logger.debug(
                 "Gerando resposta LLM",
                 model=self.model,
-                messages_count=len(messages)
+                messages_count=len(messages),
+                input_tokens=self.context.last_input_tokens,
+                dropped=self.context.last_dropped
             )
 
-            # Chamar API
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                presence_penalty=0.1,
-                frequency_penalty=0.1
+            first_token_ms, hard_deadline_ms, max_tokens = self.first_token_ms, self.hard_deadline_ms, self.max_tokens
+            if deadline:
+                llm_budget_ms = deadline.remaining_ms(settings.TURN_TTS_RESERVE_MS)
+                clamped_ms = min(hard_deadline_ms, max(llm_budget_ms, settings.TURN_STAGE_MIN_MS))
+                if clamped_ms < hard_deadline_ms:
+                    # Mantém a proporção entre os prazos: o fallback ainda sai antes da frase de espera
+                    first_token_ms = min(first_token_ms, hard_deadline_ms) * clamped_ms / hard_deadline_ms
+                    hard_deadline_ms = clamped_ms
+                if llm_budget_ms < settings.TURN_SHORT_REPLY_MS and max_tokens > settings.LLM_SHORT_MAX_TOKENS:
+                    max_tokens = settings.LLM_SHORT_MAX_TOKENS
+                    deadline.degrade("llm", "short_reply")
+
+            self.stats["llm_turns"] += 1
+            answer = await self._complete_with_deadline(
+                messages,
+                on_hard_deadline,
+                first_token_ms=first_token_ms,
+                hard_deadline_ms=hard_deadline_ms,
+                max_tokens=max_tokens,
+                deadline=deadline
             )
 
-            # Extrair resposta
-            answer = response.choices[0].message.content
-
-            if not answer:
-                return "Desculpe, não consegui processar sua solicitação."
+            if not answer or not answer.strip():
+                logger.warning("LLM não produziu resposta", model=self.model)
+                return None
 
             return answer.strip()
 
         except Exception as e:
             logger.exception("Erro ao gerar resposta LLM", error=str(e))
-            return "Desculpe, estou com dificuldades técnicas no momento."
-
-    def _build_system_prompt(self, context: Optional[dict] = None) -> str:
-        """Constrói prompt de sistema com contexto adicional"""
-        prompt = self.system_prompt
-
-        if context:
-            prompt += "\n\nContexto adicional:"
-            for key, value in context.items():
-                prompt += f"\n- {key}: {value}"
-
-        # Adicionar instruções para telefonia
-        prompt += """
-
-IMPORTANTE - Regras para respostas telefônicas:
-1. Mantenha respostas CURTAS (máximo 2-3 frases)
-2. Use linguagem NATURAL e conversacional
-3. Evite listas, bullets ou formatação complexa
-4. Não use emojis ou caracteres especiais
-5. Seja direto e objetivo
-6. Se precisar de informação, faça UMA pergunta por vez
-7. Confirme informações importantes repetindo-as"""
-
-        return prompt
+            return None
+
+    async def _stream(
+        self,
+        model: str,
+        messages: list[dict],
+        on_first_token: Callable[[str], None],
+        max_tokens: int
+    ) -> str:
+        """Chamada em streaming; avisa no primeiro token e retorna o texto completo"""
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=self.temperature,
+            presence_penalty=0.1,
+            frequency_penalty=0.1,
+            stream=True
+        )
+
+        parts = []
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not parts:
+                        on_first_token(model)
+                    parts.append(chunk.choices[0].delta.content)
+        finally:
+            await stream.close()
+
+        return "".join(parts)
+
+    async def _complete_with_deadline(
+        self,
+        messages: list[dict],
+        on_hard_deadline: Optional[Callable[[], Awaitable[None]]],
+        first_token_ms: float,
+        hard_deadline_ms: float,
+        max_tokens: int,
+        deadline: Optional[TurnDeadline] = None
+    ) -> str:
+        """
+        Modelo principal com prazo para o primeiro token.
+
+        - Sem primeiro token em first_token_ms: dispara o fallback com o mesmo
+          contexto; vence quem produzir o primeiro token antes (o outro é cancelado)
+        - Sem primeiro token em hard_deadline_ms: chama on_hard_deadline e continua esperando
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = loop.create_future()
+
+        def mark_first(name: str):
+            if not first.done():
+                first.set_result(name)
+
+        tasks = {
+            "primary": asyncio.create_task(
+                self._stream(self.model, messages, lambda _: mark_first("primary"), max_tokens)
+            )
+        }
+
+        try:
+            winner = await self._wait_first_token(first, tasks, first_token_ms / 1000)
+
+            if winner is None and self.fallback_model:
+                self.stats["llm_fallback_races"] += 1
+                logger.info(
+                    "LLM sem primeiro token no prazo, disparando fallback",
+                    model=self.model,
+                    fallback_model=self.fallback_model,
+                    first_token_ms=round(first_token_ms)
+                )
+                tasks["fallback"] = asyncio.create_task(
+                    self._stream(self.fallback_model, messages, lambda _: mark_first("fallback"), max_tokens)
+                )
+
+            if winner is None:
+                remaining = hard_deadline_ms / 1000 - (loop.time() - started)
+                winner = await self._wait_first_token(first, tasks, max(remaining, 0))
+
+            if winner is None and any(not t.done() for t in tasks.values()):
+                self.stats["llm_deadline_misses"] += 1
+                logger.warning("LLM passou do prazo final", hard_deadline_ms=round(hard_deadline_ms))
+                if deadline:
+                    deadline.degrade("llm", "holding_phrase")
+                if on_hard_deadline:
+                    await on_hard_deadline()
+                winner = await self._wait_first_token(first, tasks, None)
+
+            if winner is None:
+                # Nenhum modelo respondeu: propaga o erro do principal
+                return await tasks["primary"]
+
+            if winner == "fallback":
+                self.stats["llm_fallback_wins"] += 1
+                if deadline:
+                    deadline.degrade("llm", "fallback_model")
+
+            for name, task in tasks.items():
+                if name != winner:
+                    task.cancel()
+
+            return await tasks[winner]
+
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # evita "exception was never retrieved"
+
+    @staticmethod
+    async def _wait_first_token(first: asyncio.Future, tasks: dict, timeout: Optional[float]) -> Optional[str]:
+        """Espera o primeiro token de qualquer tarefa; None se expirar ou todas terminarem sem token"""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while not first.done():
+            running = [t for t in tasks.values() if not t.done()]
+            if not running:
+                return None
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            await asyncio.wait([first, *running], timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+        return first.result()
 
     async def analyze_intent(self, text: str) -> dict:
         """
@@ -0,0 +1,233 @@
+"""
+Contexto da conversa para o LLM com orçamento de tokens
+
+- O prefixo de sistema (prompt + regras de telefonia) é montado uma vez por
+  versão do prompt e reutilizado byte a byte entre turnos e chamadas, o que
+  aproveita o cache de prefixo do provedor.
+- Tokens são contados localmente (tiktoken), uma vez por mensagem. A tabela
+  BPE é carregada na startup, fora do loop (a primeira carga pode baixá-la);
+  até lá, ou se não der para carregar, a contagem é estimada.
+- Turnos antigos que não cabem no orçamento são resumidos em segundo plano
+  (LLMClient.summarize_conversation); o resumo entra como mensagem de sistema
+  logo após o prefixo, sem bloquear o turno atual.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import structlog
+import tiktoken
+
+from config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Regras fixas anexadas a todo prompt de sistema
+TELEPHONY_RULES = """
+
+IMPORTANTE - Regras para respostas telefônicas:
+1. Mantenha respostas CURTAS (máximo 2-3 frases)
+2. Use linguagem NATURAL e conversacional
+3. Evite listas, bullets ou formatação complexa
+4. Não use emojis ou caracteres especiais
+5. Seja direto e objetivo
+6. Se precisar de informação, faça UMA pergunta por vez
+7. Confirme informações importantes repetindo-as"""
+
+# Overhead aproximado por mensagem no formato de chat (role + separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Prefixos montados: (versão do prompt, texto) -> (mensagem, tokens)
+_prefix_cache: dict[tuple, tuple[dict, int]] = {}
+MAX_PREFIXES = 256
+
+
+# Modelo -> encoding; None = indisponível (fica na estimativa, sem tentar a rede de novo)
+_encodings: dict[str, Optional["tiktoken.Encoding"]] = {}
+_loading: set[str] = set()
+
+
+def _load_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    """Carrega a tabela BPE (bloqueante: pode baixá-la). Rodar fora do loop."""
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning("Tabela BPE indisponível, contagem de tokens estimada", model=model, error=str(e))
+        encoding = None
+    _encodings[model] = encoding
+    _loading.discard(model)
+    return encoding
+
+
+async def load_encodings(model: str = settings.LLM_MODEL):
+    """Carrega a tabela BPE do modelo num executor (startup)"""
+    if model in _encodings:
+        return
+    _loading.add(model)
+    await asyncio.get_running_loop().run_in_executor(None, _load_encoding, model)
+
+
+def _encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    if model in _encodings:
+        return _encodings[model]
+    if model not in _loading:
+        _loading.add(model)
+        try:
+            # Nunca no loop: carrega em segundo plano e estima enquanto isso
+            asyncio.get_running_loop().run_in_executor(None, _load_encoding, model)
+        except RuntimeError:
+            # Fora de um loop (scripts)
+            return _load_encoding(model)
+    return None
+
+
+def count_tokens(text: str, model: str = settings.LLM_MODEL) -> int:
+    """Conta tokens localmente (sem chamada de rede por turno)"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        # Tabela BPE ainda carregando ou indisponível (ex: sem rede): estimativa
+        return len(text) // 3 + 1
+    return len(encoding.encode(text))
+
+
+def get_system_prefix(system_prompt: str, version: Optional[tuple] = None) -> tuple[dict, int]:
+    """
+    Mensagem de sistema fixa (prompt + regras) e seus tokens, por versão do prompt.
+
+    Args:
+        version: Identifica a versão do prompt, ex: (prompt_id, updated_at)
+    """
+    key = (version, system_prompt)
+    cached = _prefix_cache.get(key)
+    if cached is None:
+        content = system_prompt + TELEPHONY_RULES
+        cached = ({"role": "system", "content": content}, count_tokens(content) + MESSAGE_OVERHEAD_TOKENS)
+        if len(_prefix_cache) >= MAX_PREFIXES:
+            _prefix_cache.pop(next(iter(_prefix_cache)))
+        _prefix_cache[key] = cached
+    return cached
+
+
+class ConversationContext:
+    """
+    Monta as mensagens de cada turno dentro de um orçamento de tokens.
+
+    O histórico da chamada só cresce (append), então os tokens de cada
+    mensagem são contados uma única vez e guardados por índice.
+
+    Args:
+        system_prompt: Prompt de sistema do assistente
+        summarize: Função que resume uma lista de mensagens (role/content)
+        version: Versão do prompt (chave do prefixo pré-montado)
+        max_input_tokens: Teto de tokens de entrada por turno
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        summarize: Callable[[list[dict]], Awaitable[str]],
+        version: Optional[tuple] = None,
+        max_input_tokens: int = settings.LLM_MAX_INPUT_TOKENS,
+    ):
+        self.system_prompt = system_prompt
+        self.version = version
+        self.max_input_tokens = max_input_tokens
+        self._summarize = summarize
+
+        self._token_counts: list[int] = []
+        self.summary: Optional[str] = None
+        self._summary_tokens = 0
+        # Mensagens [0, summarized_upto) já estão no resumo
+        self.summarized_upto = 0
+        self._summary_task: Optional[asyncio.Task] = None
+
+        self.last_input_tokens = 0
+        self.last_dropped = 0
+
+    def _count_history(self, history: list[dict]):
+        for msg in history[len(self._token_counts):]:
+            self._token_counts.append(count_tokens(msg.get("content") or "") + MESSAGE_OVERHEAD_TOKENS)
+
+    def build(self, history: list[dict], context: Optional[dict] = None) -> list[dict]:
+        """
+        Mensagens para o turno atual (a última do histórico é a entrada do usuário).
+
+        Inclui o prefixo, o contexto adicional, o resumo e os turnos mais
+        recentes que couberem no orçamento. Turnos que ficaram de fora são
+        resumidos em segundo plano para os próximos turnos.
+        """
+        self._count_history(history)
+
+        prefix, used = get_system_prefix(self.system_prompt, self.version)
+        messages = [prefix]
+
+        if context:
+            extra = "Contexto adicional:" + "".join(f"\n- {k}: {v}" for k, v in context.items())
+            messages.append({"role": "system", "content": extra})
+            used += count_tokens(extra) + MESSAGE_OVERHEAD_TOKENS
+
+        if self.summary:
+            messages.append({"role": "system", "content": self.summary})
+            used += self._summary_tokens
+
+        budget = self.max_input_tokens - used
+
+        # Turnos recentes, do mais novo para o mais antigo; a entrada atual sempre entra
+        start = len(history)
+        while start > self.summarized_upto:
+            cost = self._token_counts[start - 1]
+            if start < len(history) and cost > budget:
+                break
+            budget -= cost
+            start -= 1
+
+        messages.extend({"role": m["role"], "content": m["content"]} for m in history[start:])
+
+        self.last_input_tokens = self.max_input_tokens - budget
+        self.last_dropped = start - self.summarized_upto
+
+        if self.last_dropped >= settings.LLM_SUMMARY_MIN_MESSAGES:
+            self._schedule_summary(history, start)
+
+        return messages
+
+    def _schedule_summary(self, history: list[dict], upto: int):
+        """Dobra history[summarized_upto:upto] no resumo, fora do caminho crítico"""
+        if self._summary_task and not self._summary_task.done():
+            return
+
+        chunk = list(history[self.summarized_upto:upto])
+        if self.summary:
+            chunk.insert(0, {"role": "resumo anterior", "content": self.summary})
+
+        self._summary_task = asyncio.create_task(self._fold_summary(chunk, upto))
+
+    async def _fold_summary(self, chunk: list[dict], upto: int):
+        try:
+            summary = await self._summarize(chunk)
+        except Exception as e:
+            logger.warning("Erro ao resumir contexto", error=str(e))
+            return
+
+        # summarize_conversation devolve um texto fixo em caso de erro
+        if not summary or summary == "Resumo não disponível":
+            return
+
+        self.summary = "Resumo da conversa até aqui: " + summary
+        self._summary_tokens = count_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS
+        self.summarized_upto = upto
+        logger.debug("Contexto resumido", messages=upto, summary_tokens=self._summary_tokens)
+
+    async def close(self):
+        """Cancela um resumo em andamento (fim da chamada)"""
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
+            try:
+                await self._summary_task
+            except asyncio.CancelledError:
+                pass
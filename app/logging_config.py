@@ -0,0 +1,181 @@
+"""
+Configuração de logging (structlog + logging da stdlib)
+
+Modos (settings.LOG_FORMAT):
+    console - saída colorida legível, síncrona (desenvolvimento)
+    json    - uma linha JSON por evento; a renderização e a escrita no stdout
+              acontecem numa thread própria (QueueHandler + QueueListener),
+              então o loop de eventos só enfileira o evento
+
+Em ambos os modos o contexto ligado com bind_call_context() (ex: call_id) é
+incluído em todos os logs emitidos pela task da chamada e pelas tasks filhas.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Optional
+
+import structlog
+
+from config import settings
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que não formata no thread de origem e descarta se a fila encher"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # A formatação (JSON) fica para a thread do listener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+def _shared_processors() -> list:
+    return [
+        structlog.contextvars.merge_contextvars,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.StackInfoRenderer(),
+    ]
+
+
+def configure_logging(log_format: Optional[str] = None, stream=None):
+    """Configura structlog e o logging da stdlib (chamar uma vez na startup)"""
+    global _listener
+
+    log_format = log_format or settings.LOG_FORMAT
+    stream = stream or sys.stdout
+    level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+
+    stop_logging()
+
+    if log_format != "json":
+        logging.basicConfig(
+            format='%(asctime)s [%(levelname)s] %(message)s',
+            level=level,
+            stream=stream,
+            force=True,
+        )
+        structlog.configure(
+            processors=[
+                structlog.stdlib.filter_by_level,
+                *_shared_processors(),
+                structlog.processors.format_exc_info,
+                structlog.processors.UnicodeDecoder(),
+                structlog.dev.ConsoleRenderer(),
+            ],
+            wrapper_class=structlog.stdlib.BoundLogger,
+            context_class=dict,
+            logger_factory=structlog.stdlib.LoggerFactory(),
+            cache_logger_on_first_use=True,
+        )
+        return
+
+    # Produção: JSON renderizado fora do loop de eventos
+    formatter = structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=_shared_processors(),
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(),
+        ],
+    )
+    output = logging.StreamHandler(stream)
+    output.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_NonBlockingQueueHandler(log_queue))
+    root.setLevel(level)
+
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            *_shared_processors(),
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        wrapper_class=structlog.stdlib.BoundLogger,
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+
+
+def stop_logging():
+    """Esvazia a fila e para a thread de escrita (modo json)"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def get_dropped_logs() -> int:
+    """Eventos descartados por fila cheia (modo json)"""
+    return _NonBlockingQueueHandler.dropped
+
+
+# === Contexto por chamada ===
+
+def bind_call_context(**kwargs):
+    """Liga campos (ex: call_id) a todos os logs da task atual e filhas"""
+    structlog.contextvars.bind_contextvars(**kwargs)
+
+
+def clear_call_context():
+    structlog.contextvars.clear_contextvars()
+
+
+# === Logs amostrados (eventos por frame / por poll) ===
+
+class LogThrottle:
+    """
+    Limita um evento de log a no máximo um a cada `interval` segundos por chave.
+
+    Uso:
+        _throttle = LogThrottle(10.0)
+        suppressed = _throttle.allow("active_calls")
+        if suppressed is not None:
+            logger.info("...", suppressed=suppressed)
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last: dict = {}
+        self._suppressed: dict = {}
+
+    def allow(self, key: str = "") -> Optional[int]:
+        """Retorna quantos eventos foram suprimidos desde o último, ou None se suprimir este"""
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return None
+
+        self._last[key] = now
+        return self._suppressed.pop(key, 0)
+
+    def forget(self, key: str):
+        self._last.pop(key, None)
+        self._suppressed.pop(key, None)
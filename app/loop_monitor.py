@@ -0,0 +1,268 @@
+"""
+Monitor do event loop
+
+Chamadas, API, WebSocket do dashboard, campanhas, agendador e retries de
+webhook dividem um único loop asyncio: qualquer trecho síncrono lento
+(conversão de áudio, json.dumps de uma transcrição grande, escrita em
+disco) atrasa o áudio de todas as chamadas. Dois mecanismos:
+
+- Amostrador de atraso: uma task dorme LOOP_LAG_INTERVAL_MS e mede quanto
+  acordou atrasada. Percentis recentes, pico e travamentos (atraso >=
+  LOOP_LAG_WARN_MS) saem no /health.
+- Detector de callbacks lentos (LOOP_SLOW_CALLBACK_MS > 0): uma thread
+  vigia o batimento do amostrador. Se o loop passa do limite sem acordá-lo,
+  captura o stack da thread do loop e a task em execução. Os piores pontos
+  desde a startup ficam em /api/v1/debug/event-loop.
+
+O modo debug do asyncio (slow_callback_duration) só diz qual handle demorou,
+sem o stack de onde travou, e pesa demais para ficar ligado em produção.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+import structlog
+
+from config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Amostras recentes de atraso (percentis)
+LAG_WINDOW = 600
+
+# Frames guardados por stack capturado
+STACK_LIMIT = 25
+
+# Pontos distintos guardados (sai o de menor pico)
+MAX_OFFENDERS = 100
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_lag_ms: deque = deque(maxlen=LAG_WINDOW)
+_stats = {
+    "samples": 0,
+    "max_lag_ms": 0.0,
+    "stalls": 0,
+    "slow_callbacks": 0,
+}
+
+# Piores pontos: chave (corrotina @ local) -> contadores e último stack
+_offenders: dict[str, dict] = {}
+_lock = threading.Lock()
+
+# Quando o amostrador deveria acordar (time.monotonic)
+_expected_wakeup: Optional[float] = None
+# Travamento capturado pela thread e ainda em curso: (batimento, chave)
+_pending_stall: Optional[tuple[float, str]] = None
+
+_started_at: Optional[float] = None
+_sampler_task: Optional[asyncio.Task] = None
+_watchdog: Optional[threading.Thread] = None
+_watchdog_stop = threading.Event()
+
+
+def _percentile(values: list, p: float) -> Optional[float]:
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(len(values) * p))], 1)
+
+
+def _location(stack: traceback.StackSummary) -> traceback.FrameSummary:
+    """Frame mais interno do código da aplicação (fora de libs e deste módulo)"""
+    for frame in reversed(stack):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(_APP_DIR) and path != os.path.abspath(__file__) and "site-packages" not in path:
+            return frame
+    return stack[-1]
+
+
+def _capture(frame, task: Optional[asyncio.Task]) -> tuple[str, dict]:
+    """Descreve onde o loop está parado: corrotina, local e stack"""
+    stack = traceback.extract_stack(frame, limit=STACK_LIMIT)
+    where = _location(stack)
+    location = f"{os.path.relpath(where.filename, _APP_DIR)}:{where.lineno} in {where.name}"
+
+    coroutine = None
+    if task is not None:
+        coro = task.get_coro()
+        coroutine = getattr(coro, "__qualname__", None) or repr(coro)
+
+    info = {
+        "coroutine": coroutine,
+        "task": task.get_name() if task is not None else None,
+        "location": location,
+        "stack": [line.rstrip() for line in traceback.format_list(stack)],
+    }
+    return f"{coroutine or '<callback>'} @ {location}", info
+
+
+def _register_offender(key: str, info: dict):
+    """Conta um travamento no ponto (chamado pela thread, com _lock)"""
+    entry = _offenders.get(key)
+    if entry is None:
+        if len(_offenders) >= MAX_OFFENDERS:
+            smallest = min(_offenders, key=lambda k: _offenders[k]["max_ms"])
+            del _offenders[smallest]
+        entry = _offenders[key] = {
+            **info,
+            "count": 0,
+            "max_ms": 0.0,
+            "total_ms": 0.0,
+            "first_seen_at": time.time(),
+        }
+    entry.update(stack=info["stack"], task=info["task"])
+    entry["count"] += 1
+    entry["last_seen_at"] = time.time()
+
+
+def _watchdog_loop(loop: asyncio.AbstractEventLoop, loop_thread_id: int, threshold_s: float):
+    """Thread: captura o stack do loop quando o amostrador passa do limite sem acordar"""
+    global _pending_stall
+
+    check_s = max(threshold_s / 4, 0.01)
+    captured = None
+
+    while not _watchdog_stop.wait(check_s):
+        heartbeat = _expected_wakeup
+        if heartbeat is None or heartbeat == captured:
+            continue
+        if time.monotonic() - heartbeat < threshold_s:
+            continue
+
+        frame = sys._current_frames().get(loop_thread_id)
+        if frame is None:
+            continue
+        try:
+            task = asyncio.current_task(loop)
+        except Exception:
+            task = None
+
+        try:
+            key, info = _capture(frame, task)
+        except Exception:
+            continue
+        finally:
+            del frame
+
+        captured = heartbeat
+        with _lock:
+            _register_offender(key, info)
+            _pending_stall = (heartbeat, key)
+            _stats["slow_callbacks"] += 1
+
+
+def _record_lag(lag_ms: float, heartbeat: float):
+    global _pending_stall
+
+    _lag_ms.append(lag_ms)
+    _stats["samples"] += 1
+    _stats["max_lag_ms"] = max(_stats["max_lag_ms"], lag_ms)
+
+    with _lock:
+        pending = _pending_stall
+        if pending and pending[0] == heartbeat:
+            _pending_stall = None
+            entry = _offenders.get(pending[1])
+            if entry is not None:
+                entry["max_ms"] = max(entry["max_ms"], round(lag_ms, 1))
+                entry["total_ms"] = round(entry["total_ms"] + lag_ms, 1)
+        else:
+            pending = None
+
+    if lag_ms >= settings.LOOP_LAG_WARN_MS:
+        _stats["stalls"] += 1
+        logger.warning(
+            "Event loop travado",
+            lag_ms=round(lag_ms),
+            offender=pending[1] if pending else None
+        )
+
+
+async def _sample_loop():
+    """Mede quanto cada sleep acordou atrasado"""
+    global _expected_wakeup
+
+    interval_s = settings.LOOP_LAG_INTERVAL_MS / 1000
+    while True:
+        heartbeat = time.monotonic() + interval_s
+        _expected_wakeup = heartbeat
+        await asyncio.sleep(interval_s)
+        _record_lag(max(0.0, (time.monotonic() - heartbeat) * 1000), heartbeat)
+
+
+async def start_loop_monitor():
+    """Inicia o amostrador (e o detector, se LOOP_SLOW_CALLBACK_MS > 0) no loop atual"""
+    global _sampler_task, _watchdog, _started_at
+
+    if _sampler_task is not None:
+        return
+
+    _started_at = time.time()
+    _sampler_task = asyncio.create_task(_sample_loop())
+
+    if settings.LOOP_SLOW_CALLBACK_MS > 0:
+        _watchdog_stop.clear()
+        _watchdog = threading.Thread(
+            target=_watchdog_loop,
+            args=(asyncio.get_running_loop(), threading.get_ident(), settings.LOOP_SLOW_CALLBACK_MS / 1000),
+            name="loop-watchdog",
+            daemon=True,
+        )
+        _watchdog.start()
+
+    logger.info(
+        "Monitor do event loop iniciado",
+        interval_ms=settings.LOOP_LAG_INTERVAL_MS,
+        slow_callback_ms=settings.LOOP_SLOW_CALLBACK_MS or None
+    )
+
+
+async def stop_loop_monitor():
+    """Para o amostrador e o detector (shutdown)"""
+    global _sampler_task, _watchdog, _expected_wakeup
+
+    _watchdog_stop.set()
+    if _watchdog is not None:
+        _watchdog.join(timeout=1)
+        _watchdog = None
+
+    if _sampler_task is not None:
+        _sampler_task.cancel()
+        try:
+            await _sampler_task
+        except asyncio.CancelledError:
+            pass
+        _sampler_task = None
+    _expected_wakeup = None
+
+
+def get_loop_stats() -> dict:
+    """Atraso do loop (amostras recentes), pico e travamentos desde a startup"""
+    lags = sorted(_lag_ms)
+    return {
+        "started_at": _started_at,
+        "interval_ms": settings.LOOP_LAG_INTERVAL_MS,
+        "samples": _stats["samples"],
+        "lag_ms_p50": _percentile(lags, 0.5),
+        "lag_ms_p95": _percentile(lags, 0.95),
+        "lag_ms_p99": _percentile(lags, 0.99),
+        "lag_ms_max": round(_stats["max_lag_ms"], 1),
+        "stalls": _stats["stalls"],
+        "slow_callback_ms": settings.LOOP_SLOW_CALLBACK_MS or None,
+        "slow_callbacks": _stats["slow_callbacks"],
+    }
+
+
+def get_slow_callbacks(limit: int = 20) -> list[dict]:
+    """Piores pontos desde a startup (maior travamento primeiro)"""
+    with _lock:
+        entries = [{"key": key, **entry} for key, entry in _offenders.items()]
+    entries.sort(key=lambda e: (e["max_ms"], e["count"]), reverse=True)
+    return entries[:limit]
+
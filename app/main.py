@@ -19,38 +19,17 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import uvicorn
 
+from audio_format import default_sample_rate
 from call_handler import CallHandler, initialize_fillers
 from config import settings
 from db.database import init_db, close_db
 
-# Configurar logging
-import logging
-logging.basicConfig(
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    level=logging.INFO,
-    stream=sys.stdout
-)
-
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.dev.ConsoleRenderer()
-    ],
-    wrapper_class=structlog.stdlib.BoundLogger,
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    cache_logger_on_first_use=True,
-)
+# Configurar logging (LOG_FORMAT=json em produção)
+from logging_config import configure_logging, bind_call_context, clear_call_context
+configure_logging()
 
 logger = structlog.get_logger(__name__)
-print("LigAI iniciando...", flush=True)
+logger.info("LigAI iniciando...")
 
 # Import shared state
 from state import active_calls, pending_call_configs, pending_call_numbers
@@ -63,16 +42,67 @@ async def lifespan(app: FastAPI):
     uvloop.install()
     logger.info("Iniciando LigAI...")
 
+    # Atraso do event loop e detector de callbacks lentos (desde o início da startup)
+    from loop_monitor import start_loop_monitor, stop_loop_monitor
+    await start_loop_monitor()
+
     # Initialize database
     await init_db()
 
-    # Pre-generate filler audio
-    await initialize_fillers()
+    # Greeting registry (prompt and global greetings already on disk)
+    from services.greeting_service import load_greetings
+    try:
+        await load_greetings()
+    except Exception as e:
+        logger.error("Erro ao carregar greetings", error=str(e))
+
+    # Pre-generate filler audio (trunk rate + rates set on prompts)
+    sample_rates = {default_sample_rate()}
+    try:
+        from db.database import AsyncSessionLocal
+        from db import crud
+
+        async with AsyncSessionLocal() as db:
+            sample_rates.update(await crud.get_prompt_sample_rates(db))
+    except Exception as e:
+        logger.error("Erro ao carregar taxas de áudio dos prompts", error=str(e))
+    for sample_rate in sorted(sample_rates):
+        await initialize_fillers(sample_rate)
+
+    # Response cache pin/forbid rules
+    from services.response_cache_service import load_rules
+    try:
+        await load_rules()
+    except Exception as e:
+        logger.error("Erro ao carregar regras do cache de respostas", error=str(e))
+
+    # Frases pré-renderizadas por prompt
+    from services.prerender_service import load_indexes, stop_prerender_jobs
+    try:
+        await load_indexes()
+    except Exception as e:
+        logger.error("Erro ao carregar frases pré-renderizadas", error=str(e))
+
+    # Tabela BPE do contador de tokens (pode baixar na primeira vez): fora do loop
+    from llm_context import load_encodings
+    await load_encodings()
+
+    # Shared LLM client: open the connection before the first call
+    from llm_client import start_llm_client, close_llm_clients
+    await start_llm_client()
 
     # Start scheduler for scheduled calls
     from services.scheduler_service import start_scheduler, stop_scheduler
     await start_scheduler()
 
+    # Start webhook log partition maintenance (retention)
+    from services.webhook_retention_service import start_retention_worker, stop_retention_worker
+    await start_retention_worker()
+
+    # Remove tts_*.wav órfãos (playback interrompido, crash)
+    from services.tts_janitor_service import start_tts_janitor, stop_tts_janitor
+    await start_tts_janitor()
+
     logger.info("LigAI iniciado com sucesso")
     yield
 
@@ -81,15 +111,36 @@ async def lifespan(app: FastAPI):
 
     # Stop scheduler
     await stop_scheduler()
+    await stop_retention_worker()
+    await stop_tts_janitor()
+    await stop_prerender_jobs()
+
+    from services.audio_regen_service import stop_regeneration_job
+    await stop_regeneration_job()
 
     # Close all active calls
     logger.info(f"Encerrando {len(active_calls)} chamadas ativas...")
     for call_id, handler in list(active_calls.items()):
         await handler.stop()
 
+    # Aguarda gravações/remoções de áudio pendentes
+    from file_io import shutdown_file_io
+    shutdown_file_io()
+
+    # Deliver webhook batches still waiting for their flush window
+    from services.webhook_service import flush_webhook_batches
+    await flush_webhook_batches()
+
+    await close_llm_clients()
+
+    from murf_client import close_tts_session
+    await close_tts_session()
+
     # Close database
     await close_db()
 
+    await stop_loop_monitor()
+
     logger.info("LigAI encerrado")
 
 
@@ -129,24 +180,51 @@ app.include_router(dashboard.router, tags=["dashboard"])
 # Health check endpoint
 @app.get("/health")
 async def health_check():
+    from api.routes.dashboard import broadcaster
+    from llm_client import get_llm_http_stats
+    from murf_client import get_tts_http_stats
+    from file_io import get_stats as get_file_io_stats
+    from services.tts_janitor_service import stats as tts_janitor_stats
+    from loop_monitor import get_loop_stats
+
     return {
         "status": "healthy",
         "service": "ligai",
         "active_calls": len(active_calls),
+        "dashboard": broadcaster.get_stats(),
+        "llm_http": get_llm_http_stats(),
+        "tts_http": get_tts_http_stats(),
+        "file_io": get_file_io_stats(),
+        "tts_janitor": tts_janitor_stats,
+        "event_loop": get_loop_stats(),
     }
 
 
 @app.get("/api/v1/stats")
 async def get_stats():
     """Get system statistics"""
-    from db.database import AsyncSessionLocal
-    from db import crud
+    from services.stats_service import get_stats_snapshot
+
+    stats = await get_stats_snapshot()
+    stats["active_calls"] = len(active_calls)
+    stats["max_concurrent_calls"] = settings.MAX_CONCURRENT_CALLS
 
-    async with AsyncSessionLocal() as db:
-        stats = await crud.get_call_stats(db)
-        stats["active_calls"] = len(active_calls)
-        stats["max_concurrent_calls"] = settings.MAX_CONCURRENT_CALLS
-        return stats
+    from services.capacity_service import get_capacity_status
+    capacity = get_capacity_status()
+    capacity.pop("queue")
+    stats["capacity"] = capacity
+    return stats
+
+
+@app.get("/api/v1/debug/event-loop")
+async def event_loop_debug(limit: int = 20):
+    """Event loop lag and the worst slow callbacks since startup"""
+    from loop_monitor import get_loop_stats, get_slow_callbacks
+
+    return {
+        "stats": get_loop_stats(),
+        "slow_callbacks": get_slow_callbacks(max(1, min(limit, 100))),
+    }
 
 
 # WebSocket endpoint for FreeSWITCH audio
@@ -158,25 +236,27 @@ async def freeswitch_websocket(websocket: WebSocket, uuid: Optional[str] = None)
 
     Protocol:
     - First message: JSON metadata or plain text
-    - Following messages: Binary audio L16 8kHz mono
+    - Following messages: Binary audio L16 mono (8kHz, or 16kHz for wideband calls)
     - Response: Binary audio for playback
     """
     await websocket.accept()
 
-    print(f"[WS] Nova conexão recebida! UUID: {uuid}", flush=True)
+    logger.debug("Nova conexão WebSocket", uuid=uuid)
     call_id: Optional[str] = None
     freeswitch_uuid: Optional[str] = uuid
     handler: Optional[CallHandler] = None
+    admitted = False
 
     try:
         # First message contains metadata
         initial_msg = await asyncio.wait_for(websocket.receive(), timeout=10.0)
-        print(f"[WS] Primeira mensagem recebida", flush=True)
+        logger.debug("Primeira mensagem recebida", uuid=uuid)
 
         # Handle different message types
         # Variables to store numbers from metadata (for inbound calls)
         metadata_caller_number = None
         metadata_called_number = None
+        metadata_sample_rate = None
 
         if "text" in initial_msg:
             msg_data = initial_msg["text"]
@@ -188,6 +268,8 @@ async def freeswitch_websocket(websocket: WebSocket, uuid: Optional[str] = None)
                 # Extract caller/called numbers from metadata (for inbound calls)
                 metadata_caller_number = metadata.get("caller_number")
                 metadata_called_number = metadata.get("called_number")
+                # Rate requested from audio_fork (originate)
+                metadata_sample_rate = metadata.get("sample_rate")
             except json.JSONDecodeError:
                 call_id = freeswitch_uuid or msg_data.strip()
         elif "bytes" in initial_msg:
@@ -200,12 +282,29 @@ async def freeswitch_websocket(websocket: WebSocket, uuid: Optional[str] = None)
         if not freeswitch_uuid:
             freeswitch_uuid = call_id
 
+        # Todos os logs desta chamada (e das tasks filhas) levam o call_id
+        bind_call_context(call_id=call_id)
+
         logger.info(
             "Nova chamada recebida via mod_audio_fork",
             call_id=call_id,
             freeswitch_uuid=freeswitch_uuid
         )
 
+        # Controle de admissão: outbound já tem vaga desde o originate,
+        # inbound precisa de uma vaga livre agora
+        from services.capacity_service import admit_connection
+        if not admit_connection(call_id):
+            logger.warning("Chamada recusada: sem capacidade", call_id=call_id)
+            try:
+                await websocket.close(code=1013)  # Try Again Later
+            except Exception:
+                pass
+            from services.dialer_service import hangup_call
+            await hangup_call(freeswitch_uuid)
+            return
+        admitted = True
+
         # Check if we have a pending prompt config for this call
         prompt_config = pending_call_configs.pop(call_id, None)
 
@@ -229,6 +328,7 @@ async def freeswitch_websocket(websocket: WebSocket, uuid: Optional[str] = None)
             websocket=websocket,
             freeswitch_uuid=freeswitch_uuid,
             prompt_config=prompt_config,
+            sample_rate=metadata_sample_rate,
         )
         active_calls[call_id] = handler
 
@@ -254,12 +354,16 @@ async def freeswitch_websocket(websocket: WebSocket, uuid: Optional[str] = None)
                 call_db_id = call_record.id
                 await db.commit()
                 logger.info("Chamada salva no banco", call_id=call_id, db_id=call_db_id)
+
+            from services.stats_service import record_call_started, publish_stats
+            record_call_started()
+            publish_stats()
         except Exception as e:
             logger.error("Erro ao salvar chamada no banco", error=str(e))
 
         # Emit call started event to dashboard
         from api.routes.dashboard import emit_call_started
-        await emit_call_started(call_id, {
+        emit_call_started(call_id, {
             "freeswitch_uuid": freeswitch_uuid,
             "called_number": called_number,
             "start_time": handler.start_time.isoformat() if handler.start_time else None,
@@ -283,7 +387,7 @@ async def freeswitch_websocket(websocket: WebSocket, uuid: Optional[str] = None)
             message = await websocket.receive()
 
             if "bytes" in message:
-                # Audio received from FreeSWITCH (L16 8kHz mono)
+                # Audio received from FreeSWITCH (L16 mono at the call sample rate)
                 await handler.process_audio(message["bytes"])
             elif "text" in message:
                 # Control/text message from mod_audio_stream
@@ -314,10 +418,11 @@ async def freeswitch_websocket(websocket: WebSocket, uuid: Optional[str] = None)
         # Emit call ended event to dashboard
         duration = 0
         transcript = []
+        llm_stats = {}
         if handler:
             from api.routes.dashboard import emit_call_ended
             duration = handler.get_duration() if hasattr(handler, 'get_duration') else 0
-            await emit_call_ended(call_id, duration)
+            emit_call_ended(call_id, duration)
 
             # Get transcript for webhook
             if hasattr(handler, 'conversation_history'):
@@ -326,35 +431,53 @@ async def freeswitch_websocket(websocket: WebSocket, uuid: Optional[str] = None)
                     for m in handler.conversation_history
                 ]
 
+            # Uso do fallback / prazo do LLM nesta chamada
+            if getattr(handler, 'llm', None):
+                llm_stats = dict(handler.llm.stats)
+
         # Update call in database
         try:
             from db.database import AsyncSessionLocal
             from db import crud
 
             async with AsyncSessionLocal() as db:
-                await crud.end_call(db, call_id)
+                ended_call = await crud.end_call(db, call_id, **llm_stats)
+                # Persist transcript (searchable via /api/v1/calls/search)
+                if ended_call and transcript:
+                    await crud.add_messages_bulk(db, ended_call.id, transcript)
                 await db.commit()
                 logger.info("Chamada atualizada no banco", call_id=call_id, duration=duration)
+
+            if ended_call:
+                from services.stats_service import record_call_ended, publish_stats
+                record_call_ended(ended_call.duration_seconds)
+                publish_stats()
         except Exception as e:
             logger.error("Erro ao atualizar chamada no banco", error=str(e))
 
-        # Dispatch webhook event
-        try:
-            from services.webhook_service import dispatch_event
-            await dispatch_event("call.ended", {
-                "call_id": call_id,
-                "duration": duration,
-                "transcript": transcript,
-            })
-        except Exception as e:
-            logger.error("Erro ao enviar webhook call.ended", error=str(e))
+        # Dispatch webhook event (only for calls that actually started)
+        if handler:
+            try:
+                from services.webhook_service import dispatch_event
+                await dispatch_event("call.ended", {
+                    "call_id": call_id,
+                    "duration": duration,
+                    "transcript": transcript,
+                })
+            except Exception as e:
+                logger.error("Erro ao enviar webhook call.ended", error=str(e))
 
         # Cleanup
         if handler:
             await handler.stop()
         if call_id and call_id in active_calls:
             del active_calls[call_id]
+        if admitted:
+            # Libera a vaga (e a passa ao primeiro da fila de discagem)
+            from services.capacity_service import release_slot
+            release_slot(call_id)
         logger.info("Chamada finalizada", call_id=call_id)
+        clear_call_context()
 
 
 # Serve static files and SPA fallback
@@ -399,8 +522,10 @@ def main():
         app,
         host=host,
         port=port,
-        log_level="info",
+        log_level=settings.LOG_LEVEL.lower(),
         access_log=False,
+        # Em modo json os logs do uvicorn passam pelo mesmo handler
+        log_config=None if settings.LOG_FORMAT == "json" else uvicorn.config.LOGGING_CONFIG,
     )
 
 
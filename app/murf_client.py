@@ -18,36 +18,152 @@ logger = structlog.get_logger(__name__)
 MURF_API_BASE = "https://api.murf.ai/v1"
 
 
+# === Sessão HTTP compartilhada ===
+#
+# Todas as instâncias de MurfClient (chamadas, fillers, greetings, jobs)
+# usam uma única sessão aiohttp: um connector com cache de DNS, keep-alive e
+# limite de conexões simultâneas. Fechada no shutdown (close_tts_session).
+
+_session: Optional[aiohttp.ClientSession] = None
+_sessions_created = 0
+
+
+def get_tts_session() -> aiohttp.ClientSession:
+    """Sessão HTTP compartilhada do TTS, criada na primeira utilização"""
+    global _session, _sessions_created
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=settings.MURF_HTTP_MAX_CONNECTIONS,
+            ttl_dns_cache=300,
+            keepalive_timeout=settings.MURF_HTTP_KEEPALIVE_S,
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+        _sessions_created += 1
+    return _session
+
+
+async def close_tts_session():
+    """Fecha a sessão compartilhada e suas conexões (shutdown)"""
+    global _session
+    if _session and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+# === Hedging ===
+#
+# Se a primeira tentativa não produzir áudio dentro do prazo, uma segunda
+# requisição é disparada; vence a primeira que terminar com áudio e a outra
+# é cancelada. Os contadores mantêm o custo extra visível.
+
+_hedge_stats = {
+    "requests": 0,
+    "hedged": 0,
+    "primary_wins": 0,
+    "hedge_wins": 0,
+    "failed": 0,
+}
+
+
+async def hedged_text_to_speech(
+    primary: "MurfClient",
+    text: str,
+    hedge_after_ms: float,
+    secondary: Optional["MurfClient"] = None,
+) -> Optional[bytes]:
+    """
+    TTS com requisição de reserva (hedge).
+
+    Args:
+        primary: Cliente da primeira tentativa
+        hedge_after_ms: Prazo para a primeira tentativa; 0 = sem hedge
+        secondary: Cliente da segunda tentativa (ex: outra voz); padrão = primary
+
+    Returns:
+        Áudio da tentativa que terminar primeiro, ou None se ambas falharem
+    """
+    _hedge_stats["requests"] += 1
+    first = asyncio.create_task(primary.text_to_speech(text))
+    if hedge_after_ms <= 0:
+        return await first
+
+    try:
+        done, _ = await asyncio.wait({first}, timeout=hedge_after_ms / 1000)
+    except asyncio.CancelledError:
+        first.cancel()
+        raise
+
+    if done and first.result():
+        _hedge_stats["primary_wins"] += 1
+        return first.result()
+
+    # Lenta (ou falhou rápido): dispara a reserva
+    _hedge_stats["hedged"] += 1
+    logger.info(
+        "TTS lento, disparando requisição de reserva",
+        hedge_after_ms=hedge_after_ms,
+        primary_failed=bool(done)
+    )
+    second = asyncio.create_task((secondary or primary).text_to_speech(text))
+    pending = {second} if done else {first, second}
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                audio = task.result()
+                if audio:
+                    _hedge_stats["primary_wins" if task is first else "hedge_wins"] += 1
+                    return audio
+        _hedge_stats["failed"] += 1
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def get_tts_http_stats() -> dict:
+    """Sessões criadas desde a startup (deve ser 1) e conexões abertas"""
+    # _conns / _acquired: conexões ociosas e em uso do connector
+    connector = _session.connector if _session and not _session.closed else None
+    return {
+        "sessions_created": _sessions_created,
+        "open": connector is not None,
+        "connections_idle": sum(len(c) for c in connector._conns.values()) if connector else 0,
+        "connections_acquired": len(connector._acquired) if connector else 0,
+        "connections_limit": connector.limit if connector else settings.MURF_HTTP_MAX_CONNECTIONS,
+        "hedge": {
+            **_hedge_stats,
+            "hedge_rate": round(_hedge_stats["hedged"] / _hedge_stats["requests"], 4)
+            if _hedge_stats["requests"] else 0.0,
+        },
+    }
+
+
 class MurfClient:
     """
     Cliente para conversão de texto em fala usando Murf AI
 
     Gera áudio natural em português brasileiro e converte
-    para formato compatível com telefonia (8kHz, mono, 16-bit PCM)
+    para formato compatível com telefonia (8kHz ou 16kHz, mono, 16-bit PCM)
     """
 
-    def __init__(self):
+    def __init__(self, sample_rate: int = settings.SAMPLE_RATE):
         self.api_key = settings.MURF_API_KEY
         self.voice_id = settings.MURF_VOICE_ID
         self.style = settings.MURF_STYLE
-        self.session: Optional[aiohttp.ClientSession] = None
-
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Retorna sessão HTTP, criando se necessário"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers={
-                    "api-key": self.api_key,
-                    "Content-Type": "application/json",
-                    "Accept": "application/json"
-                }
-            )
-        return self.session
+        # Taxa da saída (PCM da chamada): 8000 ou 16000
+        self.sample_rate = sample_rate
+
+    def _headers(self) -> dict:
+        return {
+            "api-key": self.api_key,
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
 
     async def close(self):
-        """Fecha a sessão HTTP"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Libera o cliente (a sessão HTTP é compartilhada e continua aberta)"""
 
     async def text_to_speech(self, text: str) -> Optional[bytes]:
         """
@@ -57,13 +173,13 @@ class MurfClient:
             text: Texto para converter
 
         Returns:
-            Bytes de áudio em formato PCM 8kHz mono 16-bit
+            Bytes de áudio em formato PCM mono 16-bit na taxa do cliente (8kHz ou 16kHz)
         """
         if not text.strip():
             return None
 
         try:
-            session = await self._get_session()
+            session = get_tts_session()
 
             # Preparar payload para Murf API
             payload = {
@@ -88,6 +204,7 @@ class MurfClient:
             async with session.post(
                 f"{MURF_API_BASE}/speech/generate",
                 json=payload,
+                headers=self._headers(),
                 timeout=aiohttp.ClientTimeout(total=30)
             ) as response:
                 if response.status != 200:
@@ -126,7 +243,7 @@ class MurfClient:
     async def _download_audio(self, url: str) -> Optional[bytes]:
         """Baixa arquivo de áudio da URL"""
         try:
-            session = await self._get_session()
+            session = get_tts_session()
             async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
                 if response.status == 200:
                     return await response.read()
@@ -142,7 +259,7 @@ class MurfClient:
         Converte áudio para formato de telefonia
 
         Entrada: WAV 24kHz
-        Saída: PCM 8kHz mono 16-bit (formato para FreeSWITCH)
+        Saída: PCM mono 16-bit em self.sample_rate (formato para FreeSWITCH)
         """
         try:
             # Usar asyncio para não bloquear
@@ -166,8 +283,8 @@ class MurfClient:
             if audio.channels > 1:
                 audio = audio.set_channels(1)
 
-            # Converter sample rate para 8kHz (telefonia)
-            audio = audio.set_frame_rate(8000)
+            # Converter sample rate para a taxa da chamada (8kHz ou 16kHz)
+            audio = audio.set_frame_rate(self.sample_rate)
 
             # Garantir 16-bit
             audio = audio.set_sample_width(2)
@@ -184,11 +301,12 @@ class MurfClient:
     async def list_voices(self, language: str = "pt-BR") -> list[dict]:
         """Lista vozes disponíveis para um idioma"""
         try:
-            session = await self._get_session()
+            session = get_tts_session()
 
             async with session.get(
                 f"{MURF_API_BASE}/speech/voices",
-                params={"language": language}
+                params={"language": language},
+                headers=self._headers()
             ) as response:
                 if response.status == 200:
                     result = await response.json()
@@ -9,6 +9,7 @@ from .greeting_service import (
     generate_prompt_greeting,
     delete_prompt_greeting,
     get_greeting_for_call,
+    load_greetings,
 )
 
 __all__ = [
@@ -19,4 +20,5 @@ __all__ = [
     "generate_prompt_greeting",
     "delete_prompt_greeting",
     "get_greeting_for_call",
+    "load_greetings",
 ]
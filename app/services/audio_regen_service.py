@@ -0,0 +1,211 @@
+"""
+Bulk regeneration of pre-recorded audio
+
+Re-synthesizes every prompt's greeting, the global greeting and the filler
+set (fillers + holding phrase) - e.g. after changing the default voice or
+the Murf model. One job runs at a time:
+
+- TTS requests run at bounded concurrency (AUDIO_REGEN_CONCURRENCY).
+- Files are written to a temp file and renamed, so FreeSWITCH never plays
+  a half-written WAV.
+- Each unit (a prompt's greeting, the global greeting, the filler set)
+  swaps its in-memory registry entry only after all of its audio is ready;
+  if any clip fails, the unit keeps its previous audio.
+- Prompt greetings are rendered at the prompt's call sample rate; the global
+  greeting and the filler set at every rate in use (see audio_format).
+
+Progress is available from get_job_status() and broadcast to the dashboard.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+import structlog
+
+from audio_format import call_sample_rate
+from config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Unit keys in job["items"]
+ITEM_FILLERS = "fillers"
+ITEM_GLOBAL_GREETING = "global_greeting"
+
+_job: Optional[dict] = None
+_task: Optional[asyncio.Task] = None
+
+
+def _prompt_item(prompt_id: int) -> str:
+    return f"prompt:{prompt_id}"
+
+
+def get_job_status() -> Optional[dict]:
+    """Last (or current) regeneration job, None if none has run"""
+    return _job
+
+
+def _emit_progress():
+    from api.routes.dashboard import broadcaster
+
+    broadcaster.broadcast("audio_regen_progress", _job, coalesce_key="audio_regen")
+
+
+def _finish_item(key: str, ok: bool, error: Optional[str] = None):
+    _job["items"][key] = {"status": "completed" if ok else "failed", "error": error}
+    _job["completed" if ok else "failed"] += 1
+    _emit_progress()
+
+
+async def _run_job(include_prompts: bool, include_global: bool, include_fillers: bool):
+    from db.database import AsyncSessionLocal
+    from db import crud
+    from murf_client import MurfClient
+    from services import greeting_service
+    import call_handler
+
+    prompts = []
+    if include_prompts:
+        async with AsyncSessionLocal() as db:
+            prompts = [
+                p.to_dict() for p in await crud.get_prompts(db, limit=10000)
+                if p.greeting_text
+            ]
+
+    keys = [_prompt_item(p["id"]) for p in prompts]
+    if include_global:
+        keys.append(ITEM_GLOBAL_GREETING)
+    if include_fillers:
+        keys.append(ITEM_FILLERS)
+
+    _job["total"] = len(keys)
+    _job["items"] = {key: {"status": "pending", "error": None} for key in keys}
+    _emit_progress()
+
+    semaphore = asyncio.Semaphore(settings.AUDIO_REGEN_CONCURRENCY)
+
+    sample_rates = call_handler.get_asset_sample_rates()
+
+    async def synthesize(text: str, sample_rate: int, voice_id: Optional[str] = None) -> bytes:
+        murf = MurfClient(sample_rate)
+        if voice_id:
+            murf.voice_id = voice_id
+        async with semaphore:
+            audio_data = await murf.text_to_speech(text)
+        if not audio_data:
+            raise RuntimeError(f"TTS failed: {text[:50]}")
+        return audio_data
+
+    async def regenerate_prompt(prompt: dict):
+        key = _prompt_item(prompt["id"])
+        sample_rate = call_sample_rate(prompt)
+        try:
+            audio_data = await synthesize(prompt["greeting_text"], sample_rate, prompt["voice_id"])
+            duration_ms = await greeting_service.save_prompt_greeting(
+                prompt["id"], prompt["greeting_text"], prompt["voice_id"], audio_data, sample_rate
+            )
+            async with AsyncSessionLocal() as db:
+                await crud.update_prompt(db, prompt["id"], greeting_duration_ms=duration_ms)
+                await db.commit()
+        except Exception as e:
+            logger.warning("Greeting regeneration failed", prompt_id=prompt["id"], error=str(e))
+            _finish_item(key, False, str(e))
+            return
+        _finish_item(key, True)
+
+    async def regenerate_global_greeting():
+        entry = greeting_service.get_global_greeting()
+        text = (entry and entry["text"]) or call_handler.GREETING_TEXT
+        try:
+            clips = await asyncio.gather(*(synthesize(text, rate) for rate in sample_rates))
+            for rate, audio_data in zip(sample_rates, clips):
+                await call_handler.install_global_greeting(text, audio_data, rate)
+        except Exception as e:
+            logger.warning("Global greeting regeneration failed", error=str(e))
+            _finish_item(ITEM_GLOBAL_GREETING, False, str(e))
+            return
+        _finish_item(ITEM_GLOBAL_GREETING, True)
+
+    async def regenerate_fillers():
+        phrases = [*call_handler.FILLER_PHRASES, call_handler.HOLDING_PHRASE]
+        try:
+            clip_sets = await asyncio.gather(*(
+                asyncio.gather(*(synthesize(phrase, rate) for phrase in phrases))
+                for rate in sample_rates
+            ))
+            for rate, clips in zip(sample_rates, clip_sets):
+                await call_handler.install_filler_set(dict(zip(phrases, clips)), rate)
+        except Exception as e:
+            logger.warning("Filler regeneration failed", error=str(e))
+            _finish_item(ITEM_FILLERS, False, str(e))
+            return
+        _finish_item(ITEM_FILLERS, True)
+
+    units = [regenerate_prompt(p) for p in prompts]
+    if include_global:
+        units.append(regenerate_global_greeting())
+    if include_fillers:
+        units.append(regenerate_fillers())
+    await asyncio.gather(*units)
+
+
+async def _job_wrapper(include_prompts: bool, include_global: bool, include_fillers: bool):
+    global _task
+    try:
+        await _run_job(include_prompts, include_global, include_fillers)
+        _job["status"] = "completed"
+        logger.info(
+            "Audio regeneration finished",
+            total=_job["total"],
+            completed=_job["completed"],
+            failed=_job["failed"],
+        )
+    except asyncio.CancelledError:
+        _job["status"] = "cancelled"
+        raise
+    except Exception as e:
+        _job["status"] = "failed"
+        _job["error"] = str(e)
+        logger.exception("Audio regeneration failed", error=str(e))
+    finally:
+        _job["finished_at"] = datetime.utcnow().isoformat()
+        _task = None
+        _emit_progress()
+
+
+def start_regeneration_job(
+    include_prompts: bool = True,
+    include_global: bool = True,
+    include_fillers: bool = True,
+) -> Optional[dict]:
+    """
+    Start regenerating greetings and fillers in the background.
+
+    Returns:
+        The job status, or None if a job is already running
+    """
+    global _job, _task
+
+    if _task is not None:
+        return None
+
+    _job = {
+        "status": "running",
+        "started_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+        "total": 0,
+        "completed": 0,
+        "failed": 0,
+        "items": {},
+        "error": None,
+    }
+    _task = asyncio.create_task(_job_wrapper(include_prompts, include_global, include_fillers))
+    return _job
+
+
+async def stop_regeneration_job():
+    """Cancel a running job (shutdown)"""
+    task = _task
+    if task:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
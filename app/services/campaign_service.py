@@ -85,9 +85,9 @@ async def _run_campaign(campaign_id: int):
     """Main campaign execution loop"""
     from db.database import AsyncSessionLocal
     from db import crud
-    from services.dialer_service import initiate_call
+    from services.capacity_service import has_capacity, release_slot, try_reserve
+    from services.dialer_service import initiate_call, new_call_id
     from services.webhook_service import dispatch_event
-    from state import active_calls
 
     try:
         while True:
@@ -102,12 +102,10 @@ async def _run_campaign(campaign_id: int):
                     )
                     break
 
-                # Check global call limit
-                current_active = len(active_calls)
-                if current_active >= settings.MAX_CONCURRENT_CALLS:
+                # Check global call capacity (slots in use + queued dial requests)
+                if not has_capacity():
                     logger.debug(
                         "Max concurrent calls reached",
-                        active=current_active,
                         max=settings.MAX_CONCURRENT_CALLS
                     )
                     await asyncio.sleep(5)
@@ -153,25 +151,36 @@ async def _run_campaign(campaign_id: int):
                     })
                     break
 
-                # Mark contact as calling
-                await crud.update_campaign_contact(
-                    db, contact.id,
-                    status="calling",
-                    attempts=contact.attempts + 1,
-                    last_attempt_at=datetime.utcnow()
-                )
-                await db.commit()
+                # Take the slot before touching the contact: a dial request
+                # may have taken the last one since has_capacity()
+                call_id = new_call_id()
+                if not try_reserve(call_id):
+                    await asyncio.sleep(5)
+                    continue
 
-                # Get prompt config
-                prompt_config = None
-                if campaign.prompt_id:
-                    prompt = await crud.get_prompt(db, campaign.prompt_id)
-                    if prompt:
-                        prompt_config = prompt.to_dict()
+                try:
+                    # Mark contact as calling
+                    await crud.update_campaign_contact(
+                        db, contact.id,
+                        status="calling",
+                        attempts=contact.attempts + 1,
+                        last_attempt_at=datetime.utcnow()
+                    )
+                    await db.commit()
 
-                # Initiate call
+                    # Get prompt config
+                    prompt_config = None
+                    if campaign.prompt_id:
+                        prompt = await crud.get_prompt(db, campaign.prompt_id)
+                        if prompt:
+                            prompt_config = prompt.to_dict()
+                except Exception:
+                    release_slot(call_id)
+                    raise
+
+                # Initiate call (releases the slot itself if it fails)
                 try:
-                    call_id = await initiate_call(contact.phone_number, prompt_config)
+                    call_id = await initiate_call(contact.phone_number, prompt_config, call_id=call_id)
 
                     if call_id:
                         await crud.update_campaign_contact(
@@ -201,6 +210,7 @@ async def _run_campaign(campaign_id: int):
                         await db.commit()
 
                 except Exception as e:
+                    release_slot(call_id)
                     logger.exception(
                         "Error initiating campaign call",
                         contact_id=contact.id,
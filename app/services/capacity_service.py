@@ -0,0 +1,287 @@
+"""
+Capacity service - admission control for concurrent calls
+
+A single owner for the MAX_CONCURRENT_CALLS budget. A call holds a slot from
+the moment it is originated (dial route, campaigns, scheduler) or its inbound
+mod_audio_fork connection arrives, until it hangs up (the WebSocket closes).
+The slot is also released as soon as the originate job fails (busy, no
+answer, rejected). As a fallback, an originated call that never connects
+expires CALL_RING_TIMEOUT_S + CALL_CONNECT_GRACE_S after the originate, or
+CALL_CONNECT_GRACE_S after it was answered.
+
+Dial requests that find no free slot wait in a queue ordered by priority
+(higher first, arrival order within a priority) for up to
+CALL_QUEUE_TIMEOUT_S. A freed slot goes straight to the head of the queue,
+so nobody jumps it. With CALL_QUEUE_MAX requests already waiting, new ones
+are rejected at once. Campaigns, the scheduler and inbound calls never
+queue: they take a free slot or back off.
+"""
+
+import asyncio
+import bisect
+import itertools
+import time
+from typing import Dict, List, Optional
+
+import structlog
+
+from config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Slot states
+ORIGINATING = "originating"
+CONNECTED = "connected"
+
+# call_id -> slot
+_slots: Dict[str, dict] = {}
+
+# Waiting dial requests, ordered by (-priority, arrival)
+_queue: List["_Waiter"] = []
+_arrivals = itertools.count()
+
+stats = {
+    "admitted": 0,
+    "queued": 0,
+    "rejected": 0,
+    "queue_timeouts": 0,
+    "ring_timeouts": 0,
+    "originate_failures": 0,
+    "peak_in_use": 0,
+}
+
+
+class _Waiter:
+    """A dial request waiting for a slot"""
+
+    __slots__ = ("call_id", "priority", "order", "future", "enqueued_at")
+
+    def __init__(self, call_id: str, priority: int):
+        self.call_id = call_id
+        self.priority = priority
+        self.order = (-priority, next(_arrivals))
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return self.order < other.order
+
+
+def _free_slots() -> int:
+    return settings.MAX_CONCURRENT_CALLS - len(_slots)
+
+
+def _take_slot(call_id: str, direction: str):
+    state = CONNECTED if direction == "inbound" else ORIGINATING
+    slot = {
+        "direction": direction,
+        "state": state,
+        "reserved_at": time.time(),
+        "expiry": None,
+    }
+    if state == ORIGINATING:
+        slot["expiry"] = asyncio.get_running_loop().call_later(
+            settings.CALL_RING_TIMEOUT_S + settings.CALL_CONNECT_GRACE_S, _expire, call_id
+        )
+    _slots[call_id] = slot
+    stats["admitted"] += 1
+    stats["peak_in_use"] = max(stats["peak_in_use"], len(_slots))
+
+
+def _hand_off():
+    """Give freed slots to the head of the queue"""
+    while _queue and _free_slots() > 0:
+        waiter = _queue.pop(0)
+        if waiter.future.done():
+            continue
+        _take_slot(waiter.call_id, "outbound")
+        waiter.future.set_result(True)
+
+
+def _release_originating(call_id: str) -> bool:
+    """Free the slot of a call that never reached the WebSocket"""
+    slot = _slots.get(call_id)
+    if not slot or slot["state"] != ORIGINATING:
+        return False
+
+    from state import pending_call_configs, pending_call_numbers
+    pending_call_configs.pop(call_id, None)
+    pending_call_numbers.pop(call_id, None)
+
+    release_slot(call_id)
+    return True
+
+
+def _expire(call_id: str):
+    """Originated call never reached the WebSocket: free its slot"""
+    if _release_originating(call_id):
+        stats["ring_timeouts"] += 1
+        logger.info("Call slot released, call never connected", call_id=call_id)
+
+
+def originate_failed(call_id: str, cause: str):
+    """The originate job failed (busy, no answer, rejected): free the slot now"""
+    if _release_originating(call_id):
+        stats["originate_failures"] += 1
+        logger.info("Call slot released, originate failed", call_id=call_id, cause=cause)
+
+
+def originate_answered(call_id: str):
+    """Answered: the WebSocket now has CALL_CONNECT_GRACE_S to connect"""
+    slot = _slots.get(call_id)
+    if not slot or slot["state"] != ORIGINATING:
+        return
+    if slot["expiry"]:
+        slot["expiry"].cancel()
+    slot["expiry"] = asyncio.get_running_loop().call_later(
+        settings.CALL_CONNECT_GRACE_S, _expire, call_id
+    )
+
+
+def has_capacity() -> bool:
+    """A slot is free and no dial request is waiting for one"""
+    return _free_slots() > 0 and not _queue
+
+
+def try_reserve(call_id: str, direction: str = "outbound") -> bool:
+    """Reserve a slot only if one is free right now (campaigns, scheduler, inbound)"""
+    if not has_capacity():
+        stats["rejected"] += 1
+        return False
+    _take_slot(call_id, direction)
+    return True
+
+
+async def reserve(call_id: str, priority: int = 0, timeout: Optional[float] = None) -> dict:
+    """
+    Reserve a slot for an outbound call, waiting in the queue if needed.
+
+    Args:
+        call_id: Call the slot is for
+        priority: Higher goes first (0-9)
+        timeout: Max seconds in the queue (default CALL_QUEUE_TIMEOUT_S, 0 = don't wait)
+
+    Returns:
+        {"admitted", "reason", "queue_position", "queue_length", "waited_ms"}.
+        reason is "queue_full" or "timeout" when not admitted; queue_position
+        is where the request stood when it was turned away.
+    """
+    timeout = settings.CALL_QUEUE_TIMEOUT_S if timeout is None else timeout
+
+    if has_capacity():
+        _take_slot(call_id, "outbound")
+        return {
+            "admitted": True,
+            "reason": None,
+            "queue_position": None,
+            "queue_length": len(_queue),
+            "waited_ms": 0,
+        }
+
+    waiter = _Waiter(call_id, priority)
+    position = bisect.bisect(_queue, waiter) + 1
+
+    if timeout <= 0 or len(_queue) >= settings.CALL_QUEUE_MAX:
+        stats["rejected"] += 1
+        logger.warning(
+            "Dial request rejected, no call capacity",
+            call_id=call_id,
+            queue_position=position,
+            queue_length=len(_queue)
+        )
+        return {
+            "admitted": False,
+            "reason": "queue_full",
+            "queue_position": position,
+            "queue_length": len(_queue),
+            "waited_ms": 0,
+        }
+
+    _queue.insert(position - 1, waiter)
+    stats["queued"] += 1
+    logger.info("Dial request queued", call_id=call_id, priority=priority, queue_position=position)
+
+    try:
+        await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+        position = _queue.index(waiter) + 1 if waiter in _queue else position
+        if waiter in _queue:
+            _queue.remove(waiter)
+        if waiter.future.done() and not waiter.future.cancelled():
+            # Slot handed over right as we gave up: give it back
+            release_slot(call_id)
+        else:
+            waiter.future.cancel()
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        stats["queue_timeouts"] += 1
+        logger.warning("Dial request timed out in queue", call_id=call_id, queue_position=position)
+        return {
+            "admitted": False,
+            "reason": "timeout",
+            "queue_position": position,
+            "queue_length": len(_queue),
+            "waited_ms": round((time.monotonic() - waiter.enqueued_at) * 1000),
+        }
+
+    return {
+        "admitted": True,
+        "reason": None,
+        "queue_position": None,
+        "queue_length": len(_queue),
+        "waited_ms": round((time.monotonic() - waiter.enqueued_at) * 1000),
+    }
+
+
+def admit_connection(call_id: str) -> bool:
+    """
+    Admit a mod_audio_fork connection.
+
+    Outbound calls already hold the slot reserved at originate; anything else
+    is an inbound call and needs a free slot now.
+    """
+    slot = _slots.get(call_id)
+    if slot:
+        if slot["expiry"]:
+            slot["expiry"].cancel()
+            slot["expiry"] = None
+        slot["state"] = CONNECTED
+        return True
+    return try_reserve(call_id, direction="inbound")
+
+
+def release_slot(call_id: str):
+    """Free a call's slot (hangup, originate failure) and wake the queue"""
+    slot = _slots.pop(call_id, None)
+    if slot is None:
+        return
+    if slot["expiry"]:
+        slot["expiry"].cancel()
+    _hand_off()
+
+
+def get_capacity_status() -> dict:
+    """Slots in use, utilization and queue"""
+    now = time.monotonic()
+    in_use = len(_slots)
+    limit = settings.MAX_CONCURRENT_CALLS
+    return {
+        "max_concurrent_calls": limit,
+        "in_use": in_use,
+        "connected": sum(1 for s in _slots.values() if s["state"] == CONNECTED),
+        "originating": sum(1 for s in _slots.values() if s["state"] == ORIGINATING),
+        "inbound": sum(1 for s in _slots.values() if s["direction"] == "inbound"),
+        "utilization": round(in_use / limit, 4) if limit else 1.0,
+        "queue_length": len(_queue),
+        "queue_max": settings.CALL_QUEUE_MAX,
+        "queue": [
+            {
+                "position": i + 1,
+                "call_id": w.call_id,
+                "priority": w.priority,
+                "waited_ms": round((now - w.enqueued_at) * 1000),
+            }
+            for i, w in enumerate(_queue)
+        ],
+        **stats,
+    }
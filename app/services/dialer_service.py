@@ -4,10 +4,14 @@ Dialer service for initiating and managing calls via FreeSWITCH ESL
 
 import asyncio
 from typing import Optional
+from urllib.parse import unquote
 import uuid
 
 import structlog
 
+from audio_format import WIDEBAND, call_sample_rate
+from config import settings
+
 logger = structlog.get_logger(__name__)
 
 # FreeSWITCH ESL connection settings
@@ -15,36 +19,79 @@ ESL_HOST = "127.0.0.1"
 ESL_PORT = 8021
 ESL_PASSWORD = "ClueCon"
 
+# Default time budget for one ESL exchange; call-path commands pass the
+# remaining turn budget instead
+ESL_TIMEOUT_S = 10.0
+
 # SIP trunk settings (from dialplan)
 TECH_PREFIX = "1290#"
 GATEWAY = "ligai-trunk"
 
+# Originates whose job result is still being watched (keeps the tasks alive)
+_originate_jobs: set = set()
+
 
-async def _send_esl_command(command: str) -> tuple[bool, str]:
+async def _send_esl_command(command: str, timeout: float = ESL_TIMEOUT_S) -> tuple[bool, str]:
     """
     Send a command to FreeSWITCH via Event Socket Library.
 
+    Args:
+        command: ESL command line
+        timeout: Seconds for the whole exchange (connect, auth, reply)
+
     Returns:
         Tuple of (success, response_text)
     """
     try:
-        reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(ESL_HOST, ESL_PORT),
-            timeout=5.0
-        )
+        return await asyncio.wait_for(_esl_exchange(command), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.error("ESL command timeout", command=command, timeout=timeout)
+        return False, "Timeout"
+    except Exception as e:
+        logger.exception("ESL command failed", command=command, error=str(e))
+        return False, str(e)
 
-        # Read banner
-        await reader.readuntil(b"\n\n")
 
-        # Authenticate
-        writer.write(f"auth {ESL_PASSWORD}\n\n".encode())
-        await writer.drain()
-        auth_response = await reader.readuntil(b"\n\n")
+async def _esl_auth(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+    """Read the banner and authenticate"""
+    await reader.readuntil(b"\n\n")
 
-        if b"+OK" not in auth_response:
-            logger.error("ESL authentication failed")
-            writer.close()
-            await writer.wait_closed()
+    writer.write(f"auth {ESL_PASSWORD}\n\n".encode())
+    await writer.drain()
+    auth_response = await reader.readuntil(b"\n\n")
+
+    if b"+OK" not in auth_response:
+        logger.error("ESL authentication failed")
+        return False
+    return True
+
+
+def _parse_headers(text: str) -> dict:
+    """ESL header block to dict (event-plain values are URL-encoded)"""
+    headers = {}
+    for line in text.strip().split("\n"):
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip()] = unquote(value.strip())
+    return headers
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> tuple[dict, str]:
+    """Read one ESL frame: its headers and body (if Content-Length)"""
+    raw = await reader.readuntil(b"\n\n")
+    headers = _parse_headers(raw.decode("utf-8", errors="ignore"))
+    body = ""
+    content_length = int(headers.get("Content-Length", 0))
+    if content_length > 0:
+        body = (await reader.readexactly(content_length)).decode("utf-8", errors="ignore")
+    return headers, body
+
+
+async def _esl_exchange(command: str) -> tuple[bool, str]:
+    """Connect, authenticate, send one command and read its reply"""
+    reader, writer = await asyncio.open_connection(ESL_HOST, ESL_PORT)
+    try:
+        if not await _esl_auth(reader, writer):
             return False, "Authentication failed"
 
         # Send command
@@ -52,47 +99,109 @@ async def _send_esl_command(command: str) -> tuple[bool, str]:
         await writer.drain()
 
         # Read response header
-        response = await asyncio.wait_for(
-            reader.readuntil(b"\n\n"),
-            timeout=10.0
-        )
-
+        response = await reader.readuntil(b"\n\n")
         response_text = response.decode("utf-8", errors="ignore")
 
         # Check if there's a Content-Length header and read the body
-        if "Content-Length:" in response_text:
-            try:
-                for line in response_text.split("\n"):
-                    if line.startswith("Content-Length:"):
-                        content_length = int(line.split(":")[1].strip())
-                        if content_length > 0:
-                            body = await asyncio.wait_for(
-                                reader.read(content_length),
-                                timeout=5.0
-                            )
-                            response_text += body.decode("utf-8", errors="ignore")
-                        break
-            except Exception:
-                pass
-
-        writer.close()
-        await writer.wait_closed()
+        for line in response_text.split("\n"):
+            if line.startswith("Content-Length:"):
+                content_length = int(line.split(":")[1].strip())
+                if content_length > 0:
+                    body = await reader.readexactly(content_length)
+                    response_text += body.decode("utf-8", errors="ignore")
+                break
 
         success = "+OK" in response_text and "-ERR" not in response_text
 
         return success, response_text
 
-    except asyncio.TimeoutError:
-        logger.error("ESL command timeout", command=command)
-        return False, "Timeout"
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def _job_result(reader: asyncio.StreamReader, job_uuid: str) -> str:
+    """Wait for the BACKGROUND_JOB event of a bgapi job and return its result"""
+    while True:
+        headers, body = await _read_frame(reader)
+        if headers.get("Content-Type") != "text/event-plain":
+            continue
+        event_headers, _, result = body.partition("\n\n")
+        event = _parse_headers(event_headers)
+        if event.get("Event-Name") == "BACKGROUND_JOB" and event.get("Job-UUID") == job_uuid:
+            return result.strip()
+
+
+async def _originate_job(call_id: str, command: str, accepted: asyncio.Future):
+    """
+    Submit an originate as a background job and watch its result.
+
+    Sets accepted to (success, reply) once FreeSWITCH takes or refuses the
+    job, then keeps the connection until the job's BACKGROUND_JOB event
+    arrives: "+OK <uuid>" when answered, "-ERR <cause>" when the call failed
+    (USER_BUSY, NO_ANSWER, CALL_REJECTED...). A failure frees the capacity
+    slot right away instead of waiting for it to expire.
+    """
+    from services.capacity_service import originate_answered, originate_failed
+
+    writer = None
+    try:
+        reader, writer = await asyncio.open_connection(ESL_HOST, ESL_PORT)
+        if not await _esl_auth(reader, writer):
+            accepted.set_result((False, "Authentication failed"))
+            return
+
+        writer.write(b"event plain BACKGROUND_JOB\n\n")
+        await writer.drain()
+        await _read_frame(reader)
+
+        writer.write(f"{command}\n\n".encode())
+        await writer.drain()
+        headers, body = await _read_frame(reader)
+        reply = headers.get("Reply-Text", "") or body
+        job_uuid = headers.get("Job-UUID")
+
+        if not reply.startswith("+OK") or not job_uuid:
+            accepted.set_result((False, reply))
+            return
+        accepted.set_result((True, reply))
+
+        result = await asyncio.wait_for(
+            _job_result(reader, job_uuid),
+            timeout=settings.CALL_RING_TIMEOUT_S + settings.CALL_CONNECT_GRACE_S
+        )
+        if result.startswith("+OK"):
+            originate_answered(call_id)
+        else:
+            originate_failed(call_id, result.removeprefix("-ERR").strip() or result)
+
     except Exception as e:
-        logger.exception("ESL command failed", command=command, error=str(e))
-        return False, str(e)
+        if not accepted.done():
+            accepted.set_result((False, str(e)))
+        else:
+            # The slot still expires on its own
+            logger.warning("Originate result not received", call_id=call_id, error=str(e))
+    finally:
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+
+def new_call_id() -> str:
+    """Generate a unique call ID (also the FreeSWITCH origination UUID)"""
+    return f"call-{int(asyncio.get_event_loop().time())}-{uuid.uuid4().hex[:8]}"
 
 
 async def initiate_call(
     number: str,
-    prompt_config: Optional[dict] = None
+    prompt_config: Optional[dict] = None,
+    call_id: Optional[str] = None
 ) -> Optional[str]:
     """
     Initiate an outbound call to a phone number.
@@ -100,12 +209,20 @@ async def initiate_call(
     Args:
         number: Phone number to call (10-11 digits)
         prompt_config: Optional prompt configuration dict
+        call_id: Call ID whose capacity slot the caller already reserved
+            (capacity_service.reserve). Without it a free slot is taken
+            here, and the call fails if there is none.
 
     Returns:
         call_id if successful, None otherwise
     """
-    # Generate unique call ID
-    call_id = f"call-{int(asyncio.get_event_loop().time())}-{uuid.uuid4().hex[:8]}"
+    from services.capacity_service import release_slot, try_reserve
+
+    if call_id is None:
+        call_id = new_call_id()
+        if not try_reserve(call_id):
+            logger.warning("No call capacity available", number=number)
+            return None
 
     # Clean number (remove non-digits)
     clean_number = "".join(filter(str.isdigit, number))
@@ -113,43 +230,63 @@ async def initiate_call(
     # Accept 10-11 digits (local) or 12-13 digits (with country code 55)
     if len(clean_number) < 10 or len(clean_number) > 13:
         logger.error("Invalid phone number", number=number)
+        release_slot(call_id)
         return None
 
     # Add country code 55 if not present (10-11 digits = local number)
     if len(clean_number) <= 11:
         clean_number = "55" + clean_number
 
+    # Wideband calls fork L16 at 16 kHz and offer the wideband codecs first
+    # (^^: switches the list separator, commas split originate variables)
+    sample_rate = call_sample_rate(prompt_config)
+    codecs = ""
+    if sample_rate == WIDEBAND:
+        codecs = f"absolute_codec_string=^^:{settings.WIDEBAND_CODECS.replace(',', ':')},"
+
     # Build originate command with api_on_answer to connect audio_fork
-    # The metadata JSON will be passed to the WebSocket handler
-    metadata = f'{{\\"uuid\\":\\"{call_id}\\"}}'
+    # The metadata JSON will be passed to the WebSocket handler.
+    # originate_timeout bounds ringing; the job result (answered, busy, no
+    # answer) is watched by _originate_job.
+    metadata = f'{{\\"uuid\\":\\"{call_id}\\",\\"sample_rate\\":{sample_rate}}}'
 
     originate_cmd = (
         f"bgapi originate "
         f"{{origination_uuid={call_id},"
         f"ignore_early_media=true,"
-        f"api_on_answer='uuid_audio_fork {call_id} start ws://127.0.0.1:8000/ws/{call_id} mono 8000 {metadata}'}}"
+        f"originate_timeout={settings.CALL_RING_TIMEOUT_S},"
+        f"{codecs}"
+        f"api_on_answer='uuid_audio_fork {call_id} start ws://127.0.0.1:8000/ws/{call_id} mono {sample_rate} {metadata}'}}"
         f"sofia/gateway/{GATEWAY}/{TECH_PREFIX}{clean_number} &park"
     )
 
-    logger.info("Initiating call", call_id=call_id, number=clean_number)
+    logger.info("Initiating call", call_id=call_id, number=clean_number, sample_rate=sample_rate)
 
-    success, response = await _send_esl_command(originate_cmd)
+    # Stored before the originate: a fast failure result clears them
+    from state import pending_call_configs, pending_call_numbers
+    if prompt_config:
+        pending_call_configs[call_id] = prompt_config
+    pending_call_numbers[call_id] = clean_number
 
-    if success:
-        logger.info("Call initiated successfully", call_id=call_id)
-
-        # Store prompt config for this call if provided
-        if prompt_config:
-            from state import pending_call_configs
-            pending_call_configs[call_id] = prompt_config
+    accepted = asyncio.get_running_loop().create_future()
+    task = asyncio.create_task(_originate_job(call_id, originate_cmd, accepted))
+    _originate_jobs.add(task)
+    task.add_done_callback(_originate_jobs.discard)
 
-        # Store the called number for this call
-        from state import pending_call_numbers
-        pending_call_numbers[call_id] = clean_number
+    try:
+        success, response = await asyncio.wait_for(asyncio.shield(accepted), timeout=ESL_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        task.cancel()
+        success, response = False, "Timeout"
 
+    if success:
+        logger.info("Call initiated successfully", call_id=call_id)
         return call_id
     else:
         logger.error("Failed to initiate call", call_id=call_id, response=response)
+        pending_call_configs.pop(call_id, None)
+        pending_call_numbers.pop(call_id, None)
+        release_slot(call_id)
         return None
 
 
@@ -177,6 +314,32 @@ async def hangup_call(freeswitch_uuid: str) -> bool:
     return success
 
 
+async def play_audio(freeswitch_uuid: str, file_path: str, timeout: float = ESL_TIMEOUT_S) -> bool:
+    """
+    Start playing an audio file on a channel (does not wait for it to finish).
+
+    Args:
+        freeswitch_uuid: The FreeSWITCH channel UUID
+        file_path: Audio file path as seen by FreeSWITCH
+        timeout: Seconds to wait for FreeSWITCH to accept the broadcast
+    """
+    success, response = await _send_esl_command(
+        f"api uuid_broadcast {freeswitch_uuid} {file_path} aleg",
+        timeout=timeout
+    )
+    if not success:
+        logger.warning("Failed to start playback", uuid=freeswitch_uuid, response=response)
+    return success
+
+
+async def break_playback(freeswitch_uuid: str, timeout: float = ESL_TIMEOUT_S) -> bool:
+    """Stop whatever is playing on a channel"""
+    success, response = await _send_esl_command(f"api uuid_break {freeswitch_uuid} all", timeout=timeout)
+    if not success:
+        logger.warning("Failed to break playback", uuid=freeswitch_uuid, response=response)
+    return success
+
+
 async def get_channel_status(freeswitch_uuid: str) -> Optional[dict]:
     """
     Get the status of a FreeSWITCH channel.
@@ -3,16 +3,28 @@ Serviço de Greeting por Prompt
 
 Gerencia áudios de greeting personalizados para cada prompt.
 Cada prompt pode ter seu próprio greeting pré-gravado.
+
+Os greetings prontos ficam num registro em memória (prompt_id -> arquivo,
+duração exata, texto, voz, taxa), carregado do disco na startup e atualizado
+por quem gera ou remove greetings. O caminho da chamada só consulta o registro.
+
+Cada prompt tem um greeting, gravado na taxa das suas chamadas (8 kHz ou
+16 kHz, ver audio_format); o greeting global existe um por taxa.
 """
 
+import asyncio
 import json
 import os
+import re
+import tempfile
 import wave
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import structlog
 
+from audio_format import NARROWBAND, SUPPORTED_SAMPLE_RATES, asset_path, default_sample_rate, pcm_duration_ms
+from file_io import run_file_io
 from murf_client import MurfClient
 
 logger = structlog.get_logger(__name__)
@@ -26,18 +38,35 @@ GLOBAL_GREETING_FILE_APP = "/audio/greeting.wav"
 GLOBAL_GREETING_FILE_FS = "/var/lib/freeswitch/sounds/custom/greeting.wav"
 GLOBAL_GREETING_TEXT = "Olá! Bem-vindo ao atendimento. Como posso ajudar você hoje?"
 
+_PROMPT_WAV_RE = re.compile(r"^prompt_(\d+)(_\d+k)?\.wav$")
+
+# prompt_id -> greeting pronto
+_registry: Dict[int, dict] = {}
+
+# taxa -> greeting global pronto
+_global_registry: Dict[int, dict] = {}
+
+# prompt_id -> texto sendo gerado agora
+_inflight: Dict[int, str] = {}
+
+# (prompt_id, texto, taxa) já gerados em segundo plano a partir de uma
+# chamada: uma tentativa só, mesmo que falhe
+_background_attempted: set = set()
+_background_tasks: set = set()
+
 
-def get_prompt_greeting_paths(prompt_id: int) -> Tuple[str, str, str]:
+def get_prompt_greeting_paths(prompt_id: int, sample_rate: int = NARROWBAND) -> Tuple[str, str, str]:
     """Retorna os paths do greeting de um prompt.
 
     Args:
         prompt_id: ID do prompt
+        sample_rate: Taxa do áudio (8 kHz mantém o nome sem sufixo)
 
     Returns:
         Tuple de (path_app_wav, path_fs_wav, path_json)
     """
-    wav_filename = f"prompt_{prompt_id}.wav"
-    json_filename = f"prompt_{prompt_id}.json"
+    wav_filename = asset_path(f"prompt_{prompt_id}.wav", sample_rate)
+    json_filename = asset_path(f"prompt_{prompt_id}.json", sample_rate)
 
     path_app = os.path.join(GREETINGS_DIR_APP, wav_filename)
     path_fs = os.path.join(GREETINGS_DIR_FS, wav_filename)
@@ -46,6 +75,121 @@ def get_prompt_greeting_paths(prompt_id: int) -> Tuple[str, str, str]:
     return path_app, path_fs, path_json
 
 
+def get_global_greeting_paths(sample_rate: int = NARROWBAND) -> Tuple[str, str, str]:
+    """Paths do greeting global numa taxa: (path_app_wav, path_fs_wav, path_json)"""
+    path_app = asset_path(GLOBAL_GREETING_FILE_APP, sample_rate)
+    path_fs = asset_path(GLOBAL_GREETING_FILE_FS, sample_rate)
+    return path_app, path_fs, path_app.replace('.wav', '.json')
+
+
+def _registry_entry(
+    path_app: str,
+    path_fs: str,
+    duration_ms: float,
+    text: Optional[str],
+    voice_id: Optional[str],
+    created_at: Optional[str],
+    sample_rate: int
+) -> dict:
+    return {
+        "path_app": path_app,
+        "path_fs": path_fs,
+        "duration_ms": duration_ms,
+        "text": text,
+        "voice_id": voice_id,
+        "created_at": created_at,
+        "sample_rate": sample_rate,
+    }
+
+
+def _read_greeting(path_app: str, path_fs: str, path_json: str) -> Optional[dict]:
+    """Lê um greeting do disco (duração exata do header WAV + metadados JSON)"""
+    try:
+        with wave.open(path_app, 'rb') as wav_file:
+            sample_rate = wav_file.getframerate()
+            duration_ms = wav_file.getnframes() * 1000 / sample_rate
+    except (OSError, EOFError, wave.Error) as e:
+        logger.warning(f"Greeting ilegível: {path_app}", error=str(e))
+        return None
+
+    text = None
+    voice_id = None
+    if os.path.exists(path_json):
+        try:
+            with open(path_json, 'r') as f:
+                data = json.load(f)
+                text = data.get('text')
+                voice_id = data.get('voice_id')
+        except Exception as e:
+            logger.warning(f"Erro ao ler JSON do greeting: {e}")
+
+    created_at = datetime.fromtimestamp(os.path.getmtime(path_app)).isoformat()
+    return _registry_entry(path_app, path_fs, duration_ms, text, voice_id, created_at, sample_rate)
+
+
+def _scan_greetings() -> Tuple[Dict[int, dict], Dict[int, dict]]:
+    """Varre os greetings em disco: (por prompt, globais por taxa)"""
+    registry = {}
+    global_registry = {}
+
+    for sample_rate in SUPPORTED_SAMPLE_RATES:
+        path_app, path_fs, path_json = get_global_greeting_paths(sample_rate)
+        if os.path.exists(path_app):
+            entry = _read_greeting(path_app, path_fs, path_json)
+            if entry:
+                global_registry[sample_rate] = entry
+
+    if os.path.isdir(GREETINGS_DIR_APP):
+        for filename in os.listdir(GREETINGS_DIR_APP):
+            match = _PROMPT_WAV_RE.match(filename)
+            if not match:
+                continue
+            prompt_id = int(match.group(1))
+            path_app = os.path.join(GREETINGS_DIR_APP, filename)
+            path_json = path_app[:-len('.wav')] + '.json'
+            entry = _read_greeting(path_app, os.path.join(GREETINGS_DIR_FS, filename), path_json)
+            # Sobra de uma troca de taxa: vale o mais recente
+            current = registry.get(prompt_id)
+            if entry and (not current or entry["created_at"] > current["created_at"]):
+                registry[prompt_id] = entry
+
+    return registry, global_registry
+
+
+async def load_greetings() -> int:
+    """Carrega o registro de greetings do disco (startup)"""
+    registry, global_registry = await run_file_io(_scan_greetings)
+    _registry.clear()
+    _registry.update(registry)
+    _global_registry.clear()
+    _global_registry.update(global_registry)
+    logger.info(
+        "Greetings carregados",
+        prompts=len(registry),
+        global_rates=sorted(global_registry)
+    )
+    return len(registry) + len(global_registry)
+
+
+def get_global_greeting(sample_rate: Optional[int] = None) -> Optional[dict]:
+    """Greeting global pronto (registro) numa taxa (padrão = a do tronco) ou None"""
+    return _global_registry.get(sample_rate or default_sample_rate())
+
+
+def register_global_greeting(text: str, duration_ms: float, sample_rate: int = NARROWBAND):
+    """Atualiza o registro após gerar o greeting global numa taxa"""
+    path_app, path_fs, _ = get_global_greeting_paths(sample_rate)
+    _global_registry[sample_rate] = _registry_entry(
+        path_app,
+        path_fs,
+        duration_ms,
+        text,
+        None,
+        datetime.now().isoformat(),
+        sample_rate
+    )
+
+
 def get_prompt_greeting_info(prompt_id: int) -> dict:
     """Retorna informações do greeting de um prompt.
 
@@ -53,58 +197,132 @@ def get_prompt_greeting_info(prompt_id: int) -> dict:
         prompt_id: ID do prompt
 
     Returns:
-        Dict com info do greeting ou None se não existir
+        Dict com info do greeting (exists=False se não existir)
     """
-    path_app, path_fs, path_json = get_prompt_greeting_paths(prompt_id)
+    entry = _registry.get(prompt_id)
 
-    if not os.path.exists(path_app):
+    if not entry:
         return {
             "prompt_id": prompt_id,
             "exists": False,
             "text": None,
             "duration_ms": None,
+            "sample_rate": None,
             "created_at": None
         }
 
-    # Ler metadados do JSON
-    text = None
-    duration_ms = None
-    voice_id = None
+    return {
+        "prompt_id": prompt_id,
+        "exists": True,
+        "text": entry["text"],
+        "duration_ms": entry["duration_ms"],
+        "voice_id": entry["voice_id"],
+        "audio_file": entry["path_app"],
+        "sample_rate": entry["sample_rate"],
+        "created_at": entry["created_at"]
+    }
 
-    if os.path.exists(path_json):
+
+def write_wav_atomic(path: str, audio_data: bytes, sample_rate: int = NARROWBAND):
+    """Grava PCM 16-bit mono como WAV via arquivo temporário + rename.
+
+    O rename é atômico no mesmo diretório: o FreeSWITCH nunca lê um WAV pela metade.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".wav.tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            with wave.open(f, 'wb') as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(sample_rate)
+                wav_file.writeframes(audio_data)
+        os.replace(tmp_path, path)
+    except BaseException:
         try:
-            with open(path_json, 'r') as f:
-                data = json.load(f)
-                text = data.get('text')
-                duration_ms = data.get('duration_ms')
-                voice_id = data.get('voice_id')
-        except Exception as e:
-            logger.warning(f"Erro ao ler JSON do greeting: {e}")
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
-    # Se não tiver duração no JSON, calcular do arquivo
-    if duration_ms is None:
-        file_size = os.path.getsize(path_app)
-        duration_ms = (file_size - 44) / 16  # WAV header = 44 bytes, 8kHz 16-bit
 
-    created_at = None
-    mtime = os.path.getmtime(path_app)
-    created_at = datetime.fromtimestamp(mtime).isoformat()
+def write_json_atomic(path: str, data: dict):
+    """Grava JSON via arquivo temporário + rename (mesmo esquema do WAV)"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".json.tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
-    return {
-        "prompt_id": prompt_id,
-        "exists": True,
+
+def _remove_prompt_greeting_files(prompt_id: int, keep_rate: Optional[int] = None) -> bool:
+    """Remove os arquivos do greeting de um prompt em todas as taxas (menos keep_rate)"""
+    deleted = False
+    for sample_rate in SUPPORTED_SAMPLE_RATES:
+        if sample_rate == keep_rate:
+            continue
+        path_app, _, path_json = get_prompt_greeting_paths(prompt_id, sample_rate)
+        for path in [path_app, path_json]:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                    deleted = True
+                    logger.info(f"Arquivo de greeting removido: {path}")
+                except Exception as e:
+                    logger.warning(f"Erro ao remover {path}: {e}")
+    return deleted
+
+
+async def save_prompt_greeting(
+    prompt_id: int,
+    text: str,
+    voice_id: str,
+    audio_data: bytes,
+    sample_rate: int
+) -> float:
+    """Grava o greeting de um prompt (WAV + JSON, atômicos) e só então troca o registro.
+
+    O greeting de outra taxa, se houver, é removido depois da troca.
+
+    Returns:
+        Duração em ms
+    """
+    path_app, path_fs, path_json = get_prompt_greeting_paths(prompt_id, sample_rate)
+    duration_ms = pcm_duration_ms(audio_data, sample_rate)
+
+    metadata = {
         "text": text,
         "duration_ms": duration_ms,
         "voice_id": voice_id,
-        "audio_file": path_app,
-        "created_at": created_at
+        "sample_rate": sample_rate,
+        "generated_at": datetime.utcnow().isoformat()
     }
 
+    def write():
+        write_wav_atomic(path_app, audio_data, sample_rate)
+        write_json_atomic(path_json, metadata)
+
+    await run_file_io(write)
+
+    _registry[prompt_id] = _registry_entry(
+        path_app, path_fs, duration_ms, text, voice_id, datetime.now().isoformat(), sample_rate
+    )
+    await run_file_io(_remove_prompt_greeting_files, prompt_id, sample_rate)
+    return duration_ms
+
 
 async def generate_prompt_greeting(
     prompt_id: int,
     text: str,
-    voice_id: str = None
+    voice_id: str = None,
+    sample_rate: Optional[int] = None
 ) -> dict:
     """Gera áudio de greeting para um prompt.
 
@@ -112,17 +330,16 @@ async def generate_prompt_greeting(
         prompt_id: ID do prompt
         text: Texto do greeting
         voice_id: ID da voz (opcional, usa padrão se não fornecido)
+        sample_rate: Taxa das chamadas do prompt (opcional, usa a do tronco)
 
     Returns:
         Dict com resultado da geração
     """
-    # Criar diretório se não existir
-    os.makedirs(GREETINGS_DIR_APP, exist_ok=True)
-
-    path_app, path_fs, path_json = get_prompt_greeting_paths(prompt_id)
+    sample_rate = sample_rate or default_sample_rate()
+    _inflight[prompt_id] = text
 
     try:
-        murf = MurfClient()
+        murf = MurfClient(sample_rate)
 
         # Se voice_id fornecido, sobrescrever temporariamente
         if voice_id:
@@ -141,30 +358,12 @@ async def generate_prompt_greeting(
                 "message": "Falha ao gerar áudio TTS"
             }
 
-        # Salvar WAV
-        with wave.open(path_app, 'wb') as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(8000)
-            wav_file.writeframes(audio_data)
-
-        # Calcular duração
-        duration_ms = len(audio_data) / 16  # 8kHz 16-bit = 16 bytes/ms
-
-        # Salvar metadados JSON
-        metadata = {
-            "text": text,
-            "duration_ms": duration_ms,
-            "voice_id": voice_id or murf.voice_id,
-            "generated_at": datetime.utcnow().isoformat()
-        }
-
-        with open(path_json, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        duration_ms = await save_prompt_greeting(prompt_id, text, murf.voice_id, audio_data, sample_rate)
 
         logger.info(
             f"Greeting gerado para prompt {prompt_id}",
             duration_ms=duration_ms,
+            sample_rate=sample_rate,
             bytes=len(audio_data)
         )
 
@@ -173,7 +372,7 @@ async def generate_prompt_greeting(
             "prompt_id": prompt_id,
             "text": text,
             "duration_ms": duration_ms,
-            "voice_id": voice_id or murf.voice_id,
+            "voice_id": murf.voice_id,
             "message": "Greeting gerado com sucesso"
         }
 
@@ -186,10 +385,41 @@ async def generate_prompt_greeting(
             "duration_ms": 0,
             "message": f"Erro: {str(e)}"
         }
+    finally:
+        _inflight.pop(prompt_id, None)
+
+
+async def _generate_in_background(prompt_id: int, text: str, voice_id: Optional[str], sample_rate: int):
+    """Gera o greeting que faltou numa chamada e grava a duração no prompt"""
+    result = await generate_prompt_greeting(prompt_id, text, voice_id, sample_rate)
+    if not result["success"]:
+        return
+
+    from db.database import AsyncSessionLocal
+    from db import crud
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await crud.update_prompt(db, prompt_id, greeting_duration_ms=result["duration_ms"])
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Erro ao atualizar duração do greeting do prompt {prompt_id}", error=str(e))
+
+
+def _ensure_prompt_greeting(prompt_id: int, text: str, voice_id: Optional[str], sample_rate: int):
+    """Agenda (uma vez) a geração de um greeting ausente, sem bloquear a chamada"""
+    if prompt_id in _inflight or (prompt_id, text, sample_rate) in _background_attempted:
+        return
+    _background_attempted.add((prompt_id, text, sample_rate))
+
+    logger.info(f"Greeting do prompt {prompt_id} ausente, gerando em segundo plano", sample_rate=sample_rate)
+    task = asyncio.create_task(_generate_in_background(prompt_id, text, voice_id, sample_rate))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
 
-def delete_prompt_greeting(prompt_id: int) -> bool:
-    """Remove arquivos de greeting de um prompt.
+async def delete_prompt_greeting(prompt_id: int) -> bool:
+    """Remove arquivos de greeting de um prompt (no pool de file_io).
 
     Args:
         prompt_id: ID do prompt
@@ -197,75 +427,60 @@ def delete_prompt_greeting(prompt_id: int) -> bool:
     Returns:
         True se removido com sucesso, False caso contrário
     """
-    path_app, path_fs, path_json = get_prompt_greeting_paths(prompt_id)
-
-    deleted = False
-
-    for path in [path_app, path_json]:
-        if os.path.exists(path):
-            try:
-                os.remove(path)
-                deleted = True
-                logger.info(f"Arquivo de greeting removido: {path}")
-            except Exception as e:
-                logger.warning(f"Erro ao remover {path}: {e}")
-
-    return deleted
+    _registry.pop(prompt_id, None)
+    return await run_file_io(_remove_prompt_greeting_files, prompt_id)
 
 
-def get_greeting_for_call(prompt_config: Optional[dict]) -> Tuple[str, float, str]:
-    """Retorna o greeting apropriado para uma chamada.
+def get_greeting_for_call(
+    prompt_config: Optional[dict],
+    sample_rate: Optional[int] = None
+) -> Tuple[str, float, str]:
+    """Retorna o greeting apropriado para uma chamada (só consulta o registro).
 
     Lógica:
-    1. Se prompt tem greeting_text -> usa greeting do prompt
-    2. Senão -> usa greeting global
+    1. Se prompt tem greeting_text e o áudio está pronto -> usa greeting do prompt
+    2. Se o áudio do prompt falta (ou é de outro texto) -> gera em segundo plano
+       uma vez e, nesta chamada, usa o greeting global
+    3. Senão -> usa greeting global
+
+    Um greeting em outra taxa ainda serve (o FreeSWITCH reamostra no playback):
+    o do prompt é regenerado na taxa da chamada em segundo plano e o global
+    cai para qualquer taxa disponível.
 
     Args:
         prompt_config: Configuração do prompt (pode ser None)
+        sample_rate: Taxa da chamada (padrão = a do tronco)
 
     Returns:
-        Tuple de (path_fs, duration_ms, greeting_text)
+        Tuple de (path_fs, duration_ms, greeting_text); duration_ms = 0 se não
+        houver áudio pronto
     """
+    sample_rate = sample_rate or default_sample_rate()
+
     # Se tem prompt com greeting configurado
     if prompt_config and prompt_config.get("greeting_text"):
         prompt_id = prompt_config.get("id")
         if prompt_id:
-            path_app, path_fs, _ = get_prompt_greeting_paths(prompt_id)
-
-            # Verificar se o arquivo existe
-            if os.path.exists(path_app):
-                duration_ms = prompt_config.get("greeting_duration_ms", 0)
-
-                # Se não tiver duração, calcular do arquivo
-                if not duration_ms:
-                    file_size = os.path.getsize(path_app)
-                    duration_ms = (file_size - 44) / 16
+            greeting_text = prompt_config["greeting_text"]
+            entry = _registry.get(prompt_id)
 
+            # Greetings antigos não guardam o texto no JSON
+            if entry and entry["text"] in (None, greeting_text):
+                if entry["sample_rate"] != sample_rate:
+                    _ensure_prompt_greeting(prompt_id, greeting_text, prompt_config.get("voice_id"), sample_rate)
                 logger.debug(
                     f"Usando greeting do prompt {prompt_id}",
-                    duration_ms=duration_ms
+                    duration_ms=entry["duration_ms"]
                 )
+                return entry["path_fs"], entry["duration_ms"], greeting_text
 
-                return path_fs, duration_ms, prompt_config["greeting_text"]
-
-    # Fallback: usar greeting global
-    global_duration_ms = 0
-    global_text = GLOBAL_GREETING_TEXT
-
-    if os.path.exists(GLOBAL_GREETING_FILE_APP):
-        file_size = os.path.getsize(GLOBAL_GREETING_FILE_APP)
-        global_duration_ms = (file_size - 44) / 16
-
-        # Tentar ler texto do JSON global
-        json_file = GLOBAL_GREETING_FILE_APP.replace('.wav', '.json')
-        if os.path.exists(json_file):
-            try:
-                with open(json_file, 'r') as f:
-                    data = json.load(f)
-                    global_text = data.get('text', GLOBAL_GREETING_TEXT)
-            except Exception:
-                pass
+            _ensure_prompt_greeting(prompt_id, greeting_text, prompt_config.get("voice_id"), sample_rate)
 
-    logger.debug("Usando greeting global", duration_ms=global_duration_ms)
+    # Fallback: usar greeting global (na taxa da chamada, senão em qualquer uma)
+    entry = _global_registry.get(sample_rate) or next(iter(_global_registry.values()), None)
+    if entry:
+        logger.debug("Usando greeting global", duration_ms=entry["duration_ms"])
+        return entry["path_fs"], entry["duration_ms"], entry["text"] or GLOBAL_GREETING_TEXT
 
-    return GLOBAL_GREETING_FILE_FS, global_duration_ms, global_text
+    logger.debug("Greeting global não disponível")
+    return GLOBAL_GREETING_FILE_FS, 0, GLOBAL_GREETING_TEXT
@@ -0,0 +1,391 @@
+"""
+Pre-rendering service - offline TTS of each prompt's frequent sentences
+
+A per-prompt job mines the most frequent assistant sentences from stored
+transcripts, adds the prompt's manual list (prompts.prerender_phrases) and
+synthesizes them with the prompt's voice (at the prompt's call sample rate)
+at bounded concurrency. The result
+is an audio asset index (one WAV per sentence + index.json per prompt).
+
+When a reply is made only of indexed sentences, the call plays the files
+straight from disk (no TTS). Coverage counters show how many spoken
+sentences were served pre-rendered.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import wave
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+
+from audio_format import NARROWBAND, call_sample_rate, pcm_duration_ms
+from config import settings
+from file_io import remove_quietly, run_file_io
+from services.greeting_service import write_json_atomic, write_wav_atomic
+from services.response_cache_service import normalize_utterance
+
+logger = structlog.get_logger(__name__)
+
+# Pre-rendered sentences (ligai-app path / FreeSWITCH path), one dir per prompt
+PRERENDER_DIR_APP = "/audio/prerendered"
+PRERENDER_DIR_FS = "/var/lib/freeswitch/sounds/custom/prerendered"
+
+# Sentences outside these bounds are not worth pre-rendering
+MIN_SENTENCE_CHARS = 8
+MAX_SENTENCE_CHARS = 300
+
+# prompt_id -> {"voice_id": str, "sample_rate": int, "assets": {normalized sentence: asset dict}}
+_index: Dict[int, dict] = {}
+
+# prompt_id -> last job status
+_jobs: Dict[int, dict] = {}
+_tasks: Dict[int, asyncio.Task] = {}
+
+# prompt_id -> spoken sentence counters by source
+_coverage: Dict[int, Counter] = {}
+
+# Sources counted by record_spoken()
+SOURCE_PRERENDERED = "prerendered"
+SOURCE_RESPONSE_CACHE = "response_cache"
+SOURCE_TTS = "tts"
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a reply into sentences (keeps the final punctuation)"""
+    return [s for s in re.split(r"(?<=[.!?…])\s+", text.strip()) if s]
+
+
+def _prompt_dirs(prompt_id: int) -> Tuple[str, str]:
+    name = f"prompt_{prompt_id}"
+    return os.path.join(PRERENDER_DIR_APP, name), os.path.join(PRERENDER_DIR_FS, name)
+
+
+def _asset_filename(voice_id: str, norm: str, sample_rate: int) -> str:
+    # Narrowband keeps the original naming, so existing renders are reused
+    key = f"{voice_id}|{norm}" if sample_rate == NARROWBAND else f"{voice_id}|{sample_rate}|{norm}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16] + ".wav"
+
+
+# === Lookup (call path) ===
+
+def lookup(
+    prompt_config: Optional[dict],
+    text: str,
+    sample_rate: int = NARROWBAND,
+) -> Optional[List[Tuple[str, str]]]:
+    """
+    Pre-rendered files for a reply, in order.
+
+    Returns None unless every sentence of the reply is in the prompt's index
+    (and the index was rendered with the prompt's current voice, at the
+    call's sample rate).
+    """
+    if not prompt_config or not prompt_config.get("id"):
+        return None
+
+    index = _index.get(prompt_config["id"])
+    if not index or index["voice_id"] != prompt_config.get("voice_id"):
+        return None
+    if index.get("sample_rate", NARROWBAND) != sample_rate:
+        return None
+
+    app_dir, fs_dir = _prompt_dirs(prompt_config["id"])
+    files = []
+    for sentence in split_sentences(text):
+        asset = index["assets"].get(normalize_utterance(sentence))
+        if asset is None:
+            return None
+        files.append((os.path.join(app_dir, asset["file"]), os.path.join(fs_dir, asset["file"])))
+
+    return files or None
+
+
+def record_spoken(prompt_id: Optional[int], text: str, source: str):
+    """Count the sentences of a spoken reply by how its audio was obtained"""
+    if not prompt_id:
+        return
+    counter = _coverage.get(prompt_id)
+    if counter is None:
+        counter = _coverage[prompt_id] = Counter()
+    sentences = len(split_sentences(text))
+    counter["sentences"] += sentences
+    counter[source] += sentences
+
+
+def get_coverage(prompt_id: int) -> dict:
+    """Spoken sentences since startup and the share served pre-rendered"""
+    counter = _coverage.get(prompt_id, Counter())
+    spoken = counter["sentences"]
+    return {
+        "spoken_sentences": spoken,
+        "prerendered": counter[SOURCE_PRERENDERED],
+        "response_cache": counter[SOURCE_RESPONSE_CACHE],
+        "tts": counter[SOURCE_TTS],
+        "coverage": round(counter[SOURCE_PRERENDERED] / spoken, 4) if spoken else 0.0,
+    }
+
+
+def get_prompt_prerender_info(prompt_id: int) -> dict:
+    """Index, coverage and last job of a prompt"""
+    index = _index.get(prompt_id) or {}
+    assets = sorted(
+        (index.get("assets") or {}).values(),
+        key=lambda a: a.get("count") or 0,
+        reverse=True,
+    )
+    return {
+        "prompt_id": prompt_id,
+        "voice_id": index.get("voice_id"),
+        "sample_rate": index.get("sample_rate", NARROWBAND) if index else None,
+        "generated_at": index.get("generated_at"),
+        "assets": assets,
+        "coverage": get_coverage(prompt_id),
+        "job": _jobs.get(prompt_id),
+    }
+
+
+# === Index on disk ===
+
+def _read_index(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _wav_duration_ms(path: str) -> Optional[float]:
+    """Exact duration from the WAV header; None if missing or unreadable"""
+    try:
+        with wave.open(path, "rb") as wav_file:
+            return wav_file.getnframes() * 1000 / wav_file.getframerate()
+    except (OSError, EOFError, wave.Error):
+        return None
+
+
+def _write_index(app_dir: str, index: dict, keep: set) -> None:
+    """Write index.json atomically and remove WAVs no longer referenced"""
+    write_json_atomic(os.path.join(app_dir, "index.json"), index)
+
+    for filename in os.listdir(app_dir):
+        if filename.endswith(".wav") and filename not in keep:
+            remove_quietly(os.path.join(app_dir, filename))
+
+
+def _scan_indexes() -> Dict[int, dict]:
+    indexes = {}
+    if not os.path.isdir(PRERENDER_DIR_APP):
+        return indexes
+    for name in os.listdir(PRERENDER_DIR_APP):
+        path = os.path.join(PRERENDER_DIR_APP, name, "index.json")
+        if not name.startswith("prompt_") or not os.path.exists(path):
+            continue
+        try:
+            indexes[int(name[len("prompt_"):])] = _read_index(path)
+        except (ValueError, OSError) as e:
+            logger.warning("Invalid pre-render index", path=path, error=str(e))
+    return indexes
+
+
+async def load_indexes() -> int:
+    """Load every prompt's asset index from disk (startup)"""
+    indexes = await run_file_io(_scan_indexes)
+    _index.clear()
+    _index.update(indexes)
+    logger.info("Pre-rendered indexes loaded", prompts=len(indexes))
+    return len(indexes)
+
+
+async def delete_prompt_assets(prompt_id: int) -> None:
+    """Remove a prompt's index and audio files"""
+    _index.pop(prompt_id, None)
+    _coverage.pop(prompt_id, None)
+    app_dir, _ = _prompt_dirs(prompt_id)
+    await run_file_io(lambda: shutil.rmtree(app_dir, ignore_errors=True))
+
+
+# === Job ===
+
+async def mine_frequent_sentences(
+    prompt_id: int,
+    days: int,
+    min_count: int,
+    limit: int,
+    exclude: Optional[set] = None,
+) -> List[Tuple[str, int]]:
+    """
+    Most frequent assistant sentences of a prompt's recent calls.
+
+    Frequency is the number of distinct calls in which the sentence was said.
+
+    Returns:
+        [(sentence, calls), ...] most frequent first
+    """
+    from db.database import AsyncSessionLocal
+    from db import crud
+
+    async with AsyncSessionLocal() as db:
+        rows = await crud.get_assistant_message_counts(
+            db, prompt_id, since=datetime.utcnow() - timedelta(days=days)
+        )
+
+    exclude = exclude or set()
+    counts: Counter = Counter()
+    original: Dict[str, str] = {}
+    for content, calls in rows:
+        for sentence in split_sentences(content):
+            norm = normalize_utterance(sentence)
+            if norm in exclude or not MIN_SENTENCE_CHARS <= len(sentence) <= MAX_SENTENCE_CHARS:
+                continue
+            counts[norm] += calls
+            original.setdefault(norm, sentence)
+
+    return [
+        (original[norm], count)
+        for norm, count in counts.most_common(limit)
+        if count >= min_count
+    ]
+
+
+async def _run_job(prompt_id: int, days: int, min_count: int, limit: int):
+    from db.database import AsyncSessionLocal
+    from db import crud
+    from murf_client import MurfClient
+
+    job = _jobs[prompt_id]
+
+    async with AsyncSessionLocal() as db:
+        prompt = await crud.get_prompt(db, prompt_id)
+        if not prompt:
+            raise ValueError("Prompt not found")
+        prompt_data = prompt.to_dict()
+
+    voice_id = prompt_data["voice_id"]
+    sample_rate = call_sample_rate(prompt_data)
+
+    # Manual list first, then mined sentences (the greeting already has its own audio)
+    wanted: Dict[str, dict] = {}
+    for phrase in prompt_data.get("prerender_phrases") or []:
+        for sentence in split_sentences(phrase):
+            wanted.setdefault(normalize_utterance(sentence), {"text": sentence, "source": "manual", "count": None})
+
+    exclude = {normalize_utterance(s) for s in split_sentences(prompt_data.get("greeting_text") or "")}
+    exclude.update(wanted)
+    for sentence, count in await mine_frequent_sentences(prompt_id, days, min_count, limit, exclude):
+        wanted[normalize_utterance(sentence)] = {"text": sentence, "source": "mined", "count": count}
+
+    job["total"] = len(wanted)
+    app_dir, _ = _prompt_dirs(prompt_id)
+    await run_file_io(lambda: os.makedirs(app_dir, exist_ok=True))
+
+    murf = MurfClient(sample_rate)
+    murf.voice_id = voice_id
+    semaphore = asyncio.Semaphore(settings.PRERENDER_CONCURRENCY)
+    assets: Dict[str, dict] = {}
+
+    async def render(norm: str, item: dict):
+        filename = _asset_filename(voice_id, norm, sample_rate)
+        path = os.path.join(app_dir, filename)
+
+        duration_ms = await run_file_io(_wav_duration_ms, path)
+        if duration_ms is not None:
+            job["reused"] += 1
+        else:
+            async with semaphore:
+                audio_data = await murf.text_to_speech(item["text"])
+            if not audio_data:
+                job["failed"] += 1
+                return
+            await run_file_io(write_wav_atomic, path, audio_data, sample_rate)
+            duration_ms = pcm_duration_ms(audio_data, sample_rate)
+            job["rendered"] += 1
+
+        assets[norm] = {**item, "file": filename, "duration_ms": duration_ms}
+
+    try:
+        await asyncio.gather(*(render(norm, item) for norm, item in wanted.items()))
+    finally:
+        await murf.close()
+
+    index = {
+        "voice_id": voice_id,
+        "sample_rate": sample_rate,
+        "generated_at": datetime.utcnow().isoformat(),
+        "assets": assets,
+    }
+    keep = {a["file"] for a in assets.values()}
+    await run_file_io(_write_index, app_dir, index, keep)
+    _index[prompt_id] = index
+
+
+async def _job_wrapper(prompt_id: int, days: int, min_count: int, limit: int):
+    job = _jobs[prompt_id]
+    try:
+        await _run_job(prompt_id, days, min_count, limit)
+        job["status"] = "completed"
+        logger.info(
+            "Pre-render job finished",
+            prompt_id=prompt_id,
+            total=job["total"],
+            rendered=job["rendered"],
+            reused=job["reused"],
+            failed=job["failed"],
+        )
+    except asyncio.CancelledError:
+        job["status"] = "cancelled"
+        raise
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+        logger.exception("Pre-render job failed", prompt_id=prompt_id, error=str(e))
+    finally:
+        job["finished_at"] = datetime.utcnow().isoformat()
+        _tasks.pop(prompt_id, None)
+
+
+def start_prerender_job(
+    prompt_id: int,
+    days: Optional[int] = None,
+    min_count: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Optional[dict]:
+    """
+    Start the pre-render job of a prompt in the background.
+
+    Returns:
+        The job status, or None if a job is already running for this prompt
+    """
+    if prompt_id in _tasks:
+        return None
+
+    job = {
+        "status": "running",
+        "started_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+        "total": 0,
+        "rendered": 0,
+        "reused": 0,
+        "failed": 0,
+        "error": None,
+    }
+    _jobs[prompt_id] = job
+    _tasks[prompt_id] = asyncio.create_task(_job_wrapper(
+        prompt_id,
+        days or settings.PRERENDER_MINE_DAYS,
+        min_count or settings.PRERENDER_MIN_COUNT,
+        limit or settings.PRERENDER_MAX_PHRASES,
+    ))
+    return job
+
+
+async def stop_prerender_jobs():
+    """Cancel running jobs (shutdown)"""
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
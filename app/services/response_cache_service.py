@@ -0,0 +1,296 @@
+"""
+Response cache service - reuses LLM answers (and their audio) for repeated questions
+
+Opt-in per prompt (prompts.response_cache_enabled). Entries are keyed by
+(prompt id, prompt version, normalized utterance, previous assistant turn,
+call sample rate),
+expire after the prompt's TTL and are evicted LRU when the cache is full.
+Each entry points to a pre-rendered WAV, so a hit skips both LLM and TTS.
+
+Rules (table response_cache_rules) override the cache per utterance:
+    pin    - answer is context-independent, never expires or is evicted
+             (optionally with a fixed response_text)
+    forbid - never cached (e.g. answers that depend on live data)
+"""
+
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+
+from audio_format import NARROWBAND
+from config import settings
+from file_io import remove_quietly, run_file_io
+from services.greeting_service import write_wav_atomic
+
+logger = structlog.get_logger(__name__)
+
+# Pre-rendered answers (ligai-app path / FreeSWITCH path)
+CACHE_DIR_APP = "/audio/cache"
+CACHE_DIR_FS = "/var/lib/freeswitch/sounds/custom/cache"
+
+
+class CachedResponse:
+    """A cached answer and its rendered audio (if any)"""
+
+    __slots__ = (
+        "prompt_id", "utterance", "text", "audio_path_app", "audio_path_fs",
+        "created_at", "expires_at", "hits", "pinned",
+    )
+
+    def __init__(self, prompt_id: int, utterance: str, text: str, ttl: Optional[int], pinned: bool):
+        now = time.time()
+        self.prompt_id = prompt_id
+        self.utterance = utterance
+        self.text = text
+        self.audio_path_app: Optional[str] = None
+        self.audio_path_fs: Optional[str] = None
+        self.created_at = now
+        self.expires_at = None if pinned or not ttl else now + ttl
+        self.hits = 0
+        self.pinned = pinned
+
+    def to_dict(self) -> dict:
+        return {
+            "utterance": self.utterance,
+            "text": self.text,
+            "has_audio": self.audio_path_app is not None,
+            "hits": self.hits,
+            "pinned": self.pinned,
+            "created_at": self.created_at,
+            "expires_at": self.expires_at,
+        }
+
+
+# key -> entry, oldest first (LRU)
+_entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+
+# (prompt_id, normalized utterance) -> {"id", "rule", "response_text"}
+_rules: Dict[Tuple[int, str], dict] = {}
+
+# prompt_id -> counters
+_stats: Dict[int, dict] = {}
+
+
+def normalize_utterance(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def is_enabled(prompt_config: Optional[dict]) -> bool:
+    return bool(prompt_config and prompt_config.get("id") and prompt_config.get("response_cache_enabled"))
+
+
+def _stats_for(prompt_id: int) -> dict:
+    stats = _stats.get(prompt_id)
+    if stats is None:
+        stats = _stats[prompt_id] = {"hits": 0, "misses": 0, "stores": 0, "forbidden": 0, "evictions": 0}
+    return stats
+
+
+def _key(prompt_config: dict, utterance: str, previous_assistant: Optional[str], sample_rate: int) -> tuple:
+    """Cache key; pinned utterances ignore the previous assistant turn"""
+    prompt_id = prompt_config["id"]
+    norm = normalize_utterance(utterance)
+    version = prompt_config.get("updated_at")
+    rule = _rules.get((prompt_id, norm))
+    if rule and rule["rule"] == "pin":
+        return (prompt_id, version, norm, None, sample_rate)
+    return (prompt_id, version, norm, normalize_utterance(previous_assistant or ""), sample_rate)
+
+
+def _audio_paths(key: tuple) -> Tuple[str, str]:
+    filename = hashlib.sha1(repr(key).encode()).hexdigest()[:20] + ".wav"
+    return os.path.join(CACHE_DIR_APP, filename), os.path.join(CACHE_DIR_FS, filename)
+
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        remove_quietly(path)
+
+
+def _discard(key: tuple) -> Optional[str]:
+    """Remove an entry, returning its audio file (to delete off the loop)"""
+    entry = _entries.pop(key, None)
+    return entry.audio_path_app if entry else None
+
+
+def _evict_for_space() -> List[str]:
+    """Evict least recently used (non-pinned) entries until there is room"""
+    paths = []
+    while len(_entries) >= settings.RESPONSE_CACHE_MAX_ENTRIES:
+        victim = next((k for k, e in _entries.items() if not e.pinned), None)
+        if victim is None:
+            break
+        _stats_for(victim[0])["evictions"] += 1
+        path = _discard(victim)
+        if path:
+            paths.append(path)
+    return paths
+
+
+def lookup(
+    prompt_config: Optional[dict],
+    utterance: str,
+    previous_assistant: Optional[str],
+    sample_rate: int = NARROWBAND,
+) -> Optional[CachedResponse]:
+    """
+    Find a cached answer for this turn.
+
+    The returned entry may have no audio yet (pinned text not rendered);
+    the caller then synthesizes it and calls store() to attach the audio.
+    """
+    if not is_enabled(prompt_config):
+        return None
+
+    prompt_id = prompt_config["id"]
+    stats = _stats_for(prompt_id)
+    rule = _rules.get((prompt_id, normalize_utterance(utterance)))
+
+    if rule and rule["rule"] == "forbid":
+        stats["forbidden"] += 1
+        return None
+
+    key = _key(prompt_config, utterance, previous_assistant, sample_rate)
+    entry = _entries.get(key)
+
+    if entry is None and rule and rule.get("response_text"):
+        entry = CachedResponse(prompt_id, utterance, rule["response_text"], None, pinned=True)
+        _entries[key] = entry
+
+    if entry and entry.expires_at is not None and entry.expires_at < time.time():
+        path = _discard(key)
+        if path:
+            run_file_io(_remove_files, [path])
+        entry = None
+
+    if entry is None:
+        stats["misses"] += 1
+        return None
+
+    _entries.move_to_end(key)
+    entry.hits += 1
+    stats["hits"] += 1
+    return entry
+
+
+async def store(
+    prompt_config: Optional[dict],
+    utterance: str,
+    previous_assistant: Optional[str],
+    text: str,
+    audio_data: Optional[bytes],
+    sample_rate: int = NARROWBAND,
+) -> None:
+    """Cache an answer and render its audio to disk (file I/O runs in the file I/O pool)
+
+    Audio is keyed by the call's sample rate: a wideband call never gets a
+    narrowband rendering (and vice versa).
+    """
+    if not is_enabled(prompt_config) or not text:
+        return
+
+    prompt_id = prompt_config["id"]
+    rule = _rules.get((prompt_id, normalize_utterance(utterance)))
+    if rule and rule["rule"] == "forbid":
+        return
+
+    key = _key(prompt_config, utterance, previous_assistant, sample_rate)
+    entry = _entries.get(key)
+    if entry and entry.audio_path_app:
+        return
+
+    stale = []
+    if entry is None:
+        stale = _evict_for_space()
+        ttl = prompt_config.get("response_cache_ttl_seconds") or settings.RESPONSE_CACHE_TTL_SECONDS
+        entry = CachedResponse(prompt_id, utterance, text, ttl, pinned=bool(rule))
+        _entries[key] = entry
+        _stats_for(prompt_id)["stores"] += 1
+
+    try:
+        if stale:
+            await run_file_io(_remove_files, stale)
+        if audio_data:
+            path_app, path_fs = _audio_paths(key)
+            await run_file_io(write_wav_atomic, path_app, audio_data, sample_rate)
+            # Entry may have been evicted meanwhile
+            if _entries.get(key) is entry:
+                entry.audio_path_app, entry.audio_path_fs = path_app, path_fs
+            else:
+                await run_file_io(_remove_files, [path_app])
+    except Exception as e:
+        logger.exception("Error storing cached response audio", prompt_id=prompt_id, error=str(e))
+
+
+async def clear_prompt(prompt_id: int) -> int:
+    """Drop all cached answers of a prompt (e.g. after it is edited)"""
+    keys = [k for k in _entries if k[0] == prompt_id]
+    paths = [p for p in (_discard(k) for k in keys) if p]
+    if paths:
+        await run_file_io(_remove_files, paths)
+    return len(keys)
+
+
+def get_prompt_cache_info(prompt_id: int) -> dict:
+    """Counters, hit rate and current entries of a prompt"""
+    stats = dict(_stats_for(prompt_id))
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+
+    entries = [e.to_dict() for k, e in _entries.items() if k[0] == prompt_id]
+    entries.sort(key=lambda e: e["hits"], reverse=True)
+    return {"stats": stats, "entries": entries}
+
+
+# === Rules ===
+
+async def _discard_utterance(prompt_id: int, norm: str) -> None:
+    paths = [
+        p for p in (_discard(k) for k in [k for k in _entries if k[0] == prompt_id and k[2] == norm])
+        if p
+    ]
+    if paths:
+        await run_file_io(_remove_files, paths)
+
+
+async def apply_rule(rule) -> None:
+    """Apply a ResponseCacheRule (pin/forbid) to the in-memory cache"""
+    norm = normalize_utterance(rule.utterance)
+    _rules[(rule.prompt_id, norm)] = {
+        "id": rule.id,
+        "rule": rule.rule,
+        "response_text": rule.response_text,
+    }
+    # Answers cached before the rule no longer apply
+    await _discard_utterance(rule.prompt_id, norm)
+
+
+async def remove_rule(prompt_id: int, utterance: str) -> None:
+    norm = normalize_utterance(utterance)
+    _rules.pop((prompt_id, norm), None)
+    await _discard_utterance(prompt_id, norm)
+
+
+async def load_rules() -> int:
+    """Load pin/forbid rules from the database (startup)"""
+    from db.database import AsyncSessionLocal
+    from db import crud
+
+    async with AsyncSessionLocal() as db:
+        rules = await crud.get_response_cache_rules(db)
+
+    _rules.clear()
+    for rule in rules:
+        await apply_rule(rule)
+    logger.info("Response cache rules loaded", rules=len(rules))
+    return len(rules)
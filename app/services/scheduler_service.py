@@ -8,10 +8,13 @@ from typing import Optional
 
 import structlog
 
-from config import settings
+from logging_config import LogThrottle
 
 logger = structlog.get_logger(__name__)
 
+# Skipped calls repeat on every poll while the limit is reached
+_limit_log = LogThrottle(60.0)
+
 # Control flags
 _scheduler_running = False
 _scheduler_task: Optional[asyncio.Task] = None
@@ -61,9 +64,9 @@ async def _process_due_calls():
     """Process all calls that are due"""
     from db.database import AsyncSessionLocal
     from db import crud
-    from services.dialer_service import initiate_call
+    from services.capacity_service import release_slot, try_reserve
+    from services.dialer_service import initiate_call, new_call_id
     from services.webhook_service import dispatch_event
-    from state import active_calls
 
     async with AsyncSessionLocal() as db:
         # Get calls due in the next minute
@@ -73,32 +76,42 @@ async def _process_due_calls():
         )
 
         for scheduled_call in due_calls:
-            # Check concurrent call limit
-            if len(active_calls) >= settings.MAX_CONCURRENT_CALLS:
-                logger.warning(
-                    "Max concurrent calls reached, skipping scheduled call",
-                    scheduled_id=scheduled_call.id
-                )
+            # Take a call slot before touching the schedule: without one the
+            # call stays pending and is retried on the next pass
+            call_id = new_call_id()
+            if not try_reserve(call_id):
+                suppressed = _limit_log.allow()
+                if suppressed is not None:
+                    logger.warning(
+                        "Max concurrent calls reached, skipping scheduled call",
+                        scheduled_id=scheduled_call.id,
+                        suppressed=suppressed
+                    )
                 continue
 
-            # Mark as executing
-            await crud.update_scheduled_call(
-                db, scheduled_call.id, status="executing"
-            )
-            await db.commit()
-
-            # Get prompt config
-            prompt_config = None
-            if scheduled_call.prompt_id:
-                prompt = await crud.get_prompt(db, scheduled_call.prompt_id)
-                if prompt:
-                    prompt_config = prompt.to_dict()
-
-            # Initiate the call
+            try:
+                # Mark as executing
+                await crud.update_scheduled_call(
+                    db, scheduled_call.id, status="executing"
+                )
+                await db.commit()
+
+                # Get prompt config
+                prompt_config = None
+                if scheduled_call.prompt_id:
+                    prompt = await crud.get_prompt(db, scheduled_call.prompt_id)
+                    if prompt:
+                        prompt_config = prompt.to_dict()
+            except Exception:
+                release_slot(call_id)
+                raise
+
+            # Initiate the call (releases the slot itself if it fails)
             try:
                 call_id = await initiate_call(
                     scheduled_call.phone_number,
-                    prompt_config
+                    prompt_config,
+                    call_id=call_id
                 )
 
                 if call_id:
@@ -123,6 +136,7 @@ async def _process_due_calls():
                     )
 
             except Exception as e:
+                release_slot(call_id)
                 await crud.update_scheduled_call(
                     db, scheduled_call.id,
                     status="failed"
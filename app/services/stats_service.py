@@ -0,0 +1,90 @@
+"""
+Stats service - cached call statistics snapshot
+
+The snapshot is loaded from the database once (single aggregate query) and
+then updated incrementally when calls start or end. It is periodically
+reloaded to correct any drift (calls deleted via API, crashes, etc).
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Reload from the database after this many seconds
+STATS_REFRESH_SECONDS = 300
+
+# Raw counters (see crud.get_call_stats_totals)
+_totals: Optional[dict] = None
+_loaded_at = 0.0
+_load_lock = asyncio.Lock()
+
+
+async def _load() -> None:
+    """Load counters from the database (one query)"""
+    global _totals, _loaded_at
+    from db.database import AsyncSessionLocal
+    from db import crud
+
+    async with AsyncSessionLocal() as db:
+        _totals = await crud.get_call_stats_totals(db)
+    _loaded_at = time.monotonic()
+
+
+async def get_stats_snapshot() -> dict:
+    """
+    Return call statistics from the cached snapshot.
+
+    Only the first call (or the first after STATS_REFRESH_SECONDS / invalidate)
+    hits the database; concurrent callers wait for the same load.
+    """
+    from db import crud
+
+    if _totals is None or time.monotonic() - _loaded_at > STATS_REFRESH_SECONDS:
+        async with _load_lock:
+            if _totals is None or time.monotonic() - _loaded_at > STATS_REFRESH_SECONDS:
+                await _load()
+
+    return crud.format_call_stats(_totals)
+
+
+def invalidate_stats() -> None:
+    """Force a reload on next access"""
+    global _totals
+    _totals = None
+
+
+def record_call_started() -> None:
+    """Update snapshot for a new call record (status=active)"""
+    if _totals is None:
+        return
+    _totals["total"] += 1
+    _totals["active"] += 1
+
+
+def record_call_ended(duration_seconds: Optional[float]) -> None:
+    """Update snapshot for a call moved from active to completed"""
+    if _totals is None:
+        return
+    _totals["active"] = max(0, _totals["active"] - 1)
+    _totals["completed"] += 1
+    if duration_seconds is not None:
+        _totals["duration_sum"] += duration_seconds
+        _totals["duration_count"] += 1
+
+
+def publish_stats() -> None:
+    """Push the current snapshot to dashboard clients (non-blocking)"""
+    if _totals is None:
+        return
+
+    from db import crud
+    from api.routes.dashboard import broadcaster
+    from state import active_calls
+
+    stats = crud.format_call_stats(_totals)
+    stats["active_calls"] = len(active_calls)
+    broadcaster.broadcast("stats_updated", stats, coalesce_key="stats")
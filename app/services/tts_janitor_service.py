@@ -0,0 +1,124 @@
+"""
+TTS janitor service - removes orphaned tts_*.wav files from the audio dir
+
+Each response is written to /audio/tts_<id>.wav and removed right after its
+playback. A crash, a cancelled turn or a failed removal leaves the file
+behind; this worker sweeps files older than TTS_ORPHAN_MAX_AGE_S (well past
+any playback) at startup and then every TTS_JANITOR_INTERVAL_S. Leftover
+temp files of interrupted atomic writes (.*.wav.tmp) are swept too.
+
+The sweep runs in the file I/O pool, never on the event loop.
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+import structlog
+
+from config import settings
+from file_io import run_file_io
+
+logger = structlog.get_logger(__name__)
+
+# Same directory call_handler writes responses to
+AUDIO_TMP_DIR_APP = "/audio"
+
+# Control flags
+_janitor_running = False
+_janitor_task: Optional[asyncio.Task] = None
+
+stats = {
+    "sweeps": 0,
+    "removed": 0,
+    "last_sweep_at": None,
+}
+
+
+def _is_orphan_candidate(name: str) -> bool:
+    return (name.startswith("tts_") and name.endswith(".wav")) or (
+        name.startswith(".") and name.endswith(".wav.tmp")
+    )
+
+
+def sweep_orphans(directory: str = AUDIO_TMP_DIR_APP, max_age_s: Optional[float] = None) -> int:
+    """Remove tts_*.wav files older than max_age_s (blocking, run it in the pool)
+
+    Returns:
+        Number of files removed
+    """
+    max_age_s = settings.TTS_ORPHAN_MAX_AGE_S if max_age_s is None else max_age_s
+    cutoff = time.time() - max_age_s
+    removed = 0
+
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return 0
+
+    with entries:
+        for entry in entries:
+            if not _is_orphan_candidate(entry.name):
+                continue
+            try:
+                if not entry.is_file() or entry.stat().st_mtime >= cutoff:
+                    continue
+                os.remove(entry.path)
+                removed += 1
+            except OSError:
+                # Removed by its own playback meanwhile
+                continue
+
+    return removed
+
+
+async def run_sweep() -> int:
+    """Sweep orphaned TTS files off the event loop"""
+    removed = await run_file_io(sweep_orphans)
+    stats["sweeps"] += 1
+    stats["removed"] += removed
+    stats["last_sweep_at"] = time.time()
+    if removed:
+        logger.info("Orphaned TTS files removed", removed=removed)
+    return removed
+
+
+async def start_tts_janitor():
+    """Start the orphaned TTS file sweeper"""
+    global _janitor_running, _janitor_task
+
+    if _janitor_running:
+        logger.warning("TTS janitor already running")
+        return
+
+    _janitor_running = True
+    _janitor_task = asyncio.create_task(_janitor_loop())
+    logger.info("TTS janitor started")
+
+
+async def stop_tts_janitor():
+    """Stop the orphaned TTS file sweeper"""
+    global _janitor_running, _janitor_task
+
+    _janitor_running = False
+    if _janitor_task:
+        _janitor_task.cancel()
+        try:
+            await _janitor_task
+        except asyncio.CancelledError:
+            pass
+        _janitor_task = None
+
+    logger.info("TTS janitor stopped")
+
+
+async def _janitor_loop():
+    """Main loop - sweeps at startup and then every TTS_JANITOR_INTERVAL_S"""
+    while _janitor_running:
+        try:
+            await run_sweep()
+        except Exception as e:
+            logger.exception("Error in TTS janitor loop", error=str(e))
+
+        await asyncio.sleep(settings.TTS_JANITOR_INTERVAL_S)
@@ -0,0 +1,275 @@
+"""
+Webhook retention service - manages time partitions of webhook_logs/webhook_events
+
+Both tables are range-partitioned by created_at (monthly or daily, see
+settings.WEBHOOK_LOG_PARTITION). Upcoming partitions are created ahead of
+time and partitions older than the retention window are dropped whole,
+instead of deleting rows.
+
+Existing partitions are read with their actual bounds, so switching
+WEBHOOK_LOG_PARTITION only fills the ranges not covered yet (e.g. after
+month -> day, days inside an existing month partition are skipped).
+"""
+
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import structlog
+from sqlalchemy import text
+
+from config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Partitioned tables (parents)
+PARTITIONED_TABLES = ("webhook_events", "webhook_logs")
+
+# How many periods ahead to keep partitions ready
+PARTITION_LOOKAHEAD = 3
+
+# Maintenance interval (seconds)
+MAINTENANCE_INTERVAL = 3600
+
+# Control flags
+_retention_running = False
+_retention_task: Optional[asyncio.Task] = None
+
+
+def _interval() -> str:
+    return "day" if settings.WEBHOOK_LOG_PARTITION == "day" else "month"
+
+
+def _period_start(dt: datetime, interval: str) -> datetime:
+    """Start of the partition period containing dt"""
+    if interval == "day":
+        return datetime(dt.year, dt.month, dt.day)
+    return datetime(dt.year, dt.month, 1)
+
+
+def _next_period(start: datetime, interval: str) -> datetime:
+    """Start of the period following start"""
+    if interval == "day":
+        return start + timedelta(days=1)
+    if start.month == 12:
+        return datetime(start.year + 1, 1, 1)
+    return datetime(start.year, start.month + 1, 1)
+
+
+def _partition_name(table: str, start: datetime, interval: str) -> str:
+    suffix = start.strftime("%Y%m%d") if interval == "day" else start.strftime("%Y%m")
+    return f"{table}_p{suffix}"
+
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _parse_bound_value(value: str) -> datetime:
+    value = value.strip().strip("'")
+    if value.upper() == "MINVALUE":
+        return datetime.min
+    if value.upper() == "MAXVALUE":
+        return datetime.max
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+def _parse_partition_bound(bound: Optional[str]) -> Optional[Tuple[datetime, datetime]]:
+    """(from, to) of a range partition bound expression; None for DEFAULT"""
+    match = _BOUND_RE.search(bound or "")
+    if not match:
+        return None
+    return _parse_bound_value(match.group(1)), _parse_bound_value(match.group(2))
+
+
+def _uncovered(start: datetime, end: datetime, ranges: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """Parts of [start, end) not covered by any of the given ranges"""
+    gaps = []
+    cursor = start
+    for low, high in sorted(r for r in ranges if r[1] > start and r[0] < end):
+        if low > cursor:
+            gaps.append((cursor, low))
+        cursor = max(cursor, high)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+async def _is_partitioned(conn, table: str) -> bool:
+    result = await conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :table"
+        ),
+        {"table": table},
+    )
+    return result.scalar() is not None
+
+
+async def _list_partitions(conn, table: str) -> List[Tuple[str, Optional[Tuple[datetime, datetime]]]]:
+    """Partitions of a table with their (from, to) bounds (None = DEFAULT partition)"""
+    result = await conn.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    return [(row[0], _parse_partition_bound(row[1])) for row in result.all()]
+
+
+async def ensure_partitions(conn, now: Optional[datetime] = None) -> int:
+    """
+    Create the current and upcoming partitions for all partitioned tables.
+
+    Only ranges not covered by an existing partition are created: after a
+    change of WEBHOOK_LOG_PARTITION the partial periods are filled with
+    partitions named after their first day. A partition that still cannot
+    be created (e.g. rows already in a DEFAULT partition) is logged and
+    skipped, never failing startup.
+
+    Args:
+        conn: AsyncConnection (inside a transaction)
+        now: Reference time (default: utcnow)
+
+    Returns:
+        Number of partitions created
+    """
+    interval = _interval()
+    now = now or datetime.utcnow()
+    created = 0
+
+    for table in PARTITIONED_TABLES:
+        if not await _is_partitioned(conn, table):
+            logger.warning(
+                "Table is not partitioned, run migrations/partition_webhook_logs.sql",
+                table=table
+            )
+            continue
+
+        partitions = await _list_partitions(conn, table)
+        names = {name for name, _ in partitions}
+        ranges = [bounds for _, bounds in partitions if bounds]
+        start = _period_start(now, interval)
+
+        for _ in range(PARTITION_LOOKAHEAD + 1):
+            end = _next_period(start, interval)
+
+            for gap_start, gap_end in _uncovered(start, end, ranges):
+                if (gap_start, gap_end) == (start, end):
+                    name = _partition_name(table, start, interval)
+                else:
+                    name = _partition_name(table, gap_start, "day")
+                if name in names:
+                    logger.warning(
+                        "Webhook partition name taken, range left uncovered",
+                        partition=name, start=gap_start.isoformat(), end=gap_end.isoformat()
+                    )
+                    continue
+
+                try:
+                    async with conn.begin_nested():
+                        await conn.execute(text(
+                            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                            f"FOR VALUES FROM ('{gap_start.isoformat()}') TO ('{gap_end.isoformat()}')"
+                        ))
+                except Exception as e:
+                    logger.error("Could not create webhook partition", partition=name, error=str(e))
+                    continue
+
+                names.add(name)
+                ranges.append((gap_start, gap_end))
+                created += 1
+                logger.info("Webhook partition created", partition=name)
+
+            start = end
+
+    return created
+
+
+async def drop_expired_partitions(conn, now: Optional[datetime] = None) -> List[str]:
+    """
+    Drop partitions whose whole range (actual bounds) is older than the
+    retention window.
+
+    Returns:
+        Names of the dropped partitions
+    """
+    retention_days = settings.WEBHOOK_LOG_RETENTION_DAYS
+    if retention_days <= 0:
+        return []
+
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=retention_days)
+    dropped = []
+
+    for table in PARTITIONED_TABLES:
+        if not await _is_partitioned(conn, table):
+            continue
+
+        for name, bounds in await _list_partitions(conn, table):
+            if bounds is None:
+                continue
+
+            if bounds[1] <= cutoff:
+                await conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                dropped.append(name)
+                logger.info("Webhook partition dropped", partition=name)
+
+    return dropped
+
+
+async def run_maintenance() -> dict:
+    """Create upcoming partitions and drop expired ones"""
+    from db.database import engine
+
+    async with engine.begin() as conn:
+        created = await ensure_partitions(conn)
+        dropped = await drop_expired_partitions(conn)
+
+    return {"created": created, "dropped": dropped}
+
+
+async def start_retention_worker():
+    """Start the partition maintenance background task"""
+    global _retention_running, _retention_task
+
+    if _retention_running:
+        logger.warning("Webhook retention worker already running")
+        return
+
+    _retention_running = True
+    _retention_task = asyncio.create_task(_retention_loop())
+    logger.info("Webhook retention worker started")
+
+
+async def stop_retention_worker():
+    """Stop the partition maintenance background task"""
+    global _retention_running, _retention_task
+
+    _retention_running = False
+    if _retention_task:
+        _retention_task.cancel()
+        try:
+            await _retention_task
+        except asyncio.CancelledError:
+            pass
+        _retention_task = None
+
+    logger.info("Webhook retention worker stopped")
+
+
+async def _retention_loop():
+    """Main loop - runs partition maintenance every hour"""
+    while _retention_running:
+        try:
+            await run_maintenance()
+        except Exception as e:
+            logger.exception("Error in webhook retention loop", error=str(e))
+
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
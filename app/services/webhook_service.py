@@ -6,12 +6,16 @@ import asyncio
 import hashlib
 import hmac
 import json
+import uuid
+import zlib
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 import aiohttp
 import structlog
 
+from config import settings
+
 logger = structlog.get_logger(__name__)
 
 # Supported events
@@ -27,6 +31,16 @@ MAX_RETRIES = 3
 RETRY_DELAYS = [1, 5, 15]  # Exponential backoff: 1s, 5s, 15s
 
 
+# Batch delivery
+BATCH_CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+# Pending batches per webhook config (batch delivery mode only)
+_batchers: Dict[int, "_WebhookBatcher"] = {}
+
+
 async def dispatch_event(event_type: str, payload: dict) -> None:
     """
     Dispatch event to all configured webhooks.
@@ -45,45 +59,64 @@ async def _dispatch_event_async(event_type: str, payload: dict) -> None:
             configs = await crud.get_active_webhook_configs(db, event_type)
 
             for config in configs:
-                asyncio.create_task(
-                    _send_webhook(
-                        config.id,
-                        config.url,
-                        config.secret,
-                        event_type,
-                        payload
+                # Each webhook gets its own event id so receivers can dedupe retries
+                event = _build_event(event_type, payload)
+
+                if config.delivery_mode == "batch":
+                    _get_batcher(config).add(event)
+                else:
+                    asyncio.create_task(
+                        _send_webhook(
+                            config.id,
+                            config.url,
+                            config.secret,
+                            event
+                        )
                     )
-                )
     except Exception as e:
         logger.exception("Error dispatching webhook event", error=str(e))
 
 
+def _build_event(event_type: str, payload: dict) -> dict:
+    """Build the event envelope sent to receivers"""
+    return {
+        "id": uuid.uuid4().hex,
+        "event": event_type,
+        "timestamp": datetime.utcnow().isoformat(),
+        "data": payload,
+    }
+
+
+def _sign(secret: str, body: str) -> str:
+    """HMAC-SHA256 signature header value for a request body"""
+    signature = hmac.new(
+        secret.encode(),
+        body.encode(),
+        hashlib.sha256
+    ).hexdigest()
+    return f"sha256={signature}"
+
+
 async def _send_webhook(
     config_id: int,
     url: str,
     secret: Optional[str],
-    event_type: str,
-    payload: dict,
+    event: dict,
     attempt: int = 1
 ) -> None:
     """Send webhook with retry logic"""
-    full_payload = {
-        "event": event_type,
-        "timestamp": datetime.utcnow().isoformat(),
-        "data": payload,
-    }
-    payload_json = json.dumps(full_payload, ensure_ascii=False)
+    event_type = event["event"]
+    payload_json = json.dumps(event, ensure_ascii=False)
 
-    headers = {"Content-Type": "application/json"}
+    headers = {
+        "Content-Type": "application/json",
+        "X-Webhook-Event": event_type,
+        "X-Webhook-Event-Id": event["id"],
+    }
 
     # Add HMAC signature if secret configured
     if secret:
-        signature = hmac.new(
-            secret.encode(),
-            payload_json.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        headers["X-Webhook-Signature"] = f"sha256={signature}"
+        headers["X-Webhook-Signature"] = _sign(secret, payload_json)
 
     try:
         async with aiohttp.ClientSession() as session:
@@ -98,7 +131,7 @@ async def _send_webhook(
 
                 # Log the attempt
                 await _log_webhook(
-                    config_id, event_type, payload_json,
+                    config_id, event, payload_json,
                     response.status, response_body, attempt, success
                 )
 
@@ -111,7 +144,7 @@ async def _send_webhook(
                     )
                     await asyncio.sleep(RETRY_DELAYS[attempt - 1])
                     await _send_webhook(
-                        config_id, url, secret, event_type, payload, attempt + 1
+                        config_id, url, secret, event, attempt + 1
                     )
                 elif success:
                     logger.info(
@@ -123,38 +156,252 @@ async def _send_webhook(
     except Exception as e:
         logger.error("Webhook request failed", url=url, error=str(e))
         await _log_webhook(
-            config_id, event_type, payload_json,
+            config_id, event, payload_json,
             None, None, attempt, False, str(e)
         )
 
         if attempt < MAX_RETRIES:
             await asyncio.sleep(RETRY_DELAYS[attempt - 1])
             await _send_webhook(
-                config_id, url, secret, event_type, payload, attempt + 1
+                config_id, url, secret, event, attempt + 1
+            )
+
+
+class _WebhookBatcher:
+    """
+    Accumulates events for one batch-mode webhook.
+
+    A batch is flushed when it reaches `batch_max_events` events or when
+    `batch_max_wait_ms` has passed since its first event, whichever comes first.
+    """
+
+    def __init__(self, config_id: int):
+        self.config_id = config_id
+        self.url = ""
+        self.secret: Optional[str] = None
+        self.batch_format = "json"
+        self.max_events = 50
+        self.max_wait_ms = 1000
+        self._events: List[dict] = []
+        self._timer: Optional[asyncio.Task] = None
+
+    def configure(self, config) -> None:
+        """Refresh delivery settings from the current webhook config"""
+        self.url = config.url
+        self.secret = config.secret
+        self.batch_format = config.batch_format if config.batch_format in BATCH_CONTENT_TYPES else "json"
+        self.max_events = max(1, config.batch_max_events or 50)
+        self.max_wait_ms = max(10, config.batch_max_wait_ms or 1000)
+
+    def add(self, event: dict) -> None:
+        """Queue an event, flushing if the batch is full"""
+        self._events.append(event)
+
+        if len(self._events) >= self.max_events:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_wait_ms / 1000)
+        self._timer = None
+        self.flush()
+
+    def flush(self) -> Optional[asyncio.Task]:
+        """Send pending events now. Returns the delivery task, if any."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._events:
+            return None
+
+        events, self._events = self._events, []
+        return asyncio.create_task(
+            _send_batch(
+                self.config_id,
+                self.url,
+                self.secret,
+                self.batch_format,
+                uuid.uuid4().hex,
+                events
+            )
+        )
+
+    def discard(self) -> int:
+        """Drop pending events without sending. Returns how many were dropped."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        discarded, self._events = len(self._events), []
+        return discarded
+
+
+def drop_webhook_batcher(config_id: int, flush: bool = True) -> Optional[asyncio.Task]:
+    """
+    Forget a webhook's batcher (webhook updated or deleted).
+
+    With flush, pending events go out with the settings they were queued
+    under; otherwise they are discarded. The next event builds a new
+    batcher from the current config, if it is still in batch mode.
+    """
+    batcher = _batchers.pop(config_id, None)
+    if batcher is None:
+        return None
+    if flush:
+        return batcher.flush()
+
+    discarded = batcher.discard()
+    if discarded:
+        logger.info("Pending webhook batch discarded", config_id=config_id, events=discarded)
+    return None
+
+
+def _get_batcher(config) -> _WebhookBatcher:
+    """Get (or create) the batcher for a webhook config"""
+    batcher = _batchers.get(config.id)
+    if batcher is None:
+        batcher = _WebhookBatcher(config.id)
+        _batchers[config.id] = batcher
+    batcher.configure(config)
+    return batcher
+
+
+def _encode_batch(events: List[dict], batch_format: str) -> str:
+    """Serialize a batch as a JSON array or NDJSON (one event per line)"""
+    if batch_format == "ndjson":
+        return "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+    return json.dumps(events, ensure_ascii=False)
+
+
+async def _send_batch(
+    config_id: int,
+    url: str,
+    secret: Optional[str],
+    batch_format: str,
+    batch_id: str,
+    events: List[dict],
+    attempt: int = 1
+) -> None:
+    """Send a batch of events in a single signed request, with retry logic"""
+    body = _encode_batch(events, batch_format)
+
+    headers = {
+        "Content-Type": BATCH_CONTENT_TYPES[batch_format],
+        "X-Webhook-Batch-Id": batch_id,
+        "X-Webhook-Batch-Size": str(len(events)),
+    }
+
+    if secret:
+        headers["X-Webhook-Signature"] = _sign(secret, body)
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                url,
+                data=body.encode(),
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                success = 200 <= response.status < 300
+                response_body = await response.text()
+
+                await _log_webhook_batch(
+                    config_id, batch_id, events,
+                    response.status, response_body, attempt, success
+                )
+
+                if not success and attempt < MAX_RETRIES:
+                    logger.warning(
+                        "Webhook batch failed, retrying",
+                        url=url,
+                        status=response.status,
+                        batch_id=batch_id,
+                        attempt=attempt
+                    )
+                    await asyncio.sleep(RETRY_DELAYS[attempt - 1])
+                    await _send_batch(
+                        config_id, url, secret, batch_format,
+                        batch_id, events, attempt + 1
+                    )
+                elif success:
+                    logger.info(
+                        "Webhook batch delivered successfully",
+                        url=url,
+                        batch_id=batch_id,
+                        batch_size=len(events)
+                    )
+
+    except Exception as e:
+        logger.error("Webhook batch request failed", url=url, batch_id=batch_id, error=str(e))
+        await _log_webhook_batch(
+            config_id, batch_id, events,
+            None, None, attempt, False, str(e)
+        )
+
+        if attempt < MAX_RETRIES:
+            await asyncio.sleep(RETRY_DELAYS[attempt - 1])
+            await _send_batch(
+                config_id, url, secret, batch_format,
+                batch_id, events, attempt + 1
             )
 
 
+async def flush_webhook_batches(timeout: float = 10.0) -> None:
+    """Flush all pending batches (called on shutdown)"""
+    tasks = [t for t in (b.flush() for b in _batchers.values()) if t]
+    if tasks:
+        logger.info("Flushing pending webhook batches", batches=len(tasks))
+        await asyncio.wait(tasks, timeout=timeout)
+
+
+def _event_record(config_id: int, event: dict, payload_json: str) -> dict:
+    """Build the webhook_events row for an event, compressing large payloads"""
+    raw = payload_json.encode("utf-8")
+    record = {
+        "id": event["id"],
+        "config_id": config_id,
+        "event_type": event["event"],
+        "payload_size": len(raw),
+    }
+
+    threshold = settings.WEBHOOK_PAYLOAD_COMPRESS_MIN_BYTES
+    if threshold > 0 and len(raw) >= threshold:
+        record["payload_compressed"] = zlib.compress(raw, 6)
+    else:
+        record["payload"] = payload_json
+
+    return record
+
+
 async def _log_webhook(
     config_id: int,
-    event_type: str,
-    payload: str,
+    event: dict,
+    payload_json: str,
     status_code: Optional[int],
     response_body: Optional[str],
     attempt: int,
     success: bool,
     error_message: Optional[str] = None
 ) -> None:
-    """Log webhook delivery attempt"""
+    """Log webhook delivery attempt.
+
+    The payload is stored once, on the first attempt; retries only reference it.
+    """
     from db.database import AsyncSessionLocal
     from db import crud
 
     try:
         async with AsyncSessionLocal() as db:
+            if attempt == 1:
+                await crud.create_webhook_events(
+                    db, [_event_record(config_id, event, payload_json)]
+                )
             await crud.create_webhook_log(
                 db,
                 config_id=config_id,
-                event_type=event_type,
-                payload=payload,
+                event_type=event["event"],
+                event_id=event["id"],
                 status_code=status_code,
                 response_body=response_body[:1000] if response_body else None,
                 attempt=attempt,
@@ -166,6 +413,49 @@ async def _log_webhook(
         logger.error("Failed to log webhook", error=str(e))
 
 
+async def _log_webhook_batch(
+    config_id: int,
+    batch_id: str,
+    events: List[dict],
+    status_code: Optional[int],
+    response_body: Optional[str],
+    attempt: int,
+    success: bool,
+    error_message: Optional[str] = None
+) -> None:
+    """Log a batch delivery attempt - one row per event, sharing the batch_id"""
+    from db.database import AsyncSessionLocal
+    from db import crud
+
+    response_body = response_body[:1000] if response_body else None
+
+    try:
+        async with AsyncSessionLocal() as db:
+            if attempt == 1:
+                await crud.create_webhook_events(db, [
+                    _event_record(config_id, event, json.dumps(event, ensure_ascii=False))
+                    for event in events
+                ])
+            await crud.create_webhook_logs_bulk(db, [
+                {
+                    "config_id": config_id,
+                    "event_type": event["event"],
+                    "event_id": event["id"],
+                    "batch_id": batch_id,
+                    "batch_size": len(events),
+                    "status_code": status_code,
+                    "response_body": response_body,
+                    "attempt": attempt,
+                    "success": success,
+                    "error_message": error_message,
+                }
+                for event in events
+            ])
+            await db.commit()
+    except Exception as e:
+        logger.error("Failed to log webhook batch", batch_id=batch_id, error=str(e))
+
+
 async def send_test_webhook(webhook_id: int) -> dict:
     """Send a test event to a webhook"""
     from db.database import AsyncSessionLocal
@@ -177,6 +467,7 @@ async def send_test_webhook(webhook_id: int) -> dict:
             return {"success": False, "message": "Webhook not found"}
 
     test_payload = {
+        "id": uuid.uuid4().hex,
         "event": "test",
         "timestamp": datetime.utcnow().isoformat(),
         "data": {
@@ -189,12 +480,7 @@ async def send_test_webhook(webhook_id: int) -> dict:
     headers = {"Content-Type": "application/json"}
 
     if config.secret:
-        signature = hmac.new(
-            config.secret.encode(),
-            payload_json.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        headers["X-Webhook-Signature"] = f"sha256={signature}"
+        headers["X-Webhook-Signature"] = _sign(config.secret, payload_json)
 
     try:
         async with aiohttp.ClientSession() as session:
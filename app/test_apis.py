@@ -12,7 +12,7 @@ from config import settings
 
 async def test_deepgram():
     """Testa conexão com Deepgram"""
-    print("\n[1/3] Testando Deepgram...")
+    print("\n[1/4] Testando Deepgram...")
 
     try:
         from deepgram import DeepgramClient
@@ -36,7 +36,7 @@ async def test_deepgram():
 
 async def test_murf():
     """Testa conexão com Murf AI"""
-    print("\n[2/3] Testando Murf AI...")
+    print("\n[2/4] Testando Murf AI...")
 
     try:
         import aiohttp
@@ -71,7 +71,7 @@ async def test_murf():
 
 async def test_openai():
     """Testa conexão com OpenAI"""
-    print("\n[3/3] Testando OpenAI...")
+    print("\n[3/4] Testando OpenAI...")
 
     try:
         from openai import AsyncOpenAI
@@ -96,6 +96,44 @@ async def test_openai():
         return False
 
 
+async def test_murf_session_leak():
+    """Verifica que os clientes Murf compartilham uma sessão e que ela fecha"""
+    print("\n[4/4] Testando sessão HTTP compartilhada do Murf...")
+
+    try:
+        import gc
+        import aiohttp
+        from murf_client import MurfClient, close_tts_session, get_tts_http_stats
+
+        # Vários clientes (como chamadas simultâneas) usando a API ao mesmo tempo
+        clients = [MurfClient() for _ in range(5)]
+        await asyncio.gather(*(c.list_voices() for c in clients))
+        for client in clients:
+            await client.close()
+
+        stats = get_tts_http_stats()
+        if stats["sessions_created"] != 1:
+            print(f"  ✗ Sessões Murf: {stats['sessions_created']} criadas (esperado 1)")
+            return False
+
+        await close_tts_session()
+        gc.collect()
+        leaked = [
+            obj for obj in gc.get_objects()
+            if isinstance(obj, aiohttp.ClientSession) and not obj.closed
+        ]
+        if leaked:
+            print(f"  ✗ Sessões Murf: {len(leaked)} sessão(ões) aiohttp aberta(s) após o shutdown")
+            return False
+
+        print("  ✓ Sessões Murf: 1 sessão compartilhada, fechada no shutdown")
+        return True
+
+    except Exception as e:
+        print(f"  ✗ Sessões Murf: Erro - {e}")
+        return False
+
+
 async def main():
     print("=" * 50)
     print("   LigAI - Teste de APIs")
@@ -111,11 +149,14 @@ async def main():
         sys.exit(1)
 
     # Executar testes
-    results = await asyncio.gather(
+    results = list(await asyncio.gather(
         test_deepgram(),
         test_murf(),
         test_openai()
-    )
+    ))
+
+    # Depois dos demais: verifica as sessões abertas ao final
+    results.append(await test_murf_session_leak())
 
     # Resumo
     print("\n" + "=" * 50)
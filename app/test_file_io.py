@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+LigAI - Teste: I/O de arquivo do caminho da chamada fora do event loop
+
+Roda os métodos de áudio do CallHandler com os.remove, os.makedirs,
+os.replace e wave.open instrumentados e falha se algum deles rodar na
+thread do event loop (deve passar pelo pool de file_io).
+
+    cd app && python -m unittest test_file_io
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+import wave
+from contextlib import ExitStack
+from unittest import mock
+
+import call_handler
+import file_io
+from call_handler import CallHandler
+
+SAMPLE_RATE = 8000
+PCM = b"\x00\x01" * 800  # 100 ms
+
+
+class LoopThreadGuard:
+    """Instrumenta funções de arquivo e anota as chamadas feitas na thread do loop"""
+
+    GUARDED = [
+        (os, "remove"),
+        (os, "makedirs"),
+        (os, "replace"),
+        (wave, "open"),
+    ]
+
+    def __init__(self):
+        self.loop_thread = threading.get_ident()
+        self.calls: list[str] = []
+        self.on_loop: list[str] = []
+
+    def _wrap(self, name: str, func):
+        def guarded(*args, **kwargs):
+            self.calls.append(name)
+            if threading.get_ident() == self.loop_thread:
+                self.on_loop.append(name)
+            return func(*args, **kwargs)
+        return guarded
+
+    def install(self, stack: ExitStack):
+        for module, attr in self.GUARDED:
+            name = f"{module.__name__}.{attr}"
+            stack.enter_context(mock.patch.object(module, attr, self._wrap(name, getattr(module, attr))))
+
+
+def _write_wav(path: str):
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(PCM)
+
+
+class CallPathFileIOTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.handler = CallHandler.__new__(CallHandler)
+        self.handler.call_id = "test-call"
+        self.handler.freeswitch_uuid = "test-uuid"
+        self.handler.sample_rate = SAMPLE_RATE
+        self.handler.recorder = None
+
+        self.stack = ExitStack()
+        self.addCleanup(self.stack.close)
+        self.play_audio = self.stack.enter_context(
+            mock.patch("services.dialer_service.play_audio", mock.AsyncMock(return_value=True))
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        file_io.shutdown_file_io()
+
+    def assertOffLoop(self, guard: LoopThreadGuard, expected: str):
+        self.assertIn(expected, guard.calls)
+        self.assertEqual(guard.on_loop, [], f"I/O bloqueante no event loop: {guard.on_loop}")
+
+    async def test_guard_detects_io_on_loop(self):
+        guard = LoopThreadGuard()
+        path = os.path.join(self.tmp.name, "x.wav")
+        _write_wav(path)
+        with ExitStack() as stack:
+            guard.install(stack)
+            os.remove(path)
+        self.assertEqual(guard.on_loop, ["os.remove"])
+
+    async def test_save_audio_file(self):
+        audio_dir = os.path.join(self.tmp.name, "audio")
+        self.stack.enter_context(mock.patch.object(call_handler, "AUDIO_TMP_DIR_APP", audio_dir))
+
+        guard = LoopThreadGuard()
+        with ExitStack() as stack:
+            guard.install(stack)
+            path_app, _ = await self.handler._save_audio_file(PCM)
+
+        self.assertTrue(path_app and os.path.exists(path_app))
+        self.assertOffLoop(guard, "wave.open")
+        self.assertOffLoop(guard, "os.makedirs")
+
+    async def test_play_cached_audio(self):
+        files = []
+        for i in range(2):
+            path = os.path.join(self.tmp.name, f"cached_{i}.wav")
+            _write_wav(path)
+            files.append((path, f"/fs/cached_{i}.wav"))
+
+        guard = LoopThreadGuard()
+        with ExitStack() as stack:
+            guard.install(stack)
+            await self.handler._play_cached_audio(files)
+
+        self.play_audio.assert_awaited_once()
+        self.assertOffLoop(guard, "wave.open")
+
+    async def test_play_audio_file_cleanup(self):
+        path = os.path.join(self.tmp.name, "tts_test.wav")
+        _write_wav(path)
+
+        guard = LoopThreadGuard()
+        with ExitStack() as stack:
+            guard.install(stack)
+            await self.handler._play_audio_file(path, "/fs/tts_test.wav", len(PCM))
+            # Remoção é disparada sem await: espera o pool terminar
+            for _ in range(200):
+                if not os.path.exists(path):
+                    break
+                await asyncio.sleep(0.01)
+
+        self.assertFalse(os.path.exists(path))
+        self.assertOffLoop(guard, "os.remove")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Orçamento de latência de um turno da conversa
+
+Um TurnDeadline nasce quando a fala do usuário termina (VAD local) ou quando
+o final do Deepgram chega, e acompanha o turno até o início do playback da
+resposta. Cada etapa (STT, LLM, TTS, playback) consulta o tempo restante para
+escolher seu prazo e, se preciso, um caminho degradado (áudio em cache,
+resposta mais curta, modelo de fallback); no fim do turno o resumo diz quanto
+cada etapa levou e quais estouraram o que tinham.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from config import settings
+
+
+class TurnDeadline:
+    """
+    Prazo de um turno (monotonic) e registro das etapas
+
+    Args:
+        budget_ms: Orçamento total do turno
+        started: Início do turno (time.monotonic); padrão = agora
+    """
+
+    def __init__(self, budget_ms: float = settings.TURN_BUDGET_MS, started: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self.started = started if started is not None else time.monotonic()
+        self.deadline = self.started + budget_ms / 1000
+
+        # etapa -> duração (ms), na ordem em que terminaram
+        self.stages: dict[str, int] = {}
+        # Etapas que passaram do tempo que tinham
+        self.overruns: list[str] = []
+        # Caminhos degradados escolhidos, ex: "llm:short_reply"
+        self.degraded: list[str] = []
+        # Duração até o início do playback da resposta (finish)
+        self.total_ms: Optional[int] = None
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def remaining_ms(self, reserve_ms: float = 0) -> float:
+        """Tempo restante, descontada a reserva das etapas seguintes (>= 0)"""
+        return max((self.deadline - time.monotonic()) * 1000 - reserve_ms, 0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def timeout_s(self, reserve_ms: float = 0, minimum_ms: float = settings.TURN_STAGE_MIN_MS) -> float:
+        """Prazo para uma etapa, em segundos, nunca abaixo do piso"""
+        return max(self.remaining_ms(reserve_ms), minimum_ms) / 1000
+
+    def record(self, name: str, started: float, allotted_ms: float):
+        """Registra uma etapa que começou em `started` e tinha `allotted_ms`"""
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self.stages[name] = round(elapsed_ms)
+        if elapsed_ms > allotted_ms:
+            self.overruns.append(name)
+
+    @contextmanager
+    def stage(self, name: str, reserve_ms: float = 0):
+        """Mede uma etapa contra o tempo restante ao entrar nela (menos a reserva)"""
+        allotted_ms = self.remaining_ms(reserve_ms)
+        started = time.monotonic()
+        try:
+            yield allotted_ms
+        finally:
+            self.record(name, started, allotted_ms)
+
+    def degrade(self, stage: str, path: str):
+        """Registra um caminho degradado escolhido por uma etapa"""
+        self.degraded.append(f"{stage}:{path}")
+
+    def finish(self):
+        """Resposta começou a tocar: fecha a duração do turno (só a primeira vez)"""
+        if self.total_ms is None:
+            self.total_ms = round(self.elapsed_ms())
+
+    def summary(self) -> dict:
+        total_ms = self.total_ms if self.total_ms is not None else round(self.elapsed_ms())
+        return {
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": total_ms,
+            "over_budget": total_ms > self.budget_ms,
+            "stages": dict(self.stages),
+            "overruns": list(self.overruns),
+            "degraded": list(self.degraded),
+        }
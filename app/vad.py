@@ -0,0 +1,118 @@
+"""
+Detector local de atividade de voz (VAD) - energia + zero-crossing
+
+Roda sobre os mesmos frames L16 que process_audio recebe. Os cálculos são
+vetorizados com numpy por bloco de frames de 20ms, então o custo por chunk é
+de microssegundos e pode rodar direto no loop de eventos.
+"""
+
+from typing import List
+
+import numpy as np
+
+from config import settings
+
+# Duração de cada frame de análise
+FRAME_MS = 20
+
+# Eventos retornados por VoiceActivityDetector.process()
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+
+
+class VoiceActivityDetector:
+    """
+    Detecta início e fim de fala comparando a energia de cada frame com um
+    piso de ruído adaptativo. Frames com energia moderada e muitas passagens
+    por zero (fricativas como "s", "f") também contam como voz.
+
+    Args:
+        threshold_db: Margem acima do piso de ruído para considerar voz
+        silence_ms: Silêncio contínuo que encerra a fala
+        min_speech_ms: Voz contínua necessária para iniciar a fala
+        min_level_db: Nível absoluto mínimo (dBFS) para considerar voz
+        fricative_zcr: Taxa de passagens por zero que caracteriza fricativas
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = settings.SAMPLE_RATE,
+        threshold_db: float = settings.VAD_THRESHOLD_DB,
+        silence_ms: int = settings.VAD_SILENCE_MS,
+        min_speech_ms: int = 100,
+        min_level_db: float = -50.0,
+        fricative_zcr: float = 0.25,
+    ):
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.silence_ms = silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.min_level_db = min_level_db
+        self.fricative_zcr = fricative_zcr
+
+        self._frame = sample_rate * FRAME_MS // 1000
+        self._pending = np.empty(0, dtype=np.int16)
+
+        self.noise_db = -60.0
+        self.in_speech = False
+        self._voiced_ms = 0
+        self._silent_ms = 0
+
+    def reset(self):
+        """Volta ao estado de silêncio (mantém o piso de ruído)"""
+        self._pending = np.empty(0, dtype=np.int16)
+        self.in_speech = False
+        self._voiced_ms = 0
+        self._silent_ms = 0
+
+    def process(self, pcm: bytes) -> List[str]:
+        """
+        Analisa um chunk de áudio L16.
+
+        Returns:
+            Lista de eventos (SPEECH_START / SPEECH_END) ocorridos no chunk
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+        if self._pending.size:
+            samples = np.concatenate((self._pending, samples))
+
+        count = len(samples) // self._frame
+        self._pending = samples[count * self._frame:].copy()
+        if count == 0:
+            return []
+
+        frames = samples[:count * self._frame].reshape(count, self._frame).astype(np.float32)
+
+        # Energia (dBFS) e taxa de passagens por zero de cada frame
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1e-9
+        level_db = 20 * np.log10(rms / 32768.0)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self._frame
+
+        events = []
+        for db, rate in zip(level_db.tolist(), zcr.tolist()):
+            margin = db - self.noise_db
+            voiced = db > self.min_level_db and (
+                margin > self.threshold_db
+                or (margin > self.threshold_db / 2 and rate > self.fricative_zcr)
+            )
+
+            if voiced:
+                self._voiced_ms += FRAME_MS
+                self._silent_ms = 0
+                if not self.in_speech and self._voiced_ms >= self.min_speech_ms:
+                    self.in_speech = True
+                    events.append(SPEECH_START)
+            else:
+                self._voiced_ms = 0
+                self._silent_ms += FRAME_MS
+                if self.in_speech and self._silent_ms >= self.silence_ms:
+                    self.in_speech = False
+                    events.append(SPEECH_END)
+
+                # Piso de ruído: desce rápido, sobe devagar (só fora da fala)
+                if not self.in_speech:
+                    alpha = 0.3 if db < self.noise_db else 0.02
+                    self.noise_db += alpha * (db - self.noise_db)
+
+        return events
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+LigAI - Avaliação offline do VAD local
+
+Roda o VoiceActivityDetector sobre gravações de chamadas (FLAC/Opus/WAV) com
+uma grade de parâmetros e mostra, para cada combinação, quantas falas foram
+detectadas e a latência de fim de fala.
+
+Em gravações estéreo (ver call_recorder) usa o canal esquerdo (chamador).
+
+Com um arquivo de rótulos também mede cortes prematuros e falas perdidas:
+    {"gravacao.flac": [[inicio_ms, fim_ms], ...], ...}
+
+Uso:
+    python vad_eval.py /audio/recordings/*.flac
+    python vad_eval.py rec1.flac rec2.flac --labels rotulos.json \\
+        --thresholds 8,12,16 --silence 200,250,400
+"""
+
+import argparse
+import json
+import os
+import sys
+from statistics import mean, median
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import soundfile as sf
+
+from vad import VoiceActivityDetector, FRAME_MS, SPEECH_START, SPEECH_END
+
+# Tolerância para casar um fim de fala detectado com o rótulo
+MATCH_WINDOW_MS = 2000
+
+
+def load_caller_audio(path: str) -> tuple[np.ndarray, int]:
+    """Lê o áudio como int16 (canal do chamador)"""
+    data, sample_rate = sf.read(path, dtype="int16", always_2d=True)
+    return np.ascontiguousarray(data[:, 0]), sample_rate
+
+
+def detect(samples: np.ndarray, sample_rate: int, threshold_db: float, silence_ms: int) -> list:
+    """Simula o fluxo ao vivo (chunks de 20ms) e retorna [(inicio_ms, fim_ms), ...]"""
+    vad = VoiceActivityDetector(
+        sample_rate=sample_rate,
+        threshold_db=threshold_db,
+        silence_ms=silence_ms,
+    )
+    chunk = sample_rate * FRAME_MS // 1000
+    segments = []
+    start_ms = None
+
+    for i in range(0, len(samples), chunk):
+        t_ms = (i + chunk) * 1000 // sample_rate
+        for event in vad.process(samples[i:i + chunk].tobytes()):
+            if event == SPEECH_START:
+                start_ms = t_ms
+            elif event == SPEECH_END and start_ms is not None:
+                segments.append((start_ms, t_ms))
+                start_ms = None
+
+    return segments
+
+
+def score(segments: list, labels: list) -> dict:
+    """Compara fins detectados com os rótulos"""
+    ends = [end for _, end in segments]
+    latencies = []
+    missed = 0
+
+    for start, end in labels:
+        matches = [e for e in ends if end <= e <= end + MATCH_WINDOW_MS]
+        if matches:
+            latencies.append(min(matches) - end)
+        else:
+            missed += 1
+
+    # Fim detectado no meio de uma fala rotulada = corte prematuro
+    premature = sum(
+        1 for e in ends
+        if any(start < e < end for start, end in labels)
+    )
+
+    return {"latencies": latencies, "missed": missed, "premature": premature}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação offline do VAD local")
+    parser.add_argument("files", nargs="+", help="Gravações (FLAC, Opus ou WAV)")
+    parser.add_argument("--labels", help="JSON com falas rotuladas por arquivo")
+    parser.add_argument("--thresholds", default="8,12,16", help="Margens em dB (lista)")
+    parser.add_argument("--silence", default="200,250,400", help="Silêncio de fim em ms (lista)")
+    args = parser.parse_args()
+
+    labels = {}
+    if args.labels:
+        with open(args.labels) as f:
+            labels = json.load(f)
+
+    thresholds = [float(v) for v in args.thresholds.split(",")]
+    silences = [int(v) for v in args.silence.split(",")]
+
+    audio = {}
+    for path in args.files:
+        try:
+            audio[path] = load_caller_audio(path)
+        except Exception as e:
+            print(f"[ERRO] {path}: {e}")
+
+    if not audio:
+        sys.exit(1)
+
+    total_s = sum(len(s) / sr for s, sr in audio.values())
+    print(f"\n{len(audio)} gravações, {total_s:.0f}s de áudio\n")
+    print(f"{'margem_db':>9} {'silencio_ms':>11} {'falas':>6} {'fala_med_ms':>11} "
+          f"{'lat_med_ms':>10} {'lat_p50_ms':>10} {'perdidas':>8} {'cortes':>6}")
+
+    for threshold_db in thresholds:
+        for silence_ms in silences:
+            lengths, latencies = [], []
+            missed = premature = 0
+
+            for path, (samples, sample_rate) in audio.items():
+                segments = detect(samples, sample_rate, threshold_db, silence_ms)
+                lengths.extend(end - start for start, end in segments)
+
+                file_labels = labels.get(os.path.basename(path)) or labels.get(path)
+                if file_labels:
+                    result = score(segments, file_labels)
+                    latencies.extend(result["latencies"])
+                    missed += result["missed"]
+                    premature += result["premature"]
+
+            print(
+                f"{threshold_db:>9.1f} {silence_ms:>11} {len(lengths):>6} "
+                f"{(mean(lengths) if lengths else 0):>11.0f} "
+                f"{(mean(latencies) if latencies else 0):>10.0f} "
+                f"{(median(latencies) if latencies else 0):>10.0f} "
+                f"{missed if labels else '-':>8} {premature if labels else '-':>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
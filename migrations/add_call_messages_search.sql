@@ -0,0 +1,20 @@
+-- Migration: Full-text search over call transcripts
+-- Date: 2026-10-18
+-- Description: Adds a generated tsvector column (Portuguese config) to call_messages,
+--              a GIN index for transcript search and an index used by the campaign filter
+
+ALTER TABLE call_messages
+ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(content, ''))) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_search
+    ON call_messages USING GIN (search_vector);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaign_contacts_call
+    ON campaign_contacts (call_id);
+
+-- Verification
+SELECT column_name, data_type, is_generated
+FROM information_schema.columns
+WHERE table_name = 'call_messages'
+  AND column_name = 'search_vector';
@@ -0,0 +1,32 @@
+-- Migration: Add call recordings
+-- Date: 2026-10-18
+-- Description: Adds per-prompt recording options and the call_recordings index table
+--              (audio files are stored under RECORDINGS_DIR)
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS recording_enabled BOOLEAN NOT NULL DEFAULT FALSE;
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS recording_format VARCHAR(10) NOT NULL DEFAULT 'flac';
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS recording_channels VARCHAR(10) NOT NULL DEFAULT 'mono';
+
+CREATE TABLE IF NOT EXISTS call_recordings (
+    id SERIAL PRIMARY KEY,
+    call_id INTEGER NOT NULL UNIQUE REFERENCES calls(id) ON DELETE CASCADE,
+    file_path VARCHAR(255) NOT NULL,
+    format VARCHAR(10) NOT NULL,
+    channels INTEGER NOT NULL DEFAULT 1,
+    sample_rate INTEGER NOT NULL DEFAULT 8000,
+    duration_seconds FLOAT NOT NULL DEFAULT 0,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    dropped_ms INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Verification
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'prompts'
+  AND column_name IN ('recording_enabled', 'recording_format', 'recording_channels');
@@ -0,0 +1,23 @@
+-- Migration: Composite indexes for call history keyset pagination
+-- Date: 2026-10-18
+-- Description: GET /api/v1/calls pages with ORDER BY start_time DESC, id DESC
+--              and seeks with (start_time, id) < (cursor). These indexes serve
+--              the unfiltered, status-filtered and date-filtered listings.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calls_start_time_id
+    ON calls (start_time, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calls_status_start_time_id
+    ON calls (status, start_time, id);
+
+-- Superseded by the composite indexes above
+DROP INDEX CONCURRENTLY IF EXISTS idx_calls_start_time;
+DROP INDEX CONCURRENTLY IF EXISTS idx_calls_status;
+
+-- Refresh planner statistics (used by count=estimated)
+ANALYZE calls;
+
+-- Verification
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'calls';
@@ -0,0 +1,34 @@
+-- Migration: Add LLM latency budget settings and per-call fallback usage
+-- Date: 2026-10-18
+-- Description: Adds per-prompt LLM budgets (fallback model, first-token and hard deadlines;
+--              null = settings defaults) and per-call counters of fallback races/wins
+--              and hard deadline misses
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS llm_fallback_model VARCHAR(50);
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS llm_first_token_ms INTEGER;
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS llm_hard_deadline_ms INTEGER;
+
+ALTER TABLE calls
+ADD COLUMN IF NOT EXISTS llm_turns INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE calls
+ADD COLUMN IF NOT EXISTS llm_fallback_races INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE calls
+ADD COLUMN IF NOT EXISTS llm_fallback_wins INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE calls
+ADD COLUMN IF NOT EXISTS llm_deadline_misses INTEGER NOT NULL DEFAULT 0;
+
+-- Verification
+SELECT table_name, column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE (table_name = 'prompts'
+       AND column_name IN ('llm_fallback_model', 'llm_first_token_ms', 'llm_hard_deadline_ms'))
+   OR (table_name = 'calls'
+       AND column_name IN ('llm_turns', 'llm_fallback_races', 'llm_fallback_wins', 'llm_deadline_misses'));
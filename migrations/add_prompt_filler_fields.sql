@@ -0,0 +1,16 @@
+-- Migration: Add filler settings to prompts
+-- Date: 2026-10-18
+-- Description: Adds fillers_enabled and filler_delay_ms columns
+--              (null filler_delay_ms = adaptive delay from recent response latency)
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS fillers_enabled BOOLEAN NOT NULL DEFAULT TRUE;
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS filler_delay_ms INTEGER;
+
+-- Verification
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'prompts'
+  AND column_name IN ('fillers_enabled', 'filler_delay_ms');
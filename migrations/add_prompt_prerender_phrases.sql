@@ -0,0 +1,13 @@
+-- Migration: Add pre-rendered phrases to prompts
+-- Date: 2026-10-18
+-- Description: Adds prerender_phrases (JSON array of sentences always pre-rendered
+--              by the pre-render job, on top of the ones mined from transcripts)
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS prerender_phrases TEXT;
+
+-- Verification
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'prompts'
+  AND column_name IN ('prerender_phrases');
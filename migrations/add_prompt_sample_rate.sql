@@ -0,0 +1,13 @@
+-- Migration: Add per-prompt audio sample rate
+-- Date: 2026-10-18
+-- Description: Adds sample_rate (8000 = narrowband, 16000 = wideband L16 for G.722/Opus
+--              trunks; null = trunk default SAMPLE_RATE)
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS sample_rate INTEGER;
+
+-- Verification
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'prompts'
+  AND column_name = 'sample_rate';
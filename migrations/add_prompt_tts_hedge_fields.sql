@@ -0,0 +1,16 @@
+-- Migration: Add TTS hedging settings to prompts
+-- Date: 2026-10-18
+-- Description: Adds tts_hedge_ms (deadline before a second TTS request; null = TTS_HEDGE_MS,
+--              0 = off) and tts_hedge_voice_id (voice of the second request; null = same voice)
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS tts_hedge_ms INTEGER;
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS tts_hedge_voice_id VARCHAR(50);
+
+-- Verification
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'prompts'
+  AND column_name IN ('tts_hedge_ms', 'tts_hedge_voice_id');
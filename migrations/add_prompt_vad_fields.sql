@@ -0,0 +1,19 @@
+-- Migration: Add local VAD settings to prompts
+-- Date: 2026-10-18
+-- Description: Adds vad_enabled, vad_threshold_db and vad_silence_ms columns
+--              (null thresholds fall back to VAD_THRESHOLD_DB / VAD_SILENCE_MS)
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS vad_enabled BOOLEAN NOT NULL DEFAULT FALSE;
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS vad_threshold_db FLOAT;
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS vad_silence_ms INTEGER;
+
+-- Verification
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'prompts'
+  AND column_name IN ('vad_enabled', 'vad_threshold_db', 'vad_silence_ms');
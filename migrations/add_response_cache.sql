@@ -0,0 +1,26 @@
+-- Migration: Add LLM response cache
+-- Date: 2026-10-18
+-- Description: Adds per-prompt response cache options and the response_cache_rules table
+--              (pin = always reuse the answer, forbid = never cache it)
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS response_cache_enabled BOOLEAN NOT NULL DEFAULT FALSE;
+
+ALTER TABLE prompts
+ADD COLUMN IF NOT EXISTS response_cache_ttl_seconds INTEGER;
+
+CREATE TABLE IF NOT EXISTS response_cache_rules (
+    id SERIAL PRIMARY KEY,
+    prompt_id INTEGER NOT NULL REFERENCES prompts(id) ON DELETE CASCADE,
+    utterance VARCHAR(500) NOT NULL,
+    rule VARCHAR(10) NOT NULL,
+    response_text TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    CONSTRAINT uq_response_cache_rule UNIQUE (prompt_id, utterance)
+);
+
+-- Verification
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'prompts'
+  AND column_name IN ('response_cache_enabled', 'response_cache_ttl_seconds');
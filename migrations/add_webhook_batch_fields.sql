@@ -0,0 +1,39 @@
+-- Migration: Add batched delivery fields to webhooks
+-- Date: 2026-10-18
+-- Description: Adds per-webhook batch delivery settings and batch/event ids on delivery logs
+
+-- Delivery mode: 'single' (one POST per event) or 'batch'
+ALTER TABLE webhook_configs
+ADD COLUMN IF NOT EXISTS delivery_mode VARCHAR(10) DEFAULT 'single';
+
+-- Batch body format: 'json' (array) or 'ndjson'
+ALTER TABLE webhook_configs
+ADD COLUMN IF NOT EXISTS batch_format VARCHAR(10) DEFAULT 'json';
+
+-- Flush thresholds
+ALTER TABLE webhook_configs
+ADD COLUMN IF NOT EXISTS batch_max_events INTEGER DEFAULT 50;
+
+ALTER TABLE webhook_configs
+ADD COLUMN IF NOT EXISTS batch_max_wait_ms INTEGER DEFAULT 1000;
+
+-- Per-event id (idempotency) and batch membership on delivery logs
+ALTER TABLE webhook_logs
+ADD COLUMN IF NOT EXISTS event_id VARCHAR(64);
+
+ALTER TABLE webhook_logs
+ADD COLUMN IF NOT EXISTS batch_id VARCHAR(64);
+
+ALTER TABLE webhook_logs
+ADD COLUMN IF NOT EXISTS batch_size INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_webhook_logs_batch ON webhook_logs (batch_id);
+
+-- Verification
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name IN ('webhook_configs', 'webhook_logs')
+  AND column_name IN (
+    'delivery_mode', 'batch_format', 'batch_max_events', 'batch_max_wait_ms',
+    'event_id', 'batch_id', 'batch_size'
+  );
@@ -0,0 +1,61 @@
+-- Migration: Time-partitioned webhook logs with payloads stored once per event
+-- Date: 2026-10-18
+-- Description: Replaces webhook_logs with a table range-partitioned by created_at
+--              and moves payloads to webhook_events (also partitioned). The
+--              application creates the monthly/daily partitions at startup and
+--              drops the expired ones (WEBHOOK_LOG_RETENTION_DAYS).
+--
+-- The old table is kept as webhook_logs_legacy; drop it when no longer needed:
+--   DROP TABLE webhook_logs_legacy;
+
+BEGIN;
+
+ALTER TABLE IF EXISTS webhook_logs RENAME TO webhook_logs_legacy;
+ALTER INDEX IF EXISTS idx_webhook_logs_config RENAME TO idx_webhook_logs_legacy_config;
+ALTER INDEX IF EXISTS idx_webhook_logs_created RENAME TO idx_webhook_logs_legacy_created;
+ALTER INDEX IF EXISTS idx_webhook_logs_batch RENAME TO idx_webhook_logs_legacy_batch;
+
+-- Event payloads (one row per event, shared by all attempts)
+CREATE TABLE IF NOT EXISTS webhook_events (
+    id VARCHAR(64) NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    config_id INTEGER NOT NULL REFERENCES webhook_configs (id) ON DELETE CASCADE,
+    event_type VARCHAR(50) NOT NULL,
+    payload TEXT,
+    payload_compressed BYTEA,
+    payload_size INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_webhook_events_config_created
+    ON webhook_events (config_id, created_at);
+
+-- Delivery attempts
+CREATE TABLE IF NOT EXISTS webhook_logs (
+    id SERIAL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    config_id INTEGER NOT NULL REFERENCES webhook_configs (id) ON DELETE CASCADE,
+    event_type VARCHAR(50) NOT NULL,
+    event_id VARCHAR(64),
+    batch_id VARCHAR(64),
+    batch_size INTEGER,
+    status_code INTEGER,
+    response_body TEXT,
+    attempt INTEGER NOT NULL DEFAULT 1,
+    success BOOLEAN NOT NULL DEFAULT FALSE,
+    error_message TEXT,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_webhook_logs_config_created
+    ON webhook_logs (config_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_webhook_logs_batch
+    ON webhook_logs (batch_id);
+
+COMMIT;
+
+-- Verification
+SELECT c.relname AS partitioned_table
+FROM pg_partitioned_table pt
+JOIN pg_class c ON c.oid = pt.partrelid
+WHERE c.relname IN ('webhook_logs', 'webhook_events');
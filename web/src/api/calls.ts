@@ -58,8 +58,8 @@ export function useDialCall() {
   const queryClient = useQueryClient();
 
   return useMutation({
-    mutationFn: (data: { number: string; prompt_id?: number }) =>
-      fetchApi<{ success: boolean; call_id?: string; message: string }>('/calls/dial', {
+    mutationFn: (data: { number: string; prompt_id?: number; priority?: number }) =>
+      fetchApi<{ success: boolean; call_id?: string; message: string; queue_wait_ms?: number }>('/calls/dial', {
         method: 'POST',
         body: JSON.stringify(data),
       }),
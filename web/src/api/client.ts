@@ -29,6 +29,23 @@ export interface Prompt {
   voice_id: string;
   llm_model: string;
   temperature: number;
+  recording_enabled?: boolean;
+  recording_format?: 'flac' | 'opus';
+  recording_channels?: 'mono' | 'stereo';
+  vad_enabled?: boolean;
+  vad_threshold_db?: number | null;
+  vad_silence_ms?: number | null;
+  fillers_enabled?: boolean;
+  filler_delay_ms?: number | null;
+  response_cache_enabled?: boolean;
+  response_cache_ttl_seconds?: number | null;
+  llm_fallback_model?: string | null;
+  llm_first_token_ms?: number | null;
+  llm_hard_deadline_ms?: number | null;
+  tts_hedge_ms?: number | null;
+  tts_hedge_voice_id?: string | null;
+  sample_rate?: 8000 | 16000 | null;
+  prerender_phrases?: string[];
   is_active: boolean;
   created_at: string;
   updated_at: string;
@@ -42,6 +59,36 @@ export interface ActiveCall {
   state: string;
   duration: number;
   message_count: number;
+  sample_rate?: number;
+  stt_queue?: {
+    frames_in: number;
+    bytes_in: number;
+    packets_out: number;
+    queued_ms: number;
+    max_queued_ms: number;
+    dropped_ms: number;
+    overflows: number;
+    send_errors: number;
+  } | null;
+  llm?: {
+    llm_turns: number;
+    llm_fallback_races: number;
+    llm_fallback_wins: number;
+    llm_deadline_misses: number;
+  } | null;
+  turn?: {
+    turns: number;
+    turns_over_budget: number;
+    stage_overruns: number;
+    last: {
+      budget_ms: number;
+      elapsed_ms: number;
+      over_budget: boolean;
+      stages: Record<string, number>;
+      overruns: string[];
+      degraded: string[];
+    } | null;
+  } | null;
 }
 
 export interface CallMessage {
@@ -65,15 +112,33 @@ export interface Call {
   end_time: string | null;
   duration_seconds: number | null;
   summary: string | null;
+  llm_turns?: number;
+  llm_fallback_races?: number;
+  llm_fallback_wins?: number;
+  llm_deadline_misses?: number;
   created_at: string;
   messages?: CallMessage[];
 }
 
+export interface CallRecording {
+  id: number;
+  call_id: number;
+  format: 'flac' | 'opus';
+  channels: number;
+  sample_rate: number;
+  duration_seconds: number;
+  size_bytes: number;
+  dropped_ms: number;
+  created_at: string;
+}
+
 export interface CallsListResponse {
   items: Call[];
-  total: number;
-  page: number;
+  total: number | null;
+  page: number | null;
   per_page: number;
+  total_is_estimate: boolean;
+  next_cursor: string | null;
 }
 
 export interface Stats {
@@ -82,6 +147,22 @@ export interface Stats {
   completed_calls: number;
   avg_duration_seconds: number;
   max_concurrent_calls?: number;
+  capacity?: {
+    max_concurrent_calls: number;
+    in_use: number;
+    connected: number;
+    originating: number;
+    inbound: number;
+    utilization: number;
+    queue_length: number;
+    queue_max: number;
+    admitted: number;
+    queued: number;
+    rejected: number;
+    queue_timeouts: number;
+    ring_timeouts: number;
+    peak_in_use: number;
+  };
 }
 
 export interface Setting {
@@ -94,6 +175,17 @@ export interface Setting {
   updated_at: string | null;
 }
 
+export interface AudioRegenStatus {
+  status: 'idle' | 'running' | 'completed' | 'failed' | 'cancelled';
+  started_at: string | null;
+  finished_at: string | null;
+  total: number;
+  completed: number;
+  failed: number;
+  items: Record<string, { status: 'pending' | 'completed' | 'failed'; error: string | null }>;
+  error: string | null;
+}
+
 export interface TestApiKeyResponse {
   success: boolean;
   message: string;
@@ -1,6 +1,6 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { fetchApi } from './client';
-import type { Setting, TestApiKeyResponse } from './client';
+import type { AudioRegenStatus, Setting, TestApiKeyResponse } from './client';
 
 export function useSettings() {
   return useQuery({
@@ -45,3 +45,26 @@ export function useReloadSettings() {
     },
   });
 }
+
+export function useAudioRegeneration() {
+  return useQuery({
+    queryKey: ['audio-regen'],
+    queryFn: () => fetchApi<AudioRegenStatus>('/settings/audio/regenerate'),
+    // Progress also arrives over the dashboard WebSocket
+    refetchInterval: (query) => (query.state.data?.status === 'running' ? 5000 : false),
+  });
+}
+
+export function useStartAudioRegeneration() {
+  const queryClient = useQueryClient();
+  return useMutation({
+    mutationFn: () =>
+      fetchApi<AudioRegenStatus>('/settings/audio/regenerate', {
+        method: 'POST',
+        body: JSON.stringify({}),
+      }),
+    onSuccess: (data) => {
+      queryClient.setQueryData(['audio-regen'], data);
+    },
+  });
+}
@@ -1,11 +1,18 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { fetchApi } from './client';
 
+export type WebhookDeliveryMode = 'single' | 'batch';
+export type WebhookBatchFormat = 'json' | 'ndjson';
+
 export interface WebhookConfig {
   id: number;
   url: string;
   events: string[];
   is_active: boolean;
+  delivery_mode: WebhookDeliveryMode;
+  batch_format: WebhookBatchFormat;
+  batch_max_events: number;
+  batch_max_wait_ms: number;
   created_at: string;
   updated_at: string;
 }
@@ -13,6 +20,9 @@ export interface WebhookConfig {
 export interface WebhookLog {
   id: number;
   event_type: string;
+  event_id: string | null;
+  batch_id: string | null;
+  batch_size: number | null;
   status_code: number | null;
   success: boolean;
   attempt: number;
@@ -24,6 +34,10 @@ export interface CreateWebhookData {
   url: string;
   events: string[];
   secret?: string;
+  delivery_mode?: WebhookDeliveryMode;
+  batch_format?: WebhookBatchFormat;
+  batch_max_events?: number;
+  batch_max_wait_ms?: number;
 }
 
 export interface UpdateWebhookData {
@@ -31,6 +45,10 @@ export interface UpdateWebhookData {
   events?: string[];
   is_active?: boolean;
   secret?: string;
+  delivery_mode?: WebhookDeliveryMode;
+  batch_format?: WebhookBatchFormat;
+  batch_max_events?: number;
+  batch_max_wait_ms?: number;
 }
 
 export function useWebhooks() {
@@ -33,6 +33,9 @@ export function useDashboardWebSocket(onMessage?: MessageHandler) {
           case 'stats_updated':
             queryClient.invalidateQueries({ queryKey: ['stats'] });
             break;
+          case 'audio_regen_progress':
+            queryClient.setQueryData(['audio-regen'], message.data);
+            break;
           case 'ping':
             ws.send(JSON.stringify({ type: 'pong' }));
             break;
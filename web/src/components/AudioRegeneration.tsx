@@ -0,0 +1,87 @@
+import { RefreshCw } from 'lucide-react';
+import { useAudioRegeneration, useStartAudioRegeneration } from '../api/settings';
+import { cn } from '../lib/utils';
+
+const statusLabels: Record<string, string> = {
+  idle: 'Nunca executada',
+  running: 'Em andamento',
+  completed: 'Concluida',
+  failed: 'Falhou',
+  cancelled: 'Cancelada',
+};
+
+function itemLabel(key: string): string {
+  if (key === 'fillers') return 'Fillers';
+  if (key === 'global_greeting') return 'Saudacao global';
+  return `Prompt #${key.replace('prompt:', '')}`;
+}
+
+export function AudioRegeneration() {
+  const { data: job } = useAudioRegeneration();
+  const startMutation = useStartAudioRegeneration();
+
+  const running = job?.status === 'running';
+  const done = job ? job.completed + job.failed : 0;
+  const percent = job && job.total ? Math.round((done / job.total) * 100) : 0;
+  const failedItems = Object.entries(job?.items || {}).filter(([, item]) => item.status === 'failed');
+
+  return (
+    <div className="bg-white rounded-xl shadow-sm border p-6">
+      <div className="flex items-center justify-between mb-4">
+        <h2 className="text-lg font-semibold text-gray-900">Audios pre-gravados</h2>
+        <button
+          onClick={() => startMutation.mutate()}
+          disabled={running || startMutation.isPending}
+          className={cn(
+            'flex items-center gap-2 px-3 py-2 text-sm rounded-lg transition-colors',
+            running || startMutation.isPending
+              ? 'bg-gray-200 text-gray-400 cursor-not-allowed'
+              : 'bg-blue-600 hover:bg-blue-700 text-white'
+          )}
+        >
+          <RefreshCw className={cn('w-4 h-4', running && 'animate-spin')} />
+          Regenerar
+        </button>
+      </div>
+
+      <p className="text-sm text-gray-500 mb-3">
+        Saudacoes dos prompts, saudacao global e fillers.{' '}
+        {statusLabels[job?.status || 'idle']}
+      </p>
+
+      {job && job.status !== 'idle' && (
+        <>
+          <div className="w-full bg-gray-100 rounded-full h-2 mb-2">
+            <div
+              className={cn('h-2 rounded-full', job.failed ? 'bg-orange-500' : 'bg-green-600')}
+              style={{ width: `${percent}%` }}
+            />
+          </div>
+          <p className="text-sm text-gray-600">
+            {done}/{job.total} prontos
+            {job.failed > 0 && <span className="text-orange-600"> ({job.failed} com falha)</span>}
+          </p>
+        </>
+      )}
+
+      {failedItems.length > 0 && (
+        <ul className="mt-3 space-y-1 text-xs text-red-700">
+          {failedItems.map(([key, item]) => (
+            <li key={key}>
+              {itemLabel(key)}: {item.error}
+            </li>
+          ))}
+        </ul>
+      )}
+
+      {job?.error && (
+        <div className="mt-3 p-3 bg-red-50 text-red-700 rounded-lg text-sm">{job.error}</div>
+      )}
+      {startMutation.isError && (
+        <div className="mt-3 p-3 bg-red-50 text-red-700 rounded-lg text-sm">
+          {(startMutation.error as Error).message}
+        </div>
+      )}
+    </div>
+  );
+}
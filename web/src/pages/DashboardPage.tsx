@@ -1,6 +1,7 @@
 import { StatsCards } from '../components/StatsCards';
 import { ActiveCalls } from '../components/ActiveCalls';
 import { Dialer } from '../components/Dialer';
+import { AudioRegeneration } from '../components/AudioRegeneration';
 import { useDashboardWebSocket } from '../api/websocket';
 
 export function DashboardPage() {
@@ -24,9 +25,10 @@ export function DashboardPage() {
           <ActiveCalls />
         </div>
 
-        {/* Dialer */}
-        <div>
+        {/* Dialer + pre-recorded audio */}
+        <div className="space-y-6">
           <Dialer />
+          <AudioRegeneration />
         </div>
       </div>
     </div>
@@ -288,21 +288,48 @@ export function DocsPage() {
           <Endpoint
             method="POST"
             path="/api/v1/calls/dial"
-            description="Inicia uma nova chamada"
+            description="Inicia uma nova chamada. Sem vaga livre (MAX_CONCURRENT_CALLS), o pedido espera na fila por prioridade; fila cheia ou tempo esgotado retorna 503 com a posicao na fila"
             body={`{
   "number": "5511999887766",
-  "prompt_id": 1
+  "prompt_id": 1,
+  "priority": 5,
+  "queue_timeout_s": 30
 }`}
             response={`{
   "success": true,
   "call_id": "call-123",
-  "message": "Chamada iniciada"
+  "message": "Chamada iniciada",
+  "queue_wait_ms": 1840
 }`}
             curl={`curl -X POST http://localhost:8000/api/v1/calls/dial \\
   -H "Content-Type: application/json" \\
   -d '{"number": "5511999887766"}'`}
           />
 
+          <Endpoint
+            method="GET"
+            path="/api/v1/calls/capacity"
+            description="Vagas de chamadas em uso, utilizacao e fila de discagem"
+            response={`{
+  "max_concurrent_calls": 15,
+  "in_use": 15,
+  "connected": 13,
+  "originating": 2,
+  "inbound": 1,
+  "utilization": 1.0,
+  "queue_length": 1,
+  "queue_max": 50,
+  "queue": [{"position": 1, "call_id": "call-456", "priority": 5, "waited_ms": 2100}],
+  "admitted": 812,
+  "queued": 40,
+  "rejected": 3,
+  "queue_timeouts": 1,
+  "ring_timeouts": 57,
+  "peak_in_use": 15
+}`}
+            curl="curl http://localhost:8000/api/v1/calls/capacity"
+          />
+
           <Endpoint
             method="POST"
             path="/api/v1/calls/{call_id}/hangup"
@@ -812,7 +839,7 @@ export function DocsPage() {
             <h4 className="font-medium text-blue-900 mb-2">Como funciona</h4>
             <ul className="text-blue-800 text-sm space-y-1">
               <li>1. O texto e convertido em audio via Murf AI (TTS)</li>
-              <li>2. O audio e salvo em formato WAV (8kHz mono, 16-bit PCM)</li>
+              <li>2. O audio e salvo em formato WAV (mono, 16-bit PCM), um arquivo por taxa em uso (8kHz / 16kHz)</li>
               <li>3. Proximas chamadas usarao a nova saudacao automaticamente</li>
             </ul>
           </div>